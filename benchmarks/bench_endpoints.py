@@ -0,0 +1,230 @@
+"""
+benchmark of the oauth2 endpoints of the example app in tests/app.py:
+the authorization_code and refresh_token grants of Token.on_post,
+Authorization.on_get and the protected_resource_view of ProtectedEndpoint.
+
+Each scenario reports its throughput in operations per second and the p50,
+p95 and p99 latencies. The results can be saved in json and compared with
+the results of another commit.
+
+usage:
+    python benchmarks/bench_endpoints.py [--url URL] [--create-tables]
+        [--iterations 500] [--only NAME ...] [--output results.json]
+        [--compare baseline.json]
+
+Run it against a local scratch database, never a production one: the rows
+are created in a transaction rolled back at the end, --create-tables
+creates the tables of a new database. By default the database is the one
+of the FALCON_DB_* environment variables.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from falcon import testing
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from falcon_oauth.oauth2.models import (Application, AuthorizationCode,  # pylint: disable=wrong-import-position
+                                        BearerToken, User)
+from falcon_oauth.utils import database  # pylint: disable=wrong-import-position
+from tests.app import (api, AUTHORIZATION_URI, PROTECTED_ENDPOINT_URI,  # pylint: disable=wrong-import-position
+                       TOKEN_URI)
+
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+def _token():
+    return uuid.uuid4().hex
+
+
+class Fixtures(object):
+
+    """
+    Rows shared by the scenarios and factories of the rows consumed by them.
+    """
+
+    def __init__(self):
+        now = datetime.now(tz=timezone.utc)
+        self.user = User(username='bench', email='bench@bench.com', password='bench',
+                         is_superuser=False, is_staff=False, is_active=True,
+                         last_login=now, date_joined=now)
+        self.application = Application(
+            client_id=_token(), user=self.user, grant_type='authorization_code',
+            response_type='code', scopes='default_scope,default_get',
+            default_scopes='default_scope', redirect_uris='http://bench.url/auth',
+            default_redirect_uri='http://bench.url/auth')
+        self.bearer_token = self.new_bearer_token()
+        database.Session.add_all([self.user, self.application])  # pylint: disable=no-member
+        database.Session.flush()  # pylint: disable=no-member
+
+    def new_bearer_token(self):
+        """Create a bearer token with its refresh token."""
+        bearer_token = BearerToken(
+            application=self.application, user=self.user, scopes='default_get',
+            access_token=_token(), refresh_token=_token(),
+            expires_at=datetime.now(tz=timezone.utc) + timedelta(hours=1))
+        database.Session.add(bearer_token)  # pylint: disable=no-member
+        return bearer_token
+
+    def new_authorization_code(self):
+        """Create an authorization code, used once."""
+        authorization_code = AuthorizationCode(
+            application=self.application, user=self.user, scopes='default_scope',
+            code=_token(), expires_at=datetime.now(tz=timezone.utc) + timedelta(hours=1))
+        database.Session.add(authorization_code)  # pylint: disable=no-member
+        return authorization_code
+
+
+def authorization_code_grant(fixtures):
+    """Exchange an authorization code for a bearer token."""
+    code = fixtures.new_authorization_code().code
+    body = urlencode({'grant_type': 'authorization_code',
+                      'code': code,
+                      'client_id': fixtures.application.client_id,
+                      'redirect_uri': fixtures.application.redirect_uris,
+                      'scope': 'default_scope'})
+    return 'POST', TOKEN_URI, None, FORM_HEADERS, body
+
+
+def refresh_token_grant(fixtures):
+    """Refresh a bearer token."""
+    body = urlencode({'grant_type': 'refresh_token',
+                      'refresh_token': fixtures.new_bearer_token().refresh_token,
+                      'client_id': fixtures.application.client_id})
+    return 'POST', TOKEN_URI, None, FORM_HEADERS, body
+
+
+def authorization_get(fixtures):
+    """Validate an authorization request."""
+    query_string = urlencode({'response_type': 'code',
+                              'client_id': fixtures.application.client_id})
+    return 'GET', AUTHORIZATION_URI, query_string, None, None
+
+
+def protected_resource(fixtures):
+    """Access a resource protected by a bearer token."""
+    headers = {'Authorization': 'Bearer {}'.format(fixtures.bearer_token.access_token)}
+    return 'GET', PROTECTED_ENDPOINT_URI, None, headers, None
+
+
+SCENARIOS = [
+    ('token_authorization_code', authorization_code_grant),
+    ('token_refresh_token', refresh_token_grant),
+    ('authorization_get', authorization_get),
+    ('protected_resource', protected_resource),
+]
+
+
+def percentile(sorted_values, percent):
+    """Get the percentile of sorted values, nearest rank method."""
+    index = max(0, int(round(percent / 100.0 * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(scenario, fixtures, iterations, warmup):
+    """Run a scenario and measure each request, the creation of the rows
+    it needs is not measured.
+
+    :return: dict the throughput and the latencies in milliseconds.
+    """
+    latencies = []
+    for i in range(warmup + iterations):
+        method, path, query_string, headers, body = scenario(fixtures)
+        database.Session.flush()  # pylint: disable=no-member
+        start = time.perf_counter()
+        result = testing.simulate_request(api, method, path, query_string=query_string,
+                                          headers=headers, body=body)
+        elapsed = time.perf_counter() - start
+        if not result.status.startswith('200'):
+            raise RuntimeError('{} {} failed: {} {}'.format(
+                method, path, result.status, result.text))
+        if i >= warmup:
+            latencies.append(elapsed)
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'ops_per_sec': iterations / sum(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def git_commit():
+    """Get the commit benchmarked, if any."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """Print the results, with their change from the baseline results."""
+    print('{:<26} {:>10} {:>9} {:>9} {:>9}'.format('scenario', 'ops/sec', 'p50 ms',
+                                                  'p95 ms', 'p99 ms'))
+    for name, result in results.items():
+        line = '{:<26} {:>10.1f} {:>9.3f} {:>9.3f} {:>9.3f}'.format(
+            name, result['ops_per_sec'], result['p50_ms'], result['p95_ms'], result['p99_ms'])
+        if baseline and name in baseline:
+            change = result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1
+            line += '  {:+.1%} ops/sec'.format(change)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', help='database url, FALCON_DB_* variables by default')
+    parser.add_argument('--create-tables', action='store_true',
+                        help='create the tables, for a new scratch database')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--only', nargs='+', choices=[name for name, _ in SCENARIOS])
+    parser.add_argument('--output', help='save the results in this json file')
+    parser.add_argument('--compare', help='json file of results to compare with')
+    args = parser.parse_args()
+
+    if args.url:
+        database.configure(url=args.url)
+    if args.create_tables:
+        database.Base.metadata.create_all(database.get_engine())
+
+    fixtures = Fixtures()
+    results = {}
+    try:
+        for name, scenario in SCENARIOS:
+            if args.only and name not in args.only:
+                continue
+            results[name] = run_scenario(scenario, fixtures, args.iterations, args.warmup)
+    finally:
+        database.Session.rollback()  # pylint: disable=no-member
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'commit': git_commit(),
+                'date': datetime.now(tz=timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'iterations': args.iterations,
+                'results': results,
+            }, output_file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+micro benchmark of the validator lookups: the time per lookup of the query
+built and compiled on every call, as the validator used to do, against the
+baked queries and the precompiled Core statements.
+
+The database round trip is the same for every variant, the difference is
+the Python overhead of building and compiling the statements.
+
+usage: python benchmarks/bench_lookups.py [--number 2000]
+the database is configured by the FALCON_DB_* environment variables, the
+rows created are rolled back.
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from falcon_oauth.oauth2.models import Application, BearerToken, User
+from falcon_oauth.oauth2.stores import queries, records
+from falcon_oauth.utils.database import Session
+
+
+def create_rows():
+    """Create the application and the token looked up."""
+    now = datetime.now(tz=timezone.utc)
+    user = User(username='bench', email='bench@bench.com', password='bench',
+                is_superuser=False, is_staff=False, is_active=True,
+                last_login=now, date_joined=now)
+    application = Application(client_id='bench_client', user=user,
+                              grant_type='authorization_code', response_type='code',
+                              scopes='bench', default_scopes='bench',
+                              redirect_uris='http://bench/auth',
+                              default_redirect_uri='http://bench/auth')
+    bearer_token = BearerToken(application=application, user=user, scopes='bench',
+                               access_token='bench_access_token',
+                               refresh_token='bench_refresh_token',
+                               expires_at=now + timedelta(hours=1))
+    Session.add_all([user, application, bearer_token])  # pylint: disable=no-member
+    Session.flush()  # pylint: disable=no-member
+
+
+def lookups():
+    """Get the lookups to compare, by name."""
+    session = Session()
+    return [
+        ('client: query', lambda: Application.query.filter(
+            Application.client_id == 'bench_client').one()),
+        ('client: baked', lambda: queries.get_client(session, 'bench_client')),
+        ('client: core record', lambda: records.select_client(session, 'bench_client')),
+        ('bearer token: query', lambda: BearerToken.query.filter(
+            BearerToken.access_token == 'bench_access_token').one()),
+        ('bearer token: baked', lambda: queries.get_bearer_token_by_access_token(
+            session, 'bench_access_token')),
+        ('bearer token: core record', lambda: records.select_bearer_token(
+            session, 'bench_access_token')),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--number', type=int, default=2000, help='lookups per variant')
+    args = parser.parse_args()
+
+    create_rows()
+    try:
+        for name, lookup in lookups():
+            lookup()  # warm up, compiles the cached statements
+            seconds = min(timeit.repeat(lookup, number=args.number, repeat=3))
+            print('{:<28} {:>8.1f} us/lookup'.format(name, seconds / args.number * 1e6))
+    finally:
+        Session.rollback()  # pylint: disable=no-member
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+micro benchmark of the scope checks of validate_bearer_token: the sets of
+strings built on every call, as the validator used to do, against the masks
+of `falcon_oauth.oauth2.scopes`.
+
+The tokens hold a realistic number of scopes, out of an API of a few
+hundred scopes, and the views require a few of them. The string sets only
+know the any-of of flat scopes, the masks also evaluate all-of policies and
+the wildcards of hierarchical scopes.
+
+usage: python benchmarks/bench_scopes.py [--number 100000] [--token-scopes 20]
+    [--api-scopes 300]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from falcon_oauth.oauth2.scopes import AllOf, AnyOf, allows  # pylint: disable=wrong-import-position
+
+RESOURCES = ['billing', 'users', 'invoices', 'orders', 'products', 'reports', 'teams',
+             'projects', 'payments', 'audit']
+ACTIONS = ['read', 'write', 'delete', 'admin', 'export']
+
+
+def api_scopes(count):
+    """Get the scopes of an API, 'resource:sub:action' names."""
+    scopes = []
+    for index in range(count):
+        resource = RESOURCES[index % len(RESOURCES)]
+        scopes.append('{}:{}:{}'.format(resource, index // len(ACTIONS),
+                                        ACTIONS[index % len(ACTIONS)]))
+    return scopes
+
+
+def string_sets(granted, scopes):
+    """The check of the validator before the masks."""
+    return not scopes or bool(set(granted.split(',')) & set(scopes))
+
+
+def checks(args):
+    """Get the checks to compare, by name."""
+    rng = random.Random(0)
+    scopes = api_scopes(args.api_scopes)
+    token_scopes = rng.sample(scopes, args.token_scopes)
+    granted = ','.join(token_scopes)
+    wildcard_granted = ','.join(token_scopes[1:] + ['billing:*'])
+    required = rng.sample(scopes, 3) + [token_scopes[0]]
+    policy = AllOf(AnyOf(*required), AnyOf('billing:0:read', token_scopes[1]))
+    return [
+        ('any-of: string sets', lambda: string_sets(granted, required)),
+        ('any-of: masks', lambda: allows(granted, required)),
+        ('all-of/wildcards: masks', lambda: allows(wildcard_granted, policy)),
+    ]
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--number', type=int, default=100000, help='checks per variant')
+    parser.add_argument('--token-scopes', type=int, default=20, help='scopes of the token')
+    parser.add_argument('--api-scopes', type=int, default=300, help='scopes of the api')
+    args = parser.parse_args()
+
+    for name, check in checks(args):
+        assert check()
+        seconds = min(timeit.repeat(check, number=args.number, repeat=3))
+        print('{:<28} {:>8.3f} us/check'.format(name, seconds / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""
+falcon middleware components
+"""
+from .session import SessionMiddleware
+from .oauth2 import OAuth2Middleware
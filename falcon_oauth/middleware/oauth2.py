@@ -0,0 +1,149 @@
+"""
+middleware protecting the routes of an app with OAuth2 from a map of their
+scopes, instead of a decorator on each responder, see
+
+https://falcon.readthedocs.io/en/stable/api/middleware.html
+"""
+import json
+import logging
+from collections import namedtuple
+
+import falcon
+
+from falcon_oauth.oauth2.decorators import provider as default_provider
+from falcon_oauth.oauth2.scopes import Policy, compile_scopes
+
+# the methods of a route without a policy of their own
+ANY_METHOD = '*'
+
+# the scopes as declared, their compiled Policy, or the function getting the
+# scopes of a request
+ScopePolicy = namedtuple('ScopePolicy', ['scopes', 'policy', 'resolver'])  # pylint: disable=invalid-name
+
+# the policy of the methods of a route mapped by method, not in its map
+DENY = ScopePolicy(scopes=None, policy=None, resolver=None)
+
+
+class Forbidden(falcon.HTTPError):
+
+    """
+    The error of the requests not authorized, with the body of the
+    responses of `OAuth2ProviderDecorator`.
+    """
+
+    def __init__(self):
+        super(Forbidden, self).__init__(falcon.HTTP_403)
+
+    def to_dict(self, obj_type=dict):
+        error = obj_type()
+        error['error'] = 'forbidden'
+        return error
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+def compile_policy(scopes):
+    """Get the policy of a route from its scopes.
+
+    :param scopes: list the scopes, any of them is required, a Policy of
+        `falcon_oauth.oauth2.scopes`, or a function getting them from the
+        request, or None for a public route.
+    :return: ScopePolicy or None.
+    """
+    if scopes is None:
+        return None
+    if callable(scopes):
+        return ScopePolicy(scopes=None, policy=None, resolver=scopes)
+    if isinstance(scopes, str):
+        scopes = [scopes]
+    elif not isinstance(scopes, Policy):
+        scopes = list(scopes)
+    # the lists are compiled once, the validator checks the Policy as it is
+    return ScopePolicy(scopes=scopes, policy=compile_scopes(scopes), resolver=None)
+
+
+def compile_policies(policies):
+    """Get the policies by method of each route.
+
+    :param policies: dict the scopes, see `compile_policy`, by route
+        template, or a dict of the scopes by method of the route, '*' being
+        the other methods. Without '*' the other methods are denied.
+    :return: dict the dict of the ScopePolicy by method, by route template.
+    """
+    routes = {}
+    for uri_template, route_policies in policies.items():
+        if not isinstance(route_policies, dict):
+            route_policies = {ANY_METHOD: route_policies}
+        route = {ANY_METHOD: DENY}
+        route.update((method.upper(), compile_policy(scopes))
+                     for method, scopes in route_policies.items())
+        routes[uri_template] = route
+    return routes
+
+
+class OAuth2Middleware(object):
+
+    """
+    Verify the bearer token of the requests of the routes of a map, in
+    process_resource once falcon found the route. The policies are compiled
+    when the middleware is created: the static scopes are used as they are,
+    only the routes declaring a function call it for each request.
+
+    The routes missing from the map, or mapped to None, are public. The
+    methods missing from the map of a route mapped by method are denied,
+    unless it has a '*' entry: a new responder is never public by mistake,
+    OPTIONS included. A request not authorized is answered with a 403 before
+    the responder.
+    """
+
+    def __init__(self, policies, provider=None):
+        """
+        :param policies: dict the scopes by route template, or by method by
+            route template, see `compile_policies`. For instance::
+
+                {'/items': {'GET': ['items:read'], 'POST': ['items:write']},
+                 '/items/{item_id}': ['items:read'],
+                 '/health': None}
+
+        :param provider: OAuth2ProviderDecorator verifying the requests, the
+            provider of `falcon_oauth.oauth2.decorators` by default.
+        """
+        self.provider = provider or default_provider
+        self._routes = compile_policies(policies)
+
+    def policy(self, uri_template, method):
+        """Get the policy of a route.
+
+        :param uri_template: str the template of the route.
+        :param method: str the HTTP method.
+        :return: ScopePolicy, DENY if the method is not allowed, or None if
+            the route is public.
+        """
+        route = self._routes.get(uri_template)
+        if route is None:
+            return None
+        try:
+            return route[method]
+        except KeyError:
+            return route.get(ANY_METHOD)
+
+    def process_resource(self, req, resp, resource, params):  # pylint: disable=unused-argument
+        """Verify the request, raise a 403 if it is not authorized."""
+        policy = self.policy(req.uri_template, req.method)
+        if policy is None:
+            return
+        if policy is DENY:
+            logging.getLogger(__name__).warning(
+                'method %s not allowed for uri: %s', req.method, req.relative_uri)
+            raise Forbidden()
+        if policy.resolver is not None:
+            valid = self.provider.verify_request(req, policy.resolver(req))
+        else:
+            valid = self.provider.verify_request(req, policy.policy)
+            # the responders get the scopes as declared, not their Policy
+            req.scopes = policy.scopes
+        if not valid:
+            logging.getLogger(__name__).warning(
+                'forbidden access for uri: %s', req.relative_uri)
+            raise Forbidden()
@@ -0,0 +1,81 @@
+"""
+middleware scoping the database session to the falcon request, see
+
+https://falcon.readthedocs.io/en/stable/api/middleware.html
+"""
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from falcon_oauth.utils.database import Session
+
+# the statements of the request of each thread, by engine
+_queries = threading.local()
+
+
+def _count_query(conn, *args, **kwargs):  # pylint: disable=unused-argument
+    counts = getattr(_queries, 'counts', None)
+    if counts is not None:
+        counts[conn.engine] = counts.get(conn.engine, 0) + 1
+
+
+class SessionMiddleware(object):
+
+    """
+    Commit or roll back the database session once at the end of each request
+    and remove it, so the connection goes back to the pool and the identity
+    map does not grow across requests. The session itself is only opened if
+    the request uses the database.
+
+    The number of statements sent to the database during the request is
+    stored in ``req.context['falcon_oauth_queries']``.
+    """
+
+    def __init__(self, session=Session, bind=None):
+        """
+        :param session: the scoped session to manage.
+        :param bind: the engine whose statements are counted, all the
+            engines by default, as the read replicas or the engine created
+            again by `falcon_oauth.utils.database.configure`.
+        """
+        self.session = session
+        self.bind = bind
+        # a single listener counts the statements of all the middlewares
+        if not event.contains(Engine, 'before_cursor_execute', _count_query):
+            event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    def query_count(self):
+        """Get the number of statements sent since the request started.
+
+        :return: int the number of statements.
+        """
+        counts = getattr(_queries, 'counts', {})
+        if self.bind is not None:
+            return counts.get(self.bind, 0)
+        return sum(counts.values())
+
+    def process_request(self, req, resp):  # pylint: disable=unused-argument
+        """Reset the statement counter of the request."""
+        _queries.counts = {}
+
+    def process_response(self, req, resp, resource, req_succeeded=True):  # pylint: disable=unused-argument
+        """Commit the session if the request succeeded, roll it back
+        otherwise, and remove it.
+        """
+        req.context['falcon_oauth_queries'] = self.query_count()
+        logging.getLogger(__name__).debug(
+            '%s queries for uri: %s', req.context['falcon_oauth_queries'], req.relative_uri)
+        if not self.session.registry.has():
+            return
+        try:
+            if req_succeeded and not resp.status.startswith('5'):
+                self.session.commit()
+            else:
+                self.session.rollback()
+        except Exception:
+            self.session.rollback()
+            raise
+        finally:
+            self.session.remove()
@@ -1,8 +1,13 @@
 from __future__ import with_statement
 import os
+import sys
 from logging.config import fileConfig
 from sqlalchemy import create_engine
 from alembic import context
+
+# the migrations run from falcon_oauth/oauth2, make the package importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from falcon_oauth.utils.database import get_engine_url  # pylint: disable=wrong-import-position
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -23,17 +28,6 @@ target_metadata = None
 # ... etc.
 
 
-def get_url():
-    """Get url to use for sqlalchemy.
-    """
-    return "postgresql://%s:%s@%s/%s" % (
-        os.getenv("FALCON_DB_USER", "DB_USER"),
-        os.getenv("FALCON_DB_PASSWORD", "DB_PASSWORD"),
-        os.getenv("FALCON_DB_HOST", "DB_HOST"),
-        os.getenv("FALCON_DB_NAME", "DB_NAME"),
-    )
-
-
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -46,7 +40,7 @@ def run_migrations_offline():
     script output.
 
     """
-    url = get_url()
+    url = get_engine_url()
     context.configure(
         url=url, target_metadata=target_metadata, literal_binds=True)
 
@@ -61,7 +55,7 @@ def run_migrations_online():
     and associate a connection with the context.
 
     """
-    connectable = create_engine(get_url())
+    connectable = create_engine(get_engine_url())
 
     with connectable.connect() as connection:
         context.configure(
@@ -0,0 +1,32 @@
+"""keep the refresh token replaced by the rotation of a bearer token
+
+Revision ID: 5d8e2f61c0a7
+Revises: a3c1e7d2b9f4
+Create Date: 2026-10-18 14:03:11.402958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e2f61c0a7'
+down_revision = 'a3c1e7d2b9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('oauth2_falcon_bearertoken',
+                  sa.Column('previous_refresh_token', sa.String(100), nullable=True))
+    op.add_column('oauth2_falcon_bearertoken',
+                  sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_oauth2_falcon_bearertoken_previous_refresh_token',
+                    'oauth2_falcon_bearertoken', ['previous_refresh_token'])
+
+
+def downgrade():
+    op.drop_index('ix_oauth2_falcon_bearertoken_previous_refresh_token',
+                  'oauth2_falcon_bearertoken')
+    op.drop_column('oauth2_falcon_bearertoken', 'refreshed_at')
+    op.drop_column('oauth2_falcon_bearertoken', 'previous_refresh_token')
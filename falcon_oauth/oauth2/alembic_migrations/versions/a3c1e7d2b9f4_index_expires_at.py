@@ -0,0 +1,29 @@
+"""index the expiry of the bearer tokens and authorization codes, for the
+reaper of the expired rows
+
+Revision ID: a3c1e7d2b9f4
+Revises: 76569f5e10ad
+Create Date: 2026-10-18 10:12:40.118312
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1e7d2b9f4'
+down_revision = '76569f5e10ad'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_oauth2_falcon_bearertoken_expires_at',
+                    'oauth2_falcon_bearertoken', ['expires_at'])
+    op.create_index('ix_oauth2_falcon_authorizationcode_expires_at',
+                    'oauth2_falcon_authorizationcode', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_oauth2_falcon_authorizationcode_expires_at',
+                  'oauth2_falcon_authorizationcode')
+    op.drop_index('ix_oauth2_falcon_bearertoken_expires_at', 'oauth2_falcon_bearertoken')
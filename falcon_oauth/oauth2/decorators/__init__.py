@@ -1,4 +1,4 @@
 """
 decorator to authenticate views
 """
-from .oauth2_provider import provider
+from .oauth2_provider import async_provider, provider
@@ -4,7 +4,12 @@ import logging
 import io
 import functools
 import falcon
+from falcon_oauth.oauth2.scopes import compile_scopes
 from falcon_oauth.oauth2.validators import server
+from falcon_oauth.oauth2.views.utils import set_body
+from falcon_oauth.utils.cache import load_columns
+from falcon_oauth.utils.offload import offloader as default_offloader, read_body
+from falcon_oauth.utils.single_flight import AsyncSingleFlight
 
 
 def add_params(obj, attributes_dict):
@@ -15,7 +20,45 @@ def add_params(obj, attributes_dict):
     obj.client = attributes_dict.get('client', None)
     obj.user = attributes_dict.get('user', None)
     obj.scopes = attributes_dict.get('scopes', None)
-    obj.stream = io.StringIO(attributes_dict.get('body', b''))
+    if 'body' in attributes_dict:
+        obj.stream = io.StringIO(attributes_dict['body'])
+
+
+def header_bearer_token(req):
+    """Get the token of the Authorization header of a request, if it is a
+    bearer token.
+
+    :param req: the request object
+    :return: str the token or None.
+    """
+    authorization = req.get_header('Authorization')
+    if authorization is not None and authorization.startswith('Bearer '):
+        return authorization[7:]
+    return None
+
+
+def scope_resolver(scopes):
+    """Get the function giving the scopes of a view for a request, decided
+    once when the view is declared.
+
+    :param scopes: list the scopes, or the function getting them from the
+        request.
+    :return: function of the request returning the list of scopes.
+    """
+    if callable(scopes):
+        return scopes
+    return lambda req: scopes
+
+
+class BearerRequest(object):  # pylint: disable=too-few-public-methods
+    """The attributes of an oauthlib request used by validate_bearer_token,
+    for the requests verified from their Authorization header."""
+    def __init__(self, scopes):
+        self.scopes = scopes
+        self.client = None
+        self.user = None
+        self.access_token = None
+        self.error_message = None
 
 
 class OAuth2ProviderDecorator(object):  # pylint: disable=too-few-public-methods
@@ -23,11 +66,75 @@ class OAuth2ProviderDecorator(object):  # pylint: disable=too-few-public-methods
     def __init__(self, resource_endpoint):
         self._resource_endpoint = resource_endpoint
 
+    def verify_request(self, req, scopes, body=None):
+        """Verify the request and add its client, user and scopes to it.
+
+        The token of an Authorization header is validated by the validator
+        directly, the body is then left unread. Otherwise the token may be
+        in the body or the query string and oauthlib verifies the request.
+
+        :param req: the request object
+        :param scopes: list the scopes of the view.
+        :param body: the body of the request, read when needed by default.
+        :return: bool if the request is valid.
+        """
+        token = header_bearer_token(req)
+        if token is not None:
+            valid, request = self._validate_bearer_token(token, scopes)
+            self._add_params(req, request)
+            return valid
+
+        if body is None:
+            body = req.stream.read()
+        valid, oauthlib_req = self._resource_endpoint.verify_request(
+            req.uri,
+            req.method,
+            body,
+            req.headers,
+            scopes
+        )
+        self._add_params(req, oauthlib_req)
+        return valid
+
+    def _validate_bearer_token(self, token, scopes_list):
+        """Validate a bearer token without building the oauthlib request.
+
+        :param token: str the token of the Authorization header.
+        :param scopes_list: list the scopes of the view.
+        :return: tuple of the validity and the BearerRequest.
+        """
+        request = BearerRequest(scopes_list)
+        validator = self._resource_endpoint.default_token_type_handler.request_validator
+        return validator.validate_bearer_token(token, scopes_list, request), request
+
+    @staticmethod
+    def _add_params(req, oauthlib_req):
+        # For convenient parameter access in the view
+        params = {
+            'client': oauthlib_req.client,
+            'user': oauthlib_req.user,
+            'scopes': oauthlib_req.scopes,
+        }
+        if not isinstance(oauthlib_req, BearerRequest):
+            params['body'] = oauthlib_req.body
+        add_params(req, params)
+
+    @staticmethod
+    def _forbidden(req, resp):
+        logging.getLogger(__name__).warning(
+            'forbidden access for uri: %s headers: %s',
+            req.relative_uri, req.headers)
+        set_body(resp, '{"error": "forbidden"}')
+        resp.status = falcon.HTTP_403
+
     def protected_resource_view(self, scopes=None):
         """Verify request and throw error if not valid.
-        :param scopes: list A list containing the scopes for the page.
+        :param scopes: list A list containing the scopes for the page, or a
+            function getting them from the request.
         :return: decorator
         """
+        resolve_scopes = scope_resolver(scopes)
+
         def decorator(method):
             """Decorator method to handle a function.
             :param method: def A method defined when calling the decorator.
@@ -41,38 +148,105 @@ class OAuth2ProviderDecorator(object):  # pylint: disable=too-few-public-methods
                 :param *args: Variable length argument list.
                 :param **kwargs: Arbitrary keyword arguments.
                 """
-                try:
-                    scopes_list = scopes(req)
-                except TypeError:
-                    scopes_list = scopes
-
-                valid, oauthlib_req = self._resource_endpoint.verify_request(
-                    req.uri,
-                    req.method,
-                    req.stream.read(),
-                    req.headers,
-                    scopes_list
-                )
-
-                # For convenient parameter access in the view
-                add_params(req, {
-                    'client': oauthlib_req.client,
-                    'user': oauthlib_req.user,
-                    'scopes': oauthlib_req.scopes,
-                    'body': oauthlib_req.body
-                })
-
-                if valid:
+                if self.verify_request(req, resolve_scopes(req)):
                     return method(self_decorated, req, resp, *args, **kwargs)
-                else:
-                    logging.getLogger(__name__).warning(
-                        'forbidden access for uri: %s headers: %s',
-                        req.relative_uri, req.headers)
-                    resp.body = '{"error": "forbidden"}'
-                    resp.status = falcon.HTTP_403
+                self._forbidden(req, resp)
 
             return wrapper
 
         return decorator
 
+
+class AsyncOAuth2ProviderDecorator(OAuth2ProviderDecorator):  # pylint: disable=too-few-public-methods
+    """OAuth2 decorator to protect the async responders of the ASGI app, the
+    request is verified in the threads of the offloader.
+
+    The concurrent requests of a same bearer token and scopes share one
+    verification, the burst of requests of a client takes one thread of the
+    offloader. Their req.client and req.user are then the same instances,
+    detached from any session once verified: their columns are loaded but
+    not their relationships, which raise DetachedInstanceError. A responder
+    needing them merges the instances in its session first, as
+    `Session.merge(req.client, load=False)`, which gives it its own copy."""
+    def __init__(self, resource_endpoint, offloader=None, single_flight=None):
+        """
+        :param resource_endpoint: the oauthlib server.
+        :param offloader: Offloader the pool verifying the requests, the
+            offloader of `falcon_oauth.utils.offload` by default.
+        :param single_flight: AsyncSingleFlight coalescing the verifications.
+        """
+        super(AsyncOAuth2ProviderDecorator, self).__init__(resource_endpoint)
+        self.offloader = offloader or default_offloader
+        self.single_flight = single_flight or AsyncSingleFlight()
+
+    async def verify_request_async(self, req, scopes):
+        """Verify the request in a thread of the offloader and add its
+        client, user and scopes to it, the body is only read when the token
+        is not in the Authorization header.
+
+        :param req: the request object
+        :param scopes: list the scopes of the view.
+        :return: bool if the request is valid.
+        """
+        token = header_bearer_token(req)
+        if token is not None:
+            (valid, request), _ = await self.single_flight.do(
+                (token, compile_scopes(scopes or ())),
+                self.offloader.call, self._loaded, self._validate_bearer_token, token, scopes)
+            self._add_params(req, request)
+            return valid
+
+        body = await read_body(req)
+        valid, oauthlib_req = await self.offloader.call(
+            self._loaded, self._resource_endpoint.verify_request,
+            req.uri, req.method, body, req.headers, scopes)
+        self._add_params(req, oauthlib_req)
+        return valid
+
+    @staticmethod
+    def _loaded(verify, *args):
+        """Verify a request and load the columns of its client and user, as
+        the references of the signed or shared tokens, in the thread of the
+        offloader: its session is removed before the responder runs.
+
+        :param verify: function returning the validity and the request.
+        :return: tuple of the validity and the request.
+        """
+        valid, request = verify(*args)
+        if valid:
+            load_columns(request.user)
+            load_columns(request.client)
+        return valid, request
+
+    def protected_resource_view(self, scopes=None):
+        """Verify request and throw error if not valid.
+        :param scopes: list A list containing the scopes for the page, or a
+            function getting them from the request.
+        :return: decorator of async responders
+        """
+        resolve_scopes = scope_resolver(scopes)
+
+        def decorator(method):
+            """Decorator method to handle a coroutine function.
+            :param method: async def A method defined when calling the decorator.
+            """
+            @functools.wraps(method)
+            async def wrapper(self_decorated, req, resp, *args, **kwargs):
+                """Wrapper method for decorator.
+
+                :param req: the request object
+                :param resp: the response object
+                :param *args: Variable length argument list.
+                :param **kwargs: Arbitrary keyword arguments.
+                """
+                if await self.verify_request_async(req, resolve_scopes(req)):
+                    return await method(self_decorated, req, resp, *args, **kwargs)
+                self._forbidden(req, resp)
+
+            return wrapper
+
+        return decorator
+
+
 provider = OAuth2ProviderDecorator(server)  # pylint: disable=invalid-name
+async_provider = AsyncOAuth2ProviderDecorator(server)  # pylint: disable=invalid-name
@@ -6,6 +6,7 @@ https://oauthlib.readthedocs.io/en/latest/oauth2/server.html#authorization-code
 import sqlalchemy as sa
 from sqlalchemy.orm import relationship
 from falcon_oauth.utils.database import Base
+from falcon_oauth.utils.database import UTCDateTime
 from falcon_oauth.utils.database import Session
 
 
@@ -30,4 +31,4 @@ class AuthorizationCode(Base):  # pylint: disable=too-few-public-methods
     user = relationship('User')
     scopes = sa.Column(sa.Text, nullable=False)
     code = sa.Column(sa.String(100), unique=True)
-    expires_at = sa.Column(sa.DateTime(timezone=True), nullable=False)
+    expires_at = sa.Column(UTCDateTime, nullable=False, index=True)
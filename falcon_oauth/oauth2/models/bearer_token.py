@@ -6,6 +6,7 @@ https://oauthlib.readthedocs.io/en/latest/oauth2/server.html#bearer-token-oauth-
 import sqlalchemy as sa
 from sqlalchemy.orm import relationship
 from falcon_oauth.utils.database import Base
+from falcon_oauth.utils.database import UTCDateTime
 from falcon_oauth.utils.database import Session
 
 
@@ -30,4 +31,7 @@ class BearerToken(Base):  # pylint: disable=too-few-public-methods
     scopes = sa.Column(sa.Text, nullable=False)
     access_token = sa.Column(sa.String(100), unique=True, nullable=False)
     refresh_token = sa.Column(sa.String(100), unique=True, nullable=True)
-    expires_at = sa.Column(sa.DateTime(timezone=True), nullable=False)
+    # the refresh token replaced by the last rotation of the token, and when
+    previous_refresh_token = sa.Column(sa.String(100), nullable=True, index=True)
+    refreshed_at = sa.Column(UTCDateTime, nullable=True)
+    expires_at = sa.Column(UTCDateTime, nullable=False, index=True)
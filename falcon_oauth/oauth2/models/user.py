@@ -5,6 +5,7 @@ https://oauthlib.readthedocs.io/en/latest/oauth2/server.html#user-or-resource-ow
 """
 import sqlalchemy as sa
 from falcon_oauth.utils.database import Base
+from falcon_oauth.utils.database import UTCDateTime
 from falcon_oauth.utils.database import Session
 
 
@@ -24,5 +25,5 @@ class User(Base):  # pylint: disable=too-few-public-methods
     is_superuser = sa.Column(sa.Boolean(), nullable=False)
     is_staff = sa.Column(sa.Boolean, nullable=False)
     is_active = sa.Column(sa.Boolean, nullable=False)
-    last_login = sa.Column(sa.DateTime(timezone=True), nullable=False)
-    date_joined = sa.Column(sa.DateTime(timezone=True), nullable=False)
+    last_login = sa.Column(UTCDateTime, nullable=False)
+    date_joined = sa.Column(UTCDateTime, nullable=False)
@@ -0,0 +1,246 @@
+"""
+reaper of the expired authorization codes and bearer tokens, deleting them
+in small batches so that it never locks many rows for long.
+
+It runs from cron with the falcon-oauth-reaper command, or in the process of
+the application with `start_reaper`.
+
+The refresh token of a bearer token lives in the same row as its access
+token, the rows with a refresh token are kept refresh_token_grace after the
+access token expired so that the token can still be refreshed.
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select
+
+from falcon_oauth.oauth2.models import AuthorizationCode, BearerToken
+from falcon_oauth.oauth2.stores.base import DEFAULT_REFRESH_TOKEN_GRACE
+from falcon_oauth.utils import database
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_GRACE = 0  # seconds
+
+
+class ReaperMetrics(object):
+
+    """
+    Counters of a reaper: runs, failed runs, rows deleted and the last run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.codes_deleted = 0
+        self.tokens_deleted = 0
+        self.last_run = None
+
+    def record_run(self, codes, tokens, batches, seconds):
+        """Record a complete run.
+
+        :param codes: int the authorization codes deleted.
+        :param tokens: int the bearer tokens deleted.
+        :param batches: int the batches deleted.
+        :param seconds: float the duration of the run.
+        """
+        with self._lock:
+            self.runs += 1
+            self.codes_deleted += codes
+            self.tokens_deleted += tokens
+            self.last_run = {
+                'codes_deleted': codes,
+                'tokens_deleted': tokens,
+                'batches': batches,
+                'seconds': seconds,
+                'finished_at': time.time(),
+            }
+
+    def record_failure(self):
+        """Record a run stopped by an error."""
+        with self._lock:
+            self.failures += 1
+
+    def as_dict(self):
+        """Get the counters.
+
+        :return: dict of the counters, with the counters of the last run.
+        """
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'failures': self.failures,
+                'codes_deleted': self.codes_deleted,
+                'tokens_deleted': self.tokens_deleted,
+                'last_run': dict(self.last_run) if self.last_run else None,
+            }
+
+
+class Reaper(object):
+
+    """
+    Delete the expired rows, each batch in its own short transaction.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, grace=DEFAULT_GRACE,  # pylint: disable=too-many-arguments
+                 refresh_token_grace=DEFAULT_REFRESH_TOKEN_GRACE, pause=0, bind=None):
+        """
+        :param batch_size: int the maximum number of rows deleted by a
+            statement.
+        :param grace: int seconds the authorization codes and the bearer
+            tokens without refresh token are kept after they expired.
+        :param refresh_token_grace: int seconds the bearer tokens with a
+            refresh token are kept after their access token expired.
+        :param pause: float seconds to wait between two batches, to leave
+            room to the other transactions.
+        :param bind: Engine the engine to use, `database.get_engine()` by
+            default.
+        """
+        self.batch_size = batch_size
+        self.grace = timedelta(seconds=grace)
+        self.refresh_token_grace = timedelta(seconds=refresh_token_grace)
+        self.pause = pause
+        self.bind = bind
+        self.metrics = ReaperMetrics()
+
+    def _expired_codes(self, now):
+        table = AuthorizationCode.__table__
+        return table, table.c.expires_at < now - self.grace
+
+    def _expired_tokens(self, now):
+        table = BearerToken.__table__
+        return table, or_(
+            and_(table.c.refresh_token.is_(None), table.c.expires_at < now - self.grace),
+            table.c.expires_at < now - self.refresh_token_grace)
+
+    def _delete_batch(self, connection, table, condition):
+        """Delete a batch of rows, the rows locked by other transactions are
+        left for the next batch instead of being waited for.
+
+        :return: int the number of rows deleted.
+        """
+        # the ids are selected first: postgres may run a LIMIT subquery of the
+        # delete more than once and delete more rows than the batch size
+        batch = select([table.c.id]).where(condition).limit(self.batch_size).with_for_update(
+            skip_locked=True)
+        with connection.begin():
+            ids = [row.id for row in connection.execute(batch)]
+            if not ids:
+                return 0
+            return connection.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+
+    def _delete(self, connection, table, condition, max_batches):
+        deleted = batches = 0
+        while max_batches is None or batches < max_batches:
+            rowcount = self._delete_batch(connection, table, condition)
+            batches += 1
+            deleted += rowcount
+            if rowcount < self.batch_size:
+                break
+            if self.pause:
+                time.sleep(self.pause)
+        return deleted, batches
+
+    def run(self, now=None, max_batches=None):
+        """Delete the expired rows.
+
+        :param now: datetime the current time, for the tests.
+        :param max_batches: int the maximum number of batches of each table,
+            no limit by default.
+        :return: tuple the number of codes and of tokens deleted.
+        """
+        now = now or datetime.now(tz=timezone.utc)
+        start = time.perf_counter()
+        try:
+            with (self.bind or database.get_engine()).connect() as connection:
+                codes, code_batches = self._delete(
+                    connection, *self._expired_codes(now), max_batches=max_batches)
+                tokens, token_batches = self._delete(
+                    connection, *self._expired_tokens(now), max_batches=max_batches)
+        except Exception:
+            self.metrics.record_failure()
+            raise
+        self.metrics.record_run(codes, tokens, code_batches + token_batches,
+                                time.perf_counter() - start)
+        logging.getLogger(__name__).info(
+            'Reaped %s authorization codes and %s bearer tokens', codes, tokens)
+        return codes, tokens
+
+
+class ReaperThread(threading.Thread):
+
+    """
+    Daemon thread running a reaper at a fixed interval.
+    """
+
+    def __init__(self, reaper, interval=300):
+        """
+        :param reaper: Reaper the reaper to run.
+        :param interval: float seconds between two runs.
+        """
+        super(ReaperThread, self).__init__(name='falcon-oauth-reaper', daemon=True)
+        self.reaper = reaper
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.reaper.run()
+            except Exception:  # pylint: disable=broad-except
+                logging.getLogger(__name__).exception('Reaper run failed')
+
+    def stop(self, timeout=None):
+        """Stop the thread, waiting for the current run to finish.
+
+        :param timeout: float seconds to wait for the thread.
+        """
+        self._stopped.set()
+        self.join(timeout)
+
+
+def start_reaper(interval=300, **kwargs):
+    """Run a reaper in a background thread of the process, to call once per
+    process. With several processes, prefer the falcon-oauth-reaper command
+    in cron so that a single reaper runs.
+
+    :param interval: float seconds between two runs.
+    :param kwargs: the arguments of Reaper.
+    :return: ReaperThread the thread started, see its reaper.metrics.
+    """
+    thread = ReaperThread(Reaper(**kwargs), interval)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    """The falcon-oauth-reaper command."""
+    parser = argparse.ArgumentParser(
+        description='Delete the expired authorization codes and bearer tokens.')
+    parser.add_argument('--url', help='database url, FALCON_DB_* variables by default')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--grace', type=int, default=DEFAULT_GRACE,
+                        help='seconds the expired codes and tokens are kept')
+    parser.add_argument('--refresh-token-grace', type=int, default=DEFAULT_REFRESH_TOKEN_GRACE,
+                        help='seconds the expired tokens with a refresh token are kept')
+    parser.add_argument('--max-batches', type=int,
+                        help='maximum number of batches of each table')
+    parser.add_argument('--pause', type=float, default=0,
+                        help='seconds to wait between two batches')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.url:
+        database.configure(url=args.url)
+    reaper = Reaper(batch_size=args.batch_size, grace=args.grace,
+                    refresh_token_grace=args.refresh_token_grace, pause=args.pause)
+    reaper.run(max_batches=args.max_batches)
+    print('{codes_deleted} authorization codes and {tokens_deleted} bearer tokens deleted in '
+          '{batches} batches, {seconds:.3f}s'.format(**reaper.metrics.as_dict()['last_run']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+the scopes parsed once: the scope names are interned in a registry giving
+each its bit, the sets of scopes are compared as integer masks
+
+The scopes are hierarchical, their levels are separated by ':' and a
+granted scope ending with ':*' implies the scopes below it: `billing:*`
+implies `billing:read` and `billing:invoices:read`.
+"""
+import functools
+import threading
+from collections import namedtuple
+
+ClientIndex = namedtuple(  # pylint: disable=invalid-name
+    'ClientIndex', ['scopes', 'default_scopes', 'redirect_uris', 'scope_mask'])
+
+
+class ScopeRegistry(object):
+
+    """
+    Registry of the scope names, each name has its own bit. Only the scopes
+    of the clients, of the tokens and of the views are registered, the
+    scopes requested by the clients are not so the registry stays bounded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bits = {}
+        self._names = []
+
+    def bit(self, name):
+        """Get the bit of a scope, registering it if needed.
+
+        :param name: str the scope.
+        :return: int the mask of the scope alone.
+        """
+        try:
+            return self._bits[name]
+        except KeyError:
+            with self._lock:
+                if name not in self._bits:
+                    self._bits[name] = 1 << len(self._names)
+                    self._names.append(name)
+                return self._bits[name]
+
+    def mask(self, names):
+        """Get the mask of scopes, registering them if needed.
+
+        :param names: iterable of str the scopes.
+        :return: int the mask.
+        """
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def known_mask(self, names):
+        """Get the mask of scopes without registering them, as the scopes
+        requested by the clients.
+
+        :param names: iterable of str the scopes.
+        :return: int the mask, or None if a scope is unknown.
+        """
+        mask = 0
+        for name in names:
+            bit = self._bits.get(name)
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+    def names(self, mask):
+        """Get the scopes of a mask.
+
+        :param mask: int the mask.
+        :return: list of str the scopes.
+        """
+        return [name for index, name in enumerate(self._names) if mask >> index & 1]
+
+    def __len__(self):
+        return len(self._names)
+
+
+registry = ScopeRegistry()  # pylint: disable=invalid-name
+
+
+def split_scopes(value, separator=','):
+    """Get the scopes of a list of scopes joined by a separator.
+
+    :param value: str the scopes, or None.
+    :param separator: str ',' for the columns, ' ' for the requests.
+    :return: tuple of str the scopes, in order and without blanks.
+    """
+    if not value:
+        return ()
+    return tuple(scope.strip() for scope in value.split(separator) if scope.strip())
+
+
+@functools.lru_cache(maxsize=4096)
+def scope_mask(value, separator=','):
+    """Get the mask of scopes joined by a separator, as saved in a column.
+
+    :param value: str the scopes, or None.
+    :param separator: str the separator of the scopes.
+    :return: int the mask.
+    """
+    return registry.mask(split_scopes(value, separator))
+
+
+def implying_scopes(scope):
+    """Get the scopes implying a scope: itself and the wildcards of its
+    parents.
+
+    :param scope: str the scope, as 'billing:invoices:read'.
+    :return: list of str, as ['billing:invoices:read', 'billing:invoices:*',
+        'billing:*'].
+    """
+    parts = scope.split(':')
+    return [scope] + [':'.join(parts[:level] + ['*']) for level in range(len(parts) - 1, 0, -1)]
+
+
+@functools.lru_cache(maxsize=1024)
+def implying_mask(scope):
+    """Get the mask of the scopes implying a scope, a token holds the scope
+    if its mask has one of these bits.
+
+    :param scope: str the scope.
+    :return: int the mask.
+    """
+    return registry.mask(implying_scopes(scope))
+
+
+class Policy(object):
+
+    """
+    Scopes required by a view, compiled when the policy is created into a
+    tree of masks as deep as the policy: the scopes of a node are folded in
+    masks, a token is checked with one AND per mask and the nested policies
+    are evaluated only when the masks do not decide. The work grows with the
+    size of the policy, not with the number of its combinations.
+    """
+
+    def __init__(self, *items):
+        """
+        :param items: the scopes, str, or the policies combined.
+        """
+        self.items = items
+        masks = []
+        policies = []
+        for item in items:
+            if not isinstance(item, Policy):
+                masks.append(implying_mask(item))
+            elif item.mask is not None:
+                masks.append(item.mask)
+            else:
+                policies.append(item)
+        self.masks, self.policies = self._compile(masks, policies)
+
+    def _compile(self, masks, policies):
+        raise NotImplementedError
+
+    @property
+    def mask(self):
+        """The single mask of the policy, a token is allowed if it has one of
+        its bits, or None if the policy needs more than one mask."""
+        if len(self.masks) == 1 and not self.policies:
+            return self.masks[0]
+        return None
+
+    @property
+    def size(self):
+        """The number of masks of the policy and of its nested policies, the
+        most AND a check takes."""
+        return len(self.masks) + sum(policy.size for policy in self.policies)
+
+    def allows(self, granted_mask):
+        """Check the scopes of a token.
+
+        :param granted_mask: int the mask of the scopes of the token.
+        :return: bool
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(repr(item) for item in self.items))
+
+
+class AllOf(Policy):
+
+    """
+    All the items are required.
+    """
+
+    def _compile(self, masks, policies):
+        nested = []
+        for policy in policies:
+            if isinstance(policy, AllOf):
+                # all of all of is all of their items
+                masks.extend(policy.masks)
+                nested.extend(policy.policies)
+            else:
+                nested.append(policy)
+        return tuple(masks), tuple(nested)
+
+    def allows(self, granted_mask):
+        for mask in self.masks:
+            if not granted_mask & mask:
+                return False
+        for policy in self.policies:
+            if not policy.allows(granted_mask):
+                return False
+        return True
+
+
+class AnyOf(Policy):
+
+    """
+    One of the items is required, as the lists of scopes of the views.
+    """
+
+    def _compile(self, masks, policies):
+        # any of the scopes is a single mask, nothing allows an empty choice
+        mask = 0
+        for item_mask in masks:
+            mask |= item_mask
+        nested = []
+        for policy in policies:
+            if isinstance(policy, AnyOf):
+                # any of any of is any of their items
+                mask |= policy.masks[0]
+                nested.extend(policy.policies)
+            else:
+                nested.append(policy)
+        return (mask,), tuple(nested)
+
+    def allows(self, granted_mask):
+        if granted_mask & self.masks[0]:
+            return True
+        for policy in self.policies:
+            if policy.allows(granted_mask):
+                return True
+        return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _any_of(scopes):
+    return AnyOf(*scopes)
+
+
+def compile_scopes(scopes):
+    """Get the policy of the scopes of a view.
+
+    :param scopes: Policy, or list of str of which one is required.
+    :return: Policy, the same for the same lists.
+    """
+    if isinstance(scopes, Policy):
+        return scopes
+    return _any_of(tuple(scopes))
+
+
+def allows(granted, scopes, separator=','):
+    """Check that scopes granted, as saved in a column, satisfy the scopes
+    of a view.
+
+    :param granted: str the scopes granted joined by separator.
+    :param scopes: Policy, or list of str of which one is required, nothing
+        is required when empty.
+    :param separator: str the separator of the scopes granted.
+    :return: bool
+    """
+    if not scopes:
+        return True
+    return compile_scopes(scopes).allows(scope_mask(granted, separator))
+
+
+@functools.lru_cache(maxsize=1024)
+def _client_index(scopes, default_scopes, redirect_uris):
+    allowed = frozenset(split_scopes(scopes))
+    return ClientIndex(
+        scopes=allowed,
+        default_scopes=split_scopes(default_scopes),
+        redirect_uris=frozenset(split_scopes(redirect_uris)),
+        scope_mask=registry.mask(allowed))
+
+
+def within_scopes(index, scopes):
+    """Check that the scopes requested by an application are all allowed.
+
+    :param index: ClientIndex the parsed columns of the application.
+    :param scopes: list of str the scopes requested.
+    :return: bool
+    """
+    # a scope unknown to the registry is not a scope of any application
+    requested = registry.known_mask(scopes)
+    return requested is not None and not requested & ~index.scope_mask
+
+
+def client_index(client):
+    """Get the parsed scopes and redirect uris of an application, parsed
+    once for all the applications having the same columns.
+
+    :param client: Object the application returned by the store.
+    :return: ClientIndex the scopes and default scopes of the application,
+        its redirect uris as a set and the mask of its scopes.
+    """
+    return _client_index(client.scopes, client.default_scopes, client.redirect_uris)
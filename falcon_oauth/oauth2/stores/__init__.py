@@ -0,0 +1,8 @@
+"""
+the storage of the clients, authorization codes and bearer tokens used by
+the request validator
+"""
+from .base import TokenStore
+from .sql import SQLTokenStore
+from .memory import MemoryTokenStore
+from .key_value import KeyValueTokenStore
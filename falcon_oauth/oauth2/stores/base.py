@@ -0,0 +1,174 @@
+"""
+the interface of the stores behind the request validator
+"""
+
+# seconds the bearer tokens with a refresh token are kept after their access
+# token expired, so that they can still be refreshed
+DEFAULT_REFRESH_TOKEN_GRACE = 30 * 24 * 3600
+
+
+class TokenStore(object):
+
+    """
+    Storage of the clients, users, authorization codes and bearer tokens.
+
+    The objects returned expose the attributes of the models of
+    `falcon_oauth.oauth2.models`, they may be ORM instances or the records of
+    `falcon_oauth.oauth2.stores.records`. The lookups return None for unknown
+    objects, and for expired codes and tokens when the store expires them
+    by itself.
+    """
+
+    def get_client(self, client_id):
+        """Get an application.
+
+        :param client_id: str The hash string of the application.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def get_user(self, user_id):
+        """Get a user.
+
+        :param user_id: int the id of the user.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def client_reference(self, application_id, client_id):  # pylint: disable=unused-argument
+        """Get an application known to exist, without reading it when the
+        store allows it.
+
+        :param application_id: int the id of the application.
+        :param client_id: str The hash string of the application.
+        """
+        return self.get_client(client_id)
+
+    def user_reference(self, user_id):
+        """Get a user known to exist, without reading it when the store
+        allows it.
+
+        :param user_id: int the id of the user.
+        """
+        return self.get_user(user_id)
+
+    def cache_value(self, instance):  # pylint: disable=no-self-use
+        """Get the value to keep in an in-process cache for a client or a
+        user, it must be safe to share between threads.
+
+        :param instance: the client or user returned by the store.
+        """
+        return instance
+
+    def cached_instance(self, kind, value):  # pylint: disable=no-self-use,unused-argument
+        """Get back a client or a user from its cached value.
+
+        :param kind: str 'client' or 'user'.
+        :param value: the value returned by `cache_value`.
+        """
+        return value
+
+    def stale_misses(self):  # pylint: disable=no-self-use
+        """Whether the lookups may not find a row saved lately, as the reads
+        of a lagging replica. The validator does not remember such misses.
+        """
+        return False
+
+    def get_authorization_code(self, client, code):
+        """Get an authorization code of an application.
+
+        :param client: the application.
+        :param code: str the code.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def save_authorization_code(self, client, code, scopes, user_id, expires_at):  # pylint: disable=too-many-arguments
+        """Store an authorization code.
+
+        :param client: the application.
+        :param code: str the code.
+        :param scopes: str the comma separated scopes.
+        :param user_id: int the id of the user or None.
+        :param expires_at: datetime the expiry.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def consume_authorization_code(self, client, code):
+        """Delete an authorization code and get it, they are used once: of
+        concurrent calls consuming the same code, only one gets it.
+
+        :param client: the application.
+        :param code: str the code.
+        :return: the code deleted, expired or not, or None.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):
+        """Get a bearer token by access token or by refresh token.
+
+        :param access_token: str the stored access token.
+        :param refresh_token: str the refresh token.
+        :param consistent: bool read the latest state of the token, for the
+            revocations, where the store may otherwise read a stale copy.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def get_bearer_tokens(self, access_tokens):
+        """Get the bearer tokens of several access tokens, the stores able to
+        do it fetch them at once.
+
+        :param access_tokens: iterable the stored access tokens.
+        :return: dict the tokens found by access token.
+        """
+        bearer_tokens = {}
+        for access_token in access_tokens:
+            bearer_token = self.get_bearer_token(access_token=access_token)
+            if bearer_token is not None:
+                bearer_tokens[access_token] = bearer_token
+        return bearer_tokens
+
+    def save_bearer_token(self, client, user, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                          expires_at):
+        """Store a bearer token.
+
+        :param client: the application.
+        :param user: the user or None.
+        :param scopes: str the comma separated scopes.
+        :param access_token: str the stored access token.
+        :param refresh_token: str the refresh token or None.
+        :param expires_at: datetime the expiry of the access token.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def rotate_bearer_token(self, bearer_token, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                            expires_at):
+        """Replace the tokens of a bearer token, for the refresh grant. The
+        previous refresh token is rejected from then on, but during the
+        refresh_token_reuse_grace of the store when it has one.
+
+        :param bearer_token: the token returned by `get_bearer_token`.
+        :param scopes: str the comma separated scopes.
+        :param access_token: str the new stored access token.
+        :param refresh_token: str the new refresh token, or None to keep it.
+        :param expires_at: datetime the expiry of the new access token.
+        :return: the token rotated, or None if it was rotated or revoked
+            meanwhile.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def revoke_bearer_token(self, bearer_token):
+        """Delete a bearer token.
+
+        :param bearer_token: the token returned by `get_bearer_token`.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
+
+    def purge_expired(self, now, refresh_token_grace=DEFAULT_REFRESH_TOKEN_GRACE):
+        """Delete the expired authorization codes and bearer tokens, the
+        bearer tokens with a refresh token are kept refresh_token_grace
+        after their access token expired, as the reaper does.
+
+        :param now: datetime the codes and tokens expired before are deleted.
+        :param refresh_token_grace: int seconds the bearer tokens with a
+            refresh token are kept after their access token expired.
+        :return: tuple the number of codes and of tokens deleted.
+        """
+        raise NotImplementedError('Subclasses must implement this method.')
@@ -0,0 +1,235 @@
+"""
+the store of the clients, codes and tokens in a key-value server compatible
+with Redis, through a client with the interface of redis-py
+"""
+import json
+import math
+from datetime import datetime, timezone
+
+from .base import DEFAULT_REFRESH_TOKEN_GRACE, TokenStore
+from .records import AuthorizationCodeRecord, BearerTokenRecord, ClientRecord, UserRecord
+
+# the refresh tokens have no expiry of their own in the models, they are kept
+# this long after they are issued, in seconds
+DEFAULT_REFRESH_TOKEN_TTL = 30 * 24 * 3600
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def _datetime(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def _expires_in(expires_at):
+    """Get the time to live in whole seconds of a key expiring at a date,
+    0 if the date is passed."""
+    return max(0, int(math.ceil(expires_at.timestamp() -
+                                datetime.now(tz=timezone.utc).timestamp())))
+
+
+class KeyValueTokenStore(TokenStore):
+
+    """
+    Store in a key-value server, the codes and tokens are saved with the
+    expiry of their keys so the server deletes them by itself.
+
+    The values are json, the dates are saved as timestamps. The keys are:
+
+    - `<prefix>client:<client_id>` and `<prefix>user:<id>`
+    - `<prefix>code:<application id>:<code>`
+    - `<prefix>access:<access token>` and `<prefix>refresh:<refresh token>`
+
+    As MemoryTokenStore, the clients and users are saved with `save_client`
+    and `save_user` or looked up in the client_store.
+    """
+
+    def __init__(self, client, prefix='falcon_oauth:',  # pylint: disable=too-many-arguments
+                 refresh_token_ttl=DEFAULT_REFRESH_TOKEN_TTL, client_store=None,
+                 refresh_token_reuse_grace=0):
+        """
+        :param client: the client of the server, for instance a redis.Redis,
+            the methods get, set with ex, and delete are used, and getdel when
+            it exists.
+        :param prefix: str the prefix of the keys.
+        :param refresh_token_ttl: int the time to live of the refresh tokens
+            in seconds.
+        :param client_store: TokenStore the store of the clients and users,
+            this store by default.
+        :param refresh_token_reuse_grace: int seconds a refresh token is
+            still accepted after its rotation, for the retries of the clients.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.refresh_token_ttl = refresh_token_ttl
+        self.client_store = client_store
+        self.refresh_token_reuse_grace = refresh_token_reuse_grace
+
+    def _key(self, kind, *parts):
+        return '{}{}:{}'.format(self.prefix, kind, ':'.join(str(part) for part in parts))
+
+    def _get(self, key):
+        value = self.client.get(key)
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def _set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value), ex=ttl)
+
+    def _pop(self, key):
+        if hasattr(self.client, 'getdel'):
+            value = self.client.getdel(key)
+        else:
+            value = self.client.get(key)
+            # only one of the concurrent consumers deletes the key
+            if value is not None and not self.client.delete(key):
+                value = None
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def save_user(self, **columns):
+        """Register a user.
+
+        :param columns: the columns of `records.UserRecord`, id is required.
+        :return: UserRecord the user.
+        """
+        for name in UserRecord._fields:
+            columns.setdefault(name, None)
+        user = UserRecord(**columns)
+        self._set(self._key('user', user.id), user._asdict())
+        return user
+
+    def save_client(self, **columns):
+        """Register an application.
+
+        :param columns: the columns of `records.ClientRecord` but the user,
+            found from user_id. id and client_id are required.
+        :return: ClientRecord the application.
+        """
+        columns.pop('user', None)
+        for name in ClientRecord._fields[:-1]:
+            columns.setdefault(name, None)
+        self._set(self._key('client', columns['client_id']), columns)
+        return self._client(columns)
+
+    def _client(self, columns):
+        user = self.get_user(columns['user_id']) if columns['user_id'] is not None else None
+        return ClientRecord(user=user, **columns)
+
+    def get_client(self, client_id):
+        if self.client_store is not None:
+            return self.client_store.get_client(client_id)
+        columns = self._get(self._key('client', client_id))
+        return self._client(columns) if columns is not None else None
+
+    def get_user(self, user_id):
+        if self.client_store is not None:
+            return self.client_store.get_user(user_id)
+        columns = self._get(self._key('user', user_id))
+        return UserRecord(**columns) if columns is not None else None
+
+    def client_reference(self, application_id, client_id):
+        if self.client_store is not None:
+            return self.client_store.client_reference(application_id, client_id)
+        return self.get_client(client_id)
+
+    def user_reference(self, user_id):
+        if self.client_store is not None:
+            return self.client_store.user_reference(user_id)
+        return self.get_user(user_id)
+
+    def cache_value(self, instance):
+        if self.client_store is not None:
+            return self.client_store.cache_value(instance)
+        return instance
+
+    def cached_instance(self, kind, value):
+        if self.client_store is not None:
+            return self.client_store.cached_instance(kind, value)
+        return value
+
+    def _authorization_code(self, columns):
+        if columns is None:
+            return None
+        columns['expires_at'] = _datetime(columns['expires_at'])
+        user = self.user_reference(columns['user_id']) if columns['user_id'] is not None else None
+        return AuthorizationCodeRecord(user=user, **columns)
+
+    def get_authorization_code(self, client, code):
+        return self._authorization_code(self._get(self._key('code', client.id, code)))
+
+    def save_authorization_code(self, client, code, scopes, user_id, expires_at):  # pylint: disable=too-many-arguments
+        columns = {'id': None, 'application_id': client.id, 'user_id': user_id,
+                   'scopes': scopes, 'code': code, 'expires_at': _timestamp(expires_at)}
+        ttl = _expires_in(expires_at)
+        if ttl:
+            self._set(self._key('code', client.id, code), columns, ttl)
+        return self._authorization_code(columns)
+
+    def consume_authorization_code(self, client, code):
+        return self._authorization_code(self._pop(self._key('code', client.id, code)))
+
+    def _bearer_token(self, columns):
+        if columns is None:
+            return None
+        client_id = columns.pop('client_id')
+        columns['expires_at'] = _datetime(columns['expires_at'])
+        user = self.user_reference(columns['user_id']) if columns['user_id'] is not None else None
+        return BearerTokenRecord(
+            user=user, application=self.client_reference(columns['application_id'], client_id),
+            **columns)
+
+    @staticmethod
+    def _columns(bearer_token):
+        columns = {name: getattr(bearer_token, name) for name in BearerTokenRecord._fields[:-2]}
+        columns['client_id'] = bearer_token.client_id
+        columns['expires_at'] = _timestamp(bearer_token.expires_at)
+        return columns
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):  # pylint: disable=unused-argument
+        if refresh_token is not None:
+            return self._bearer_token(self._get(self._key('refresh', refresh_token)))
+        return self._bearer_token(self._get(self._key('access', access_token)))
+
+    def save_bearer_token(self, client, user, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                          expires_at):
+        columns = {'id': None, 'application_id': client.id, 'client_id': client.client_id,
+                   'user_id': user.id if user is not None else None, 'scopes': scopes,
+                   'access_token': access_token, 'refresh_token': refresh_token,
+                   'expires_at': _timestamp(expires_at)}
+        ttl = _expires_in(expires_at)
+        if ttl:
+            self._set(self._key('access', access_token), columns, ttl)
+        if refresh_token is not None:
+            self._set(self._key('refresh', refresh_token), columns, self.refresh_token_ttl)
+        return self._bearer_token(columns)
+
+    def rotate_bearer_token(self, bearer_token, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                            expires_at):
+        # taking the refresh token out first, of concurrent rotations only
+        # one finds it
+        previous_key = self._key('refresh', bearer_token.refresh_token)
+        if self._pop(previous_key) is None:
+            return None
+        self.client.delete(self._key('access', bearer_token.access_token))
+        rotated = self.save_bearer_token(
+            self.client_reference(bearer_token.application_id, bearer_token.client_id),
+            bearer_token.user, scopes, access_token,
+            refresh_token or bearer_token.refresh_token, expires_at)
+        if refresh_token is not None and self.refresh_token_reuse_grace:
+            # the previous refresh token finds the rotated token for a while
+            self._set(previous_key, self._columns(rotated), self.refresh_token_reuse_grace)
+        return rotated
+
+    def revoke_bearer_token(self, bearer_token):
+        keys = [self._key('access', bearer_token.access_token)]
+        if bearer_token.refresh_token is not None:
+            keys.append(self._key('refresh', bearer_token.refresh_token))
+        self.client.delete(*keys)
+
+    def purge_expired(self, now, refresh_token_grace=DEFAULT_REFRESH_TOKEN_GRACE):  # pylint: disable=unused-argument
+        # the server expires the keys
+        return 0, 0
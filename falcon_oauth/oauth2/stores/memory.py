@@ -0,0 +1,210 @@
+"""
+the store of the clients, codes and tokens in the memory of the process, for
+the tests and the deployments on a single node
+"""
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+
+from .base import DEFAULT_REFRESH_TOKEN_GRACE, TokenStore
+from .records import AuthorizationCodeRecord, BearerTokenRecord, ClientRecord, UserRecord
+
+
+def _now():
+    return datetime.now(tz=timezone.utc)
+
+
+class MemoryTokenStore(TokenStore):
+
+    """
+    Store in dicts of the process. The codes and tokens expire by themselves
+    when their expiry is reached, `purge_expired` frees their memory.
+
+    The clients and users are registered with `save_client` and `save_user`,
+    or looked up in another store given as client_store, for example a
+    SQLTokenStore keeping the clients in the database while the short lived
+    codes and tokens stay in memory.
+    """
+
+    def __init__(self, client_store=None, refresh_token_reuse_grace=0):
+        """
+        :param client_store: TokenStore the store of the clients and users,
+            this store by default.
+        :param refresh_token_reuse_grace: int seconds a refresh token is
+            still accepted after its rotation, for the retries of the clients.
+        """
+        self.client_store = client_store
+        self.refresh_token_reuse_grace = timedelta(seconds=refresh_token_reuse_grace)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._clients = {}
+        self._users = {}
+        self._codes = {}
+        self._access_tokens = {}
+        self._refresh_tokens = {}
+        # refresh token rotated: (refresh token replacing it, rotation date)
+        self._rotated_refresh_tokens = {}
+
+    def save_user(self, **columns):
+        """Register a user.
+
+        :param columns: the columns of `records.UserRecord`, the id is
+            generated if not given.
+        :return: UserRecord the user.
+        """
+        columns.setdefault('id', next(self._ids))
+        for name in UserRecord._fields:
+            columns.setdefault(name, None)
+        user = UserRecord(**columns)
+        self._users[user.id] = user
+        return user
+
+    def save_client(self, **columns):
+        """Register an application.
+
+        :param columns: the columns of `records.ClientRecord`, the id is
+            generated if not given and the user is found from user_id.
+        :return: ClientRecord the application.
+        """
+        columns.setdefault('id', next(self._ids))
+        for name in ClientRecord._fields:
+            columns.setdefault(name, None)
+        if columns['user'] is None and columns['user_id'] is not None:
+            columns['user'] = self._users.get(columns['user_id'])
+        client = ClientRecord(**columns)
+        self._clients[client.client_id] = client
+        return client
+
+    def get_client(self, client_id):
+        if self.client_store is not None:
+            return self.client_store.get_client(client_id)
+        return self._clients.get(client_id)
+
+    def get_user(self, user_id):
+        if self.client_store is not None:
+            return self.client_store.get_user(user_id)
+        return self._users.get(user_id)
+
+    def client_reference(self, application_id, client_id):
+        if self.client_store is not None:
+            return self.client_store.client_reference(application_id, client_id)
+        return self._clients.get(client_id)
+
+    def user_reference(self, user_id):
+        if self.client_store is not None:
+            return self.client_store.user_reference(user_id)
+        return self._users.get(user_id)
+
+    def cache_value(self, instance):
+        if self.client_store is not None:
+            return self.client_store.cache_value(instance)
+        return instance
+
+    def cached_instance(self, kind, value):
+        if self.client_store is not None:
+            return self.client_store.cached_instance(kind, value)
+        return value
+
+    def _user(self, user_id):
+        return self.user_reference(user_id) if user_id is not None else None
+
+    def get_authorization_code(self, client, code):
+        stored = self._codes.get((client.id, code))
+        if stored is None or stored.expires_at <= _now():
+            return None
+        return stored._replace(user=self._user(stored.user_id))
+
+    def save_authorization_code(self, client, code, scopes, user_id, expires_at):  # pylint: disable=too-many-arguments
+        authorization_code = AuthorizationCodeRecord(
+            id=next(self._ids), application_id=client.id, user_id=user_id, scopes=scopes,
+            code=code, expires_at=expires_at, user=None)
+        self._codes[(client.id, code)] = authorization_code
+        return authorization_code
+
+    def consume_authorization_code(self, client, code):
+        with self._lock:
+            stored = self._codes.pop((client.id, code), None)
+        if stored is None:
+            return None
+        return stored._replace(user=self._user(stored.user_id))
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):  # pylint: disable=unused-argument
+        if refresh_token is not None:
+            # the refresh tokens outlive the access tokens
+            stored = self._refresh_tokens.get(refresh_token)
+            if stored is None and refresh_token in self._rotated_refresh_tokens:
+                current, refreshed_at = self._rotated_refresh_tokens[refresh_token]
+                if refreshed_at > _now() - self.refresh_token_reuse_grace:
+                    stored = self._refresh_tokens.get(current)
+        else:
+            stored = self._access_tokens.get(access_token)
+            if stored is not None and stored.expires_at <= _now():
+                stored = None
+        if stored is None:
+            return None
+        return stored._replace(
+            user=self._user(stored.user_id),
+            application=self.client_reference(stored.application_id, stored.application))
+
+    def save_bearer_token(self, client, user, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                          expires_at):
+        # the client_id is kept in place of the application, resolved on lookup
+        bearer_token = BearerTokenRecord(
+            id=next(self._ids), application_id=client.id,
+            user_id=user.id if user is not None else None, scopes=scopes,
+            access_token=access_token, refresh_token=refresh_token, expires_at=expires_at,
+            user=None, application=client.client_id)
+        with self._lock:
+            self._access_tokens[access_token] = bearer_token
+            if refresh_token is not None:
+                self._refresh_tokens[refresh_token] = bearer_token
+        return bearer_token
+
+    def rotate_bearer_token(self, bearer_token, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                            expires_at):
+        with self._lock:
+            stored = self._refresh_tokens.get(bearer_token.refresh_token)
+            if stored is None or stored.id != bearer_token.id:
+                return None
+            rotated = stored._replace(scopes=scopes, access_token=access_token,
+                                      refresh_token=refresh_token or stored.refresh_token,
+                                      expires_at=expires_at)
+            self._access_tokens.pop(stored.access_token, None)
+            self._access_tokens[access_token] = rotated
+            if refresh_token is not None:
+                del self._refresh_tokens[stored.refresh_token]
+                if self.refresh_token_reuse_grace:
+                    self._rotated_refresh_tokens[stored.refresh_token] = (refresh_token, _now())
+            self._refresh_tokens[rotated.refresh_token] = rotated
+        return rotated._replace(user=bearer_token.user, application=bearer_token.application)
+
+    def revoke_bearer_token(self, bearer_token):
+        with self._lock:
+            self._access_tokens.pop(bearer_token.access_token, None)
+            if bearer_token.refresh_token is not None:
+                self._refresh_tokens.pop(bearer_token.refresh_token, None)
+
+    def purge_expired(self, now, refresh_token_grace=DEFAULT_REFRESH_TOKEN_GRACE):
+        with self._lock:
+            expired_codes = [key for key, authorization_code in list(self._codes.items())
+                             if authorization_code.expires_at < now]
+            for key in expired_codes:
+                del self._codes[key]
+            expired_tokens = []
+            for access_token, bearer_token in list(self._access_tokens.items()):
+                if bearer_token.expires_at < now:
+                    # the refresh tokens outlive the access tokens
+                    del self._access_tokens[access_token]
+                    if bearer_token.refresh_token is None:
+                        expired_tokens.append(bearer_token)
+            refreshable_since = now - timedelta(seconds=refresh_token_grace)
+            for refresh_token, bearer_token in list(self._refresh_tokens.items()):
+                if bearer_token.expires_at < refreshable_since:
+                    del self._refresh_tokens[refresh_token]
+                    self._access_tokens.pop(bearer_token.access_token, None)
+                    expired_tokens.append(bearer_token)
+            reused_since = now - self.refresh_token_reuse_grace
+            for refresh_token, (_, refreshed_at) in list(self._rotated_refresh_tokens.items()):
+                if refreshed_at <= reused_since:
+                    del self._rotated_refresh_tokens[refresh_token]
+        return len(expired_codes), len(expired_tokens)
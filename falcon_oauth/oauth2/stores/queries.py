@@ -0,0 +1,116 @@
+"""
+the ORM lookups of the validator as baked queries: each query is built and
+compiled to SQL once, later lookups only bind their parameters, see
+
+https://docs.sqlalchemy.org/en/13/orm/extensions/baked.html
+"""
+from sqlalchemy import and_, bindparam, or_
+from sqlalchemy.ext import baked
+
+from falcon_oauth.oauth2.models import Application, AuthorizationCode, BearerToken, User
+
+
+bakery = baked.bakery()  # pylint: disable=invalid-name
+
+
+def _with_options(baked_query, options):
+    """Add loader options to a baked query, the options are part of the cache
+    key so that changing them builds a new query.
+    """
+    if options:
+        baked_query.add_criteria(lambda query: query.options(*options), options)
+    return baked_query
+
+
+def get_user(session, user_id, options=()):
+    """Get a User by id.
+
+    :param session: the session to query.
+    :param user_id: int the id of the user.
+    :param options: tuple loader options.
+    :raise NoResultFound: if there is no such user.
+    """
+    baked_query = bakery(lambda session: session.query(User))
+    baked_query += lambda query: query.filter(User.id == bindparam('user_id'))
+    return _with_options(baked_query, options)(session).params(user_id=user_id).one()
+
+
+def get_client(session, client_id):
+    """Get an Application by client_id.
+
+    :param session: the session to query.
+    :param client_id: str The hash string of the application.
+    :raise NoResultFound: if there is no such application.
+    """
+    baked_query = bakery(lambda session: session.query(Application))
+    baked_query += lambda query: query.filter(Application.client_id == bindparam('client_id'))
+    return baked_query(session).params(client_id=client_id).one()
+
+
+def get_authorization_code(session, application_id, code, options=()):
+    """Get an AuthorizationCode of an application.
+
+    :param session: the session to query.
+    :param application_id: int the id of the application.
+    :param code: str the code.
+    :param options: tuple loader options.
+    :raise NoResultFound: if there is no such code.
+    """
+    baked_query = bakery(lambda session: session.query(AuthorizationCode))
+    baked_query += lambda query: query.filter(
+        AuthorizationCode.application_id == bindparam('application_id'),
+        AuthorizationCode.code == bindparam('code'))
+    return _with_options(baked_query, options)(session).params(
+        application_id=application_id, code=code).one()
+
+
+def get_bearer_token_by_access_token(session, access_token, options=()):
+    """Get a BearerToken by access token.
+
+    :param session: the session to query.
+    :param access_token: str the stored access token.
+    :param options: tuple loader options.
+    :raise NoResultFound: if there is no such token.
+    """
+    baked_query = bakery(lambda session: session.query(BearerToken))
+    baked_query += lambda query: query.filter(
+        BearerToken.access_token == bindparam('access_token'))
+    return _with_options(baked_query, options)(session).params(access_token=access_token).one()
+
+
+def get_bearer_tokens_by_access_tokens(session, access_tokens, options=()):
+    """Get the BearerTokens of several access tokens in one query.
+
+    :param session: the session to query.
+    :param access_tokens: list the stored access tokens.
+    :param options: tuple loader options.
+    :return: list the tokens found.
+    """
+    baked_query = bakery(lambda session: session.query(BearerToken))
+    baked_query += lambda query: query.filter(
+        BearerToken.access_token.in_(bindparam('access_tokens', expanding=True)))
+    return _with_options(baked_query, options)(session).params(
+        access_tokens=list(access_tokens)).all()
+
+
+def get_bearer_token_by_refresh_token(session, refresh_token, options=(), refreshed_since=None):
+    """Get a BearerToken by refresh token.
+
+    :param session: the session to query.
+    :param refresh_token: str the refresh token.
+    :param options: tuple loader options.
+    :param refreshed_since: datetime the tokens refreshed since are found by
+        their previous refresh token as well.
+    :raise NoResultFound: if there is no such token.
+    """
+    baked_query = bakery(lambda session: session.query(BearerToken))
+    if refreshed_since is None:
+        baked_query += lambda query: query.filter(
+            BearerToken.refresh_token == bindparam('refresh_token'))
+    else:
+        baked_query += lambda query: query.filter(or_(
+            BearerToken.refresh_token == bindparam('refresh_token'),
+            and_(BearerToken.previous_refresh_token == bindparam('refresh_token'),
+                 BearerToken.refreshed_at > bindparam('refreshed_since'))))
+    return _with_options(baked_query, options)(session).params(
+        refresh_token=refresh_token, refreshed_since=refreshed_since).one()
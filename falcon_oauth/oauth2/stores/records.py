@@ -0,0 +1,183 @@
+"""
+immutable records of the users, clients, authorization codes and bearer
+tokens, and the lean read path of the SQL store: SQLAlchemy Core statements
+selecting only the columns the validation needs, returned as records instead
+of ORM instances.
+
+The records expose the same attributes as the models for those columns, so
+they can be attached to the request in place of the instances. They are also
+what the stores not backed by SQL return.
+"""
+from collections import namedtuple
+
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.util import LRUCache
+
+from falcon_oauth.oauth2.models import Application, AuthorizationCode, BearerToken, User
+
+
+USER_COLUMNS = ('id', 'username', 'first_name', 'last_name', 'email',
+                'is_superuser', 'is_staff', 'is_active')
+CLIENT_COLUMNS = ('id', 'client_id', 'user_id', 'grant_type', 'response_type', 'scopes',
+                  'default_scopes', 'redirect_uris', 'default_redirect_uri')
+AUTHORIZATION_CODE_COLUMNS = ('id', 'application_id', 'user_id', 'scopes', 'code', 'expires_at')
+BEARER_TOKEN_COLUMNS = ('id', 'application_id', 'user_id', 'scopes', 'access_token',
+                        'refresh_token', 'expires_at')
+
+
+class UserRecord(namedtuple('UserRecord', USER_COLUMNS)):
+    """User without its password and dates."""
+    __slots__ = ()
+
+
+class ClientRecord(namedtuple('ClientRecord', CLIENT_COLUMNS + ('user',))):
+    """Application with the user owning it, if any."""
+    __slots__ = ()
+    allowed_response_types = Application.allowed_response_types
+
+
+class AuthorizationCodeRecord(namedtuple('AuthorizationCodeRecord',
+                                         AUTHORIZATION_CODE_COLUMNS + ('user',))):
+    """AuthorizationCode with its user."""
+    __slots__ = ()
+
+
+class BearerTokenRecord(namedtuple('BearerTokenRecord',
+                                   BEARER_TOKEN_COLUMNS + ('user', 'application'))):
+    """BearerToken with its user and application."""
+    __slots__ = ()
+
+    @property
+    def client_id(self):
+        """The client_id of the application of the token."""
+        return self.application.client_id
+
+
+def _columns(table, names, prefix):
+    return [table.c[name].label(prefix + name) for name in names]
+
+
+def _user_record(row, prefix):
+    if row[prefix + 'id'] is None:
+        return None
+    return UserRecord(*(row[prefix + name] for name in USER_COLUMNS))
+
+
+def _client_record(row, prefix, owner_prefix):
+    return ClientRecord(*(row[prefix + name] for name in CLIENT_COLUMNS),
+                        user=_user_record(row, owner_prefix))
+
+
+def client_statement():
+    """Get the statement selecting an application and its owner by client_id.
+    """
+    application = Application.__table__
+    owner = User.__table__.alias('owner')
+    return select(
+        _columns(application, CLIENT_COLUMNS, 'client_') +
+        _columns(owner, USER_COLUMNS, 'owner_')
+    ).select_from(
+        application.outerjoin(owner, owner.c.id == application.c.user_id)
+    ).where(application.c.client_id == bindparam('client_id'))
+
+
+def bearer_token_statement():
+    """Get the statement selecting a bearer token, its user and its
+    application with the owner of the application by access_token.
+    """
+    bearer_token = BearerToken.__table__
+    user = User.__table__.alias('token_user')
+    application = Application.__table__
+    owner = User.__table__.alias('owner')
+    return select(
+        _columns(bearer_token, BEARER_TOKEN_COLUMNS, 'token_') +
+        _columns(user, USER_COLUMNS, 'user_') +
+        _columns(application, CLIENT_COLUMNS, 'client_') +
+        _columns(owner, USER_COLUMNS, 'owner_')
+    ).select_from(
+        bearer_token
+        .join(application, application.c.id == bearer_token.c.application_id)
+        .outerjoin(user, user.c.id == bearer_token.c.user_id)
+        .outerjoin(owner, owner.c.id == application.c.user_id)
+    ).where(bearer_token.c.access_token == bindparam('access_token'))
+
+
+def authorization_code_condition():
+    """Get the condition matching an authorization code of an application."""
+    authorization_code = AuthorizationCode.__table__
+    return and_(authorization_code.c.application_id == bindparam('application_id'),
+                authorization_code.c.code == bindparam('code'))
+
+
+CLIENT_STATEMENT = client_statement()
+BEARER_TOKEN_STATEMENT = bearer_token_statement()
+AUTHORIZATION_CODE_CONDITION = authorization_code_condition()
+# deletes the code and returns it in one round trip, on postgres
+DELETE_AUTHORIZATION_CODE_STATEMENT = AuthorizationCode.__table__.delete().where(
+    AUTHORIZATION_CODE_CONDITION).returning(
+        *(AuthorizationCode.__table__.c[name] for name in AUTHORIZATION_CODE_COLUMNS))
+# the fallback of the other databases, locking the code until it is deleted
+SELECT_AUTHORIZATION_CODE_STATEMENT = select(
+    [AuthorizationCode.__table__.c[name] for name in AUTHORIZATION_CODE_COLUMNS]
+).where(AUTHORIZATION_CODE_CONDITION).with_for_update()
+DELETE_AUTHORIZATION_CODE_BY_ID_STATEMENT = AuthorizationCode.__table__.delete().where(
+    AuthorizationCode.__table__.c.id == bindparam('code_id'))
+
+# the statements are compiled to SQL once per dialect and kept here
+COMPILED_CACHE = LRUCache(64)
+
+
+def _execute(session, statement, params):
+    connection = session.connection(clause=statement).execution_options(
+        compiled_cache=COMPILED_CACHE)
+    return connection.execute(statement, params)
+
+
+def select_client(session, client_id):
+    """Get an application by client_id.
+
+    :param session: the session to execute the statement in.
+    :param client_id: str The hash string of the application.
+    :return: ClientRecord or None if not found.
+    """
+    row = _execute(session, CLIENT_STATEMENT, {'client_id': client_id}).first()
+    if row is None:
+        return None
+    return _client_record(row, 'client_', 'owner_')
+
+
+def select_bearer_token(session, access_token):
+    """Get a bearer token by access token.
+
+    :param session: the session to execute the statement in.
+    :param access_token: str the stored access token.
+    :return: BearerTokenRecord or None if not found.
+    """
+    row = _execute(session, BEARER_TOKEN_STATEMENT, {'access_token': access_token}).first()
+    if row is None:
+        return None
+    return BearerTokenRecord(*(row['token_' + name] for name in BEARER_TOKEN_COLUMNS),
+                             user=_user_record(row, 'user_'),
+                             application=_client_record(row, 'client_', 'owner_'))
+
+
+def delete_authorization_code(session, application_id, code):
+    """Delete an authorization code and get it, two transactions consuming
+    the same code cannot both get it.
+
+    :param session: the session to execute the statements in.
+    :param application_id: int the id of the application of the code.
+    :param code: str the code.
+    :return: AuthorizationCodeRecord without its user, or None if not found.
+    """
+    params = {'application_id': application_id, 'code': code}
+    if session.bind.dialect.name == 'postgresql':
+        row = _execute(session, DELETE_AUTHORIZATION_CODE_STATEMENT, params).first()
+    else:
+        row = _execute(session, SELECT_AUTHORIZATION_CODE_STATEMENT, params).first()
+        if row is not None and not _execute(session, DELETE_AUTHORIZATION_CODE_BY_ID_STATEMENT,
+                                            {'code_id': row['id']}).rowcount:
+            row = None
+    if row is None:
+        return None
+    return AuthorizationCodeRecord(*(row[name] for name in AUTHORIZATION_CODE_COLUMNS), user=None)
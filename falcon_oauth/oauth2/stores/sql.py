@@ -0,0 +1,244 @@
+"""
+the store of the clients, codes and tokens in the SQL database through the
+models of `falcon_oauth.oauth2.models`
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.exc import NoResultFound
+
+from falcon_oauth.oauth2.models import Application, AuthorizationCode, BearerToken, User
+from falcon_oauth.utils.cache import snapshot, restore
+from falcon_oauth.utils.database import Base, Session, has_replicas, replica_reads
+from . import queries
+from .base import DEFAULT_REFRESH_TOKEN_GRACE, TokenStore
+from .records import delete_authorization_code, select_bearer_token, select_client
+
+# relationships loaded along with the rows fetched by the store, so that
+# a single round trip fetches everything a hook or a protected resource needs
+DEFAULT_LOAD_OPTIONS = {
+    'bearer_token': (joinedload(BearerToken.user), joinedload(BearerToken.application)),
+    'authorization_code': (joinedload(AuthorizationCode.user),),
+    'user': (),
+}
+
+MODELS = {
+    'client': Application,
+    'user': User,
+}
+
+
+class SQLTokenStore(TokenStore):
+
+    """
+    Store in the SQL database, the default store of the validator.
+
+    When read replicas are configured, see `falcon_oauth.utils.database`,
+    the lookups of the clients, users and bearer tokens by access token read
+    a replica. The replicas lag behind the primary:
+
+    - a row the replica does not have yet, as a token issued within the
+      lag, is not found on the replica. replica_fallback, on by default,
+      reads the misses again from the primary, so a client gets to use the
+      token it was just given. Each unknown token then costs a primary
+      query, once per ttl of the negative cache of the validator. Without
+      it the validator does not cache the misses, see `stale_misses`.
+    - a token revoked or rotated within the lag is still read as valid.
+
+    The lookups by refresh token, which rotate and revoke the tokens, and
+    the consistent lookups of the revocations always read the primary.
+    """
+
+    def __init__(self, session=Session, load_options=None, use_records=False,
+                 refresh_token_reuse_grace=0, replica_fallback=True):
+        """
+        :param session: the scoped session to use.
+        :param load_options: dict SQLAlchemy loader options applied to the
+            'bearer_token', 'authorization_code' and 'user' lookups, updating
+            DEFAULT_LOAD_OPTIONS.
+        :param use_records: bool read the clients and the bearer tokens by
+            access token with Core statements as immutable records, see
+            `falcon_oauth.oauth2.stores.records`, instead of ORM instances.
+        :param refresh_token_reuse_grace: int seconds a refresh token is
+            still accepted after its rotation, for the retries of the clients.
+        :param replica_fallback: bool read again from the primary the rows
+            not found on a replica.
+        """
+        self.session = session
+        self.load_options = dict(DEFAULT_LOAD_OPTIONS)
+        self.load_options.update(load_options or {})
+        self.use_records = use_records
+        self.refresh_token_reuse_grace = timedelta(seconds=refresh_token_reuse_grace)
+        self.replica_fallback = replica_fallback
+
+    def _read(self, lookup, *args):
+        """Run a lookup on a replica, then on the primary if it found nothing
+        and replica_fallback is set.
+
+        :param lookup: function of args returning the row or None.
+        :return: the row or None.
+        """
+        if not has_replicas():
+            return lookup(*args)
+        with replica_reads(self.session()):
+            found = lookup(*args)
+        if found is None and self.replica_fallback:
+            found = lookup(*args)
+        return found
+
+    def stale_misses(self):
+        return has_replicas() and not self.replica_fallback
+
+    def get_client(self, client_id):
+        return self._read(self._get_client, client_id)
+
+    def _get_client(self, client_id):
+        if self.use_records:
+            return select_client(self.session, client_id)
+        try:
+            return queries.get_client(self.session(), client_id)
+        except NoResultFound:
+            return None
+
+    def get_user(self, user_id):
+        return self._read(self._get_user, user_id)
+
+    def _get_user(self, user_id):
+        try:
+            return queries.get_user(self.session(), user_id, self.load_options['user'])
+        except NoResultFound:
+            return None
+
+    def client_reference(self, application_id, client_id):
+        return restore(Application, {'id': application_id, 'client_id': client_id},
+                       self.session)
+
+    def user_reference(self, user_id):
+        return restore(User, {'id': user_id}, self.session)
+
+    def cache_value(self, instance):
+        if isinstance(instance, Base):
+            return snapshot(instance)
+        return instance
+
+    def cached_instance(self, kind, value):
+        if isinstance(value, dict):
+            return restore(MODELS[kind], value, self.session)
+        return value
+
+    def get_authorization_code(self, client, code):
+        try:
+            return queries.get_authorization_code(
+                self.session(), client.id, code, self.load_options['authorization_code'])
+        except NoResultFound:
+            return None
+
+    def save_authorization_code(self, client, code, scopes, user_id, expires_at):  # pylint: disable=too-many-arguments
+        authorization_code = AuthorizationCode(
+            application_id=client.id,
+            user_id=user_id,
+            scopes=scopes,
+            code=code,
+            expires_at=expires_at)
+        self.session.add(authorization_code)
+        return authorization_code
+
+    def consume_authorization_code(self, client, code):
+        session = self.session()
+        # the code may have been added in this session and not sent yet
+        session.flush()
+        authorization_code = delete_authorization_code(session, client.id, code)
+        if authorization_code is None:
+            return None
+        loaded = session.identity_map.get(identity_key(AuthorizationCode, authorization_code.id))
+        if loaded is not None:
+            session.expunge(loaded)
+        user = (self.user_reference(authorization_code.user_id)
+                if authorization_code.user_id is not None else None)
+        return authorization_code._replace(user=user)
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):
+        if consistent or refresh_token is not None:
+            return self._get_bearer_token(access_token, refresh_token)
+        return self._read(self._get_bearer_token, access_token, refresh_token)
+
+    def _get_bearer_token(self, access_token, refresh_token):
+        try:
+            if refresh_token is not None:
+                refreshed_since = None
+                if self.refresh_token_reuse_grace:
+                    refreshed_since = datetime.now(tz=timezone.utc) - self.refresh_token_reuse_grace
+                return queries.get_bearer_token_by_refresh_token(
+                    self.session(), refresh_token, self.load_options['bearer_token'],
+                    refreshed_since)
+            if self.use_records:
+                return select_bearer_token(self.session, access_token)
+            return queries.get_bearer_token_by_access_token(
+                self.session(), access_token, self.load_options['bearer_token'])
+        except NoResultFound:
+            return None
+
+    def get_bearer_tokens(self, access_tokens):
+        access_tokens = list(access_tokens)
+        if not access_tokens:
+            return {}
+        if not has_replicas():
+            return self._get_bearer_tokens(access_tokens)
+        with replica_reads(self.session()):
+            bearer_tokens = self._get_bearer_tokens(access_tokens)
+        missing = [token for token in access_tokens if token not in bearer_tokens]
+        if missing and self.replica_fallback:
+            bearer_tokens.update(self._get_bearer_tokens(missing))
+        return bearer_tokens
+
+    def _get_bearer_tokens(self, access_tokens):
+        return {bearer_token.access_token: bearer_token
+                for bearer_token in queries.get_bearer_tokens_by_access_tokens(
+                    self.session(), access_tokens, self.load_options['bearer_token'])}
+
+    def save_bearer_token(self, client, user, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                          expires_at):
+        bearer_token = BearerToken(
+            application_id=client.id,
+            user_id=user.id if user is not None else None,
+            scopes=scopes,
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=expires_at)
+        self.session.add(bearer_token)
+        return bearer_token
+
+    def rotate_bearer_token(self, bearer_token, scopes, access_token, refresh_token,  # pylint: disable=too-many-arguments
+                            expires_at):
+        values = {
+            BearerToken.scopes: scopes,
+            BearerToken.access_token: access_token,
+            BearerToken.expires_at: expires_at,
+        }
+        if refresh_token is not None:
+            values.update({
+                BearerToken.refresh_token: refresh_token,
+                BearerToken.previous_refresh_token: bearer_token.refresh_token,
+                BearerToken.refreshed_at: datetime.now(tz=timezone.utc),
+            })
+        # a single update, of the row only if no other rotation changed it
+        rotated = self.session.query(BearerToken).filter(
+            BearerToken.id == bearer_token.id,
+            BearerToken.refresh_token == bearer_token.refresh_token,
+        ).update(values, synchronize_session='evaluate')
+        return bearer_token if rotated else None
+
+    def revoke_bearer_token(self, bearer_token):
+        self.session.query(BearerToken).filter(BearerToken.id == bearer_token.id).delete(
+            synchronize_session='evaluate')
+
+    def purge_expired(self, now, refresh_token_grace=DEFAULT_REFRESH_TOKEN_GRACE):
+        codes = self.session.query(AuthorizationCode).filter(
+            AuthorizationCode.expires_at < now).delete(synchronize_session=False)
+        tokens = self.session.query(BearerToken).filter(or_(
+            and_(BearerToken.refresh_token.is_(None), BearerToken.expires_at < now),
+            BearerToken.expires_at < now - timedelta(seconds=refresh_token_grace),
+        )).delete(synchronize_session=False)
+        return codes, tokens
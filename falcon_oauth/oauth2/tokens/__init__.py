@@ -0,0 +1,4 @@
+"""
+the formats of the access tokens given by the oauth2 server
+"""
+from .signed_token import TokenSigner
@@ -0,0 +1,148 @@
+"""
+self contained access tokens signed with HMAC, the token is a JWT carrying
+the client id, the user id, the scopes and the expiry so it can be validated
+without any database access, see
+
+https://tools.ietf.org/html/rfc7519
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from oauthlib.common import generate_token
+
+
+ALGORITHMS = {
+    'HS256': hashlib.sha256,
+    'HS384': hashlib.sha384,
+    'HS512': hashlib.sha512,
+}
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    data = data.encode('ascii')
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class TokenSigner(object):
+
+    """
+    Sign and verify access tokens. Every key can verify a token, only the
+    active key signs new ones, which allows rotating keys without rejecting
+    the tokens already given.
+
+    An instance is a token generator for oauthlib.
+    """
+
+    def __init__(self, keys, active_key_id, algorithm='HS256'):
+        """
+        :param keys: dict secret keys as bytes by key id.
+        :param active_key_id: str the id of the key signing the new tokens.
+        :param algorithm: str one of HS256, HS384 or HS512.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError('unsupported algorithm: {}'.format(algorithm))
+        self.algorithm = algorithm
+        self.keys = dict(keys)
+        self.active_key_id = None
+        self.activate_key(active_key_id)
+
+    def activate_key(self, key_id, key=None):
+        """Sign the new tokens with another key, the previous keys still
+        verify the tokens they signed.
+
+        :param key_id: str the id of the key.
+        :param key: bytes the secret key, when it is not known yet.
+        """
+        if key is not None:
+            self.keys[key_id] = key
+        if key_id not in self.keys:
+            raise KeyError('unknown key id: {}'.format(key_id))
+        self.active_key_id = key_id
+
+    def remove_key(self, key_id):
+        """Stop verifying the tokens signed with a key.
+
+        :param key_id: str the id of the key.
+        """
+        if key_id == self.active_key_id:
+            raise ValueError('the active key can not be removed')
+        self.keys.pop(key_id, None)
+
+    def _signature(self, key, signing_input):
+        return hmac.new(key, signing_input, ALGORITHMS[self.algorithm]).digest()
+
+    def sign(self, claims):
+        """Get a signed token carrying the claims.
+
+        :param claims: dict the claims, must be serializable in json.
+        :return: str the token.
+        """
+        header = {'alg': self.algorithm, 'typ': 'JWT', 'kid': self.active_key_id}
+        signing_input = '{}.{}'.format(
+            _b64encode(json.dumps(header, separators=(',', ':')).encode('utf-8')),
+            _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8')),
+        ).encode('ascii')
+        signature = self._signature(self.keys[self.active_key_id], signing_input)
+        return '{}.{}'.format(signing_input.decode('ascii'), _b64encode(signature))
+
+    def verify(self, token):
+        """Get the claims of a token signed by one of the keys.
+
+        :param token: str the token.
+        :return: dict the claims or None if the token is not valid.
+        """
+        try:
+            signing_input, signature = token.rsplit('.', 1)
+            header = json.loads(_b64decode(signing_input.split('.', 1)[0]).decode('utf-8'))
+            key = self.keys[header['kid']]
+            if header['alg'] != self.algorithm:
+                return None
+            expected = self._signature(key, signing_input.encode('ascii'))
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                return None
+            return json.loads(_b64decode(signing_input.split('.', 1)[1]).decode('utf-8'))
+        except (ValueError, KeyError, TypeError, IndexError):
+            return None
+
+    @staticmethod
+    def is_signed(token):
+        """Tell if a token looks like a signed token, the random tokens
+        never contain dots.
+
+        :param token: str the token, or None when the request has none.
+        """
+        return token is not None and token.count('.') == 2
+
+    @staticmethod
+    def fingerprint(token):
+        """Get the digest stored in the database in place of a signed token.
+
+        :param token: str the token.
+        :return: str the sha256 hexadecimal digest of the token.
+        """
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def __call__(self, request):
+        """Generate the access token of an oauthlib request.
+
+        :param request: The Request object passed by oauthlib
+        :return: str the token.
+        """
+        now = int(time.time())
+        user = getattr(request, 'user', None)
+        return self.sign({
+            'jti': generate_token(16),
+            'iat': now,
+            'exp': now + int(request.expires_in),
+            'aid': request.client.id,
+            'cid': request.client.client_id,
+            'uid': user.id if user is not None else None,
+            'scope': ' '.join(request.scopes or []),
+        })
@@ -1,84 +1,215 @@
 """ OAuth 2 Web Application Server which is an OAuth provider configured
 Authorization Code, Refresh Token grants and for dispensing Bearer Tokens.
 """
+from collections import namedtuple
 from datetime import datetime, timedelta, timezone
+import functools
 import logging
-from oauthlib.oauth2 import RequestValidator, Server
-from sqlalchemy.orm.exc import NoResultFound
-from falcon_oauth.oauth2.models import Application, User, AuthorizationCode, BearerToken
-from falcon_oauth.utils.database import Session
+import time
+from oauthlib.oauth2 import InvalidGrantError, RequestValidator, Server
+from oauthlib.oauth2.rfc6749.tokens import random_token_generator
+from sqlalchemy import event
+from falcon_oauth.oauth2.models import Application
+from falcon_oauth.oauth2.scopes import allows, client_index, within_scopes
+from falcon_oauth.oauth2.stores import SQLTokenStore
+from falcon_oauth.utils.bloom import RevocationFilter
+from falcon_oauth.utils.cache import TTLCache
+from falcon_oauth.utils.single_flight import SingleFlight
+
+_NOT_CACHED = object()
+
+CachedBearerToken = namedtuple(  # pylint: disable=invalid-name
+    'CachedBearerToken', ['expires_at', 'scopes', 'user', 'client_id'])
 
 
 class OAuth2RequestValidator(RequestValidator):
     """OAuth2 Request Validator class for Authorization grant flow."""
-    def __init__(self):
+    def __init__(self, store=None, client_cache=None, token_cache=None, signer=None,  # pylint: disable=too-many-arguments
+                 revocation_filter=None, negative_cache=None, single_flight=None,
+                 shared_cache=None):
+        """
+        :param store: TokenStore storage of the clients, codes and tokens, see
+            `falcon_oauth.oauth2.stores`, a SQLTokenStore by default.
+        :param client_cache: TTLCache cache of the applications by client_id,
+            a cache of 1024 applications kept 60 seconds is used by default.
+        :param token_cache: TTLCache cache of the validated bearer tokens by
+            access token, disabled by default. Its ttl is the maximum
+            staleness of an entry, entries never outlive the token expiry.
+        :param signer: TokenSigner verifying the signed access tokens, see
+            `use_signed_tokens`.
+        :param revocation_filter: RevocationFilter of the access tokens revoked
+            by this process, checked before the caches and the store.
+        :param negative_cache: TTLCache of the unknown or expired access tokens
+            and of the unknown client_ids, rejected again without lookup. Its
+            entries are short lived, 10000 entries kept 10 seconds by default.
+        :param single_flight: SingleFlight coalescing the concurrent lookups
+            of a same access token or client_id into one query.
+        :param shared_cache: SharedTokenCache of the validated bearer tokens
+            shared by the workers of the host, see
+            `falcon_oauth.utils.shared_cache`, disabled by default. It is
+            looked up after the token cache of the process.
+        """
         self.expires_in = 3600  # seconds
+        if store is None:
+            store = SQLTokenStore()
+        self.store = store
+        if client_cache is None:
+            client_cache = TTLCache(maxsize=1024, ttl=60)
+        self.client_cache = client_cache
+        self.token_cache = token_cache
+        self.signer = signer
+        if revocation_filter is None:
+            revocation_filter = RevocationFilter()
+        self.revocation_filter = revocation_filter
+        if negative_cache is None:
+            negative_cache = TTLCache(maxsize=10000, ttl=10)
+        self.negative_cache = negative_cache
+        if single_flight is None:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight
+        self.shared_cache = shared_cache
+
+    def invalidate_client(self, client_id):
+        """Forget the cached application, to call when its row changes.
+
+        :param client_id: str The hash string of the application.
+        """
+        self.client_cache.invalidate(client_id)
+        self.negative_cache.invalidate(('client', client_id))
+
+    def invalidate_bearer_token(self, access_token):
+        """Forget the cached validation of a bearer token, to call when the
+        token is revoked or refreshed.
+
+        :param access_token: str The access token.
+        """
+        if self.token_cache is not None:
+            self.token_cache.invalidate(access_token)
+        if self.shared_cache is not None:
+            self.shared_cache.invalidate(access_token)
+
+    def _cache_bearer_token(self, bearer_token, shared_version=None):
+        """Remember a validated bearer token until it expires, at most the
+        ttl of the token cache.
+
+        :param bearer_token: Object the bearer token returned by the store.
+        :param shared_version: tuple the version of the token in the shared
+            cache taken before it was read, see `SharedTokenCache.version`.
+        """
+        if self.shared_cache is not None:
+            self.shared_cache.set(bearer_token.access_token, bearer_token, shared_version)
+        if self.token_cache is None:
+            return
+        time_left = (bearer_token.expires_at - datetime.now(tz=timezone.utc)).total_seconds()
+        self.token_cache.set(
+            bearer_token.access_token, self._share_bearer_token(bearer_token), ttl=time_left)
+
+    def _share_bearer_token(self, bearer_token):
+        """Get the validation of a bearer token usable by the other threads,
+        its application is cached.
+
+        :param bearer_token: Object the bearer token returned by the store, or
+            False.
+        :return: CachedBearerToken or False.
+        """
+        if not bearer_token:
+            return False
+        client_id = bearer_token.application.client_id
+        self.client_cache.set(client_id, self.store.cache_value(bearer_token.application))
+        return CachedBearerToken(
+            expires_at=bearer_token.expires_at,
+            scopes=bearer_token.scopes,
+            user=self.store.cache_value(bearer_token.user),
+            client_id=client_id)
+
+    def _share_client(self, client):
+        return self.store.cache_value(client) if client is not None else None
+
+    def _get_cached_bearer_token(self, access_token):
+        """Get the cached validation of a bearer token.
+
+        :param access_token: str The access token.
+        :return: CachedBearerToken or None when not cached.
+        """
+        if self.token_cache is None:
+            return None
+        return self.token_cache.get(access_token)
 
     def _get_user(self, client_id):
         """Get User model related to Application model.
 
         :param client_id: str The hash string of the application.
-        :return: Object SQLAlchemy instance of User model.
+        :return: Object the user returned by the store.
         """
         client = self._get_client(client_id)
-        user = False
-        try:
-            user = User.query.get(
-                User.id == client.user_id
-            ).one()
-        except NoResultFound:
+        if not client:
             return False
+        return self.store.get_user(client.user_id) or False
 
-        return user
+    def _get_client(self, client_id):
+        """Get Application instance by given client_id hash, unknown
+        client_ids are cached as well, in the negative cache.
 
-    def _get_client(self, client_id):  # pylint: disable=no-self-use
-        """Get Application instance by given client_id hash
-
-        :param client_id: Object An SQLAlchemy instance of Application model.
-        :return: Object The Application instance model.
+        :param client_id: str The hash string of the application.
+        :return: Object the application returned by the store.
         """
-        try:
-            client = Application.query.filter(
-                Application.client_id == client_id
-            ).one()
-        except NoResultFound:
-            return False
+        value = self.client_cache.get(client_id, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            if self.negative_cache.get(('client', client_id)):
+                return False
+            # the concurrent lookups of the client_id share one query
+            client, coalesced = self.single_flight.do(
+                ('client', client_id), functools.partial(self.store.get_client, client_id),
+                self._share_client)
+            if coalesced:
+                return self.store.cached_instance('client', client) if client is not None else False
+            if client is None:
+                if not self.store.stale_misses():
+                    self.negative_cache.set(('client', client_id), True)
+                return False
+            self.client_cache.set(client_id, self.store.cache_value(client))
+            return client
+        if not value:
+            return value
 
-        return client
+        return self.store.cached_instance('client', value)
 
-    def _get_authorization_code(self, client, code):  # pylint: disable=no-self-use
-        authorization_code = False
+    def _consume_authorization_code(self, client, code):
+        return self.store.consume_authorization_code(client, code) or False
 
-        try:
-            authorization_code = AuthorizationCode.query.filter(
-                AuthorizationCode.application_id == client.id,
-                AuthorizationCode.code == code,
-            ).one()
-        except NoResultFound:
-            return False
+    def _stored_access_token(self, access_token):
+        """Get the value of the access_token column for an access token, the
+        signed tokens are stored as their fingerprint.
 
-        return authorization_code
+        :param access_token: str The access token.
+        """
+        if self.signer is not None and self.signer.is_signed(access_token):
+            return self.signer.fingerprint(access_token)
+        return access_token
 
-    def _get_bearer_token(self, refresh_token=None, access_token=None):  # pylint: disable=no-self-use
+    def _get_bearer_token(self, refresh_token=None, access_token=None, consistent=False):
         if refresh_token is not None and access_token is not None:
             return False
         if refresh_token is None and access_token is None:
             return False
-        bearer_token = None
-
-        try:
-            if refresh_token is not None:
-                bearer_token = BearerToken.query.filter(
-                    BearerToken.refresh_token == refresh_token
-                ).one()
-            else:
-                bearer_token = BearerToken.query.filter(
-                    BearerToken.access_token == access_token
-                ).one()
-        except NoResultFound:
-            return False
-
-        return bearer_token
+        if refresh_token is not None:
+            bearer_token = self.store.get_bearer_token(
+                refresh_token=refresh_token, consistent=consistent)
+        else:
+            bearer_token = self.store.get_bearer_token(
+                access_token=self._stored_access_token(access_token), consistent=consistent)
+        return bearer_token or False
+
+    def get_bearer_tokens(self, tokens):
+        """Get the bearer tokens of several access tokens with a single
+        lookup of the store, for the introspection.
+
+        :param tokens: list the access tokens.
+        :return: dict the token found, or None, by access token.
+        """
+        stored = {token: self._stored_access_token(token) for token in tokens}
+        bearer_tokens = self.store.get_bearer_tokens(set(stored.values()))
+        return {token: bearer_tokens.get(stored_token) for token, stored_token in stored.items()}
 
     def validate_client_id(self, client_id, request, *args, **kwargs):
         # Simple validity check, does client exist? Not banned?
@@ -97,12 +228,9 @@ class OAuth2RequestValidator(RequestValidator):
         request.client = request.client or self._get_client(client_id)
 
         client = request.client
-        if client:
-            redirect_uris_list = [
-                uri.strip() for uri in client.redirect_uris.split(',')
-            ]
-
-        return redirect_uri in redirect_uris_list
+        if not client:
+            return False
+        return redirect_uri in client_index(client).redirect_uris
 
     def get_default_redirect_uri(self, client_id, request, *args, **kwargs):
         # The redirect used if none has been supplied.
@@ -116,15 +244,14 @@ class OAuth2RequestValidator(RequestValidator):
     def validate_scopes(self, client_id, scopes, client, request, *args, **kwargs):
         # Is the client allowed to access the requested scopes?
         request.client = client or self._get_client(client_id)
-        client_scopes = [scope.strip() for scope in request.client.scopes.split(',')]
         # TODO: log if scopes is not a list of strings
-        return set(client_scopes).issuperset(set(scopes))
+        return within_scopes(client_index(request.client), scopes)
 
     def get_default_scopes(self, client_id, request, *args, **kwargs):
         # Scopes a client will authorize for if none are supplied in the
         # authorization request.
         request.client = request.client or self._get_client(client_id)
-        default_scopes = [scope.strip() for scope in request.client.default_scopes.split(',')]
+        default_scopes = list(client_index(request.client).default_scopes)
         logging.getLogger(__name__).debug('Found default scopes %r', default_scopes)
         return default_scopes
 
@@ -143,14 +270,9 @@ class OAuth2RequestValidator(RequestValidator):
         # ( the last is passed in post_authorization credentials,
         # i.e. { 'user': request.user_id} )
         client = request.client or self._get_client(client_id)
-        authorization_code = AuthorizationCode(
-            application_id=client.id,
-            user_id=None,
-            scopes=request.scopes,
-            code=request.code,
-            expires_at=(datetime.now(tz=timezone.utc) +
-                        timedelta(seconds=self.expires_in)))
-        Session.add(authorization_code)  # pylint: disable=no-member
+        self.store.save_authorization_code(
+            client, request.code, ','.join(request.scopes or []), None,
+            datetime.now(tz=timezone.utc) + timedelta(seconds=self.expires_in))
 
     def authenticate_client(self, request, *args, **kwargs):
         # Whichever authentication method suits you, HTTP Basic might work
@@ -189,11 +311,13 @@ class OAuth2RequestValidator(RequestValidator):
         # Validate the code belongs to the client. Add associated scopes,
         # state and user to request.scopes and request.user_id.
         # TODO: verify that this logic is correct
+        # The code is consumed here, in a single statement, so that two
+        # concurrent exchanges of a code cannot both succeed.
         client = client or self._get_client(client_id)
         if not client:
             logging.getLogger(__name__).warning('No client given')
             return False
-        authorization_code = self._get_authorization_code(client, code)
+        authorization_code = self._consume_authorization_code(client, code)
         if not authorization_code:
             logging.getLogger(__name__).warning('No authorization code provided')
             return False
@@ -210,9 +334,8 @@ class OAuth2RequestValidator(RequestValidator):
     def confirm_redirect_uri(self, client_id, code, redirect_uri, client,
                              *args, **kwargs):
         # You did save the redirect uri with the authorization code right?
-        try:
-            allowed_redirect_uris = client.redirect_uris.split(',')
-        except AttributeError:
+        allowed_redirect_uris = client_index(client).redirect_uris
+        if not allowed_redirect_uris:
             logging.getLogger(__name__).warning(
                 'redirect uris: %(redirect_uris)s invalid for client_id: %(client_id)s',
                 {'redirect_uris': client.redirect_uris, 'client_id': client.client_id})
@@ -270,25 +393,39 @@ class OAuth2RequestValidator(RequestValidator):
         client object.
         """
         scopes = ','.join([x.strip() for x in token['scope'].split(' ')])
-        bearer_token = BearerToken(
-            application_id=request.client.id,
-            user_id=request.user.id,
-            scopes=scopes,
-            access_token=token['access_token'],
-            refresh_token=token.get('refresh_token'),
-            expires_at=(datetime.now(tz=timezone.utc) +
-                        timedelta(seconds=token['expires_in'])))
-        Session.add(bearer_token)  # pylint: disable=no-member
+        access_token = self._stored_access_token(token['access_token'])
+        # the access token may have been looked up before it was saved
+        self.negative_cache.invalidate(('token', token['access_token']))
+        expires_at = datetime.now(tz=timezone.utc) + timedelta(seconds=token['expires_in'])
+
+        if request.refresh_token:
+            refreshed_token = self._get_refreshed_token(request.refresh_token, request)
+            if refreshed_token:
+                # the rotation updates the instance with the new access token
+                previous_access_token = refreshed_token.access_token
+                self.invalidate_bearer_token(previous_access_token)
+                # the token is rotated in place, its previous refresh token
+                # is no longer valid
+                if not self.store.rotate_bearer_token(
+                        refreshed_token, scopes, access_token, token.get('refresh_token'),
+                        expires_at):
+                    raise InvalidGrantError(description='Refresh token already used.',
+                                            request=request)
+                # the previous access token is rejected from now on, even if
+                # it is signed or cached by another process
+                self.revocation_filter.add(previous_access_token)
+                logging.getLogger(__name__).debug('Token rotated: %s', refreshed_token.id)
+                return request.client.default_redirect_uri
+
+        bearer_token = self.store.save_bearer_token(
+            request.client, request.user, scopes, access_token, token.get('refresh_token'),
+            expires_at)
         logging.getLogger(__name__).debug('New token stored: %s', bearer_token.id)
 
         return request.client.default_redirect_uri
 
     def invalidate_authorization_code(self, client_id, code, request, *args, **kwargs):
-        # Authorization codes are use once, invalidate it when a Bearer token
-        # has been acquired.
-        client = request.client or self._get_client(client_id)
-        authorization_code = self._get_authorization_code(client, code)
-        Session.delete(authorization_code)  # pylint: disable=no-member
+        # Authorization codes are use once, validate_code already consumed it.
         logging.getLogger(__name__).debug('Authorization code invalidated')
 
     # Protected resource request
@@ -304,9 +441,44 @@ class OAuth2RequestValidator(RequestValidator):
             2) if the token has expired
             3) if the scopes are available
         """
-        logging.getLogger(__name__).debug('Validate bearer token %r', token)
-        bearer_token = self._get_bearer_token(access_token=token)
+        logging.getLogger(__name__).debug('Validate bearer token')
+        if token is not None and self._stored_access_token(token) in self.revocation_filter:
+            msg = 'Bearer token revoked.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        if self.signer is not None and self.signer.is_signed(token):
+            return self._validate_signed_bearer_token(token, scopes, request)
+
+        cached_token = self._get_cached_bearer_token(token)
+        if cached_token is not None:
+            return self._validate_cached_bearer_token(token, cached_token, scopes, request)
+
+        shared_version = None
+        if self.shared_cache is not None:
+            shared_token = self.shared_cache.get(token)
+            if shared_token is not None:
+                return self._validate_shared_bearer_token(token, shared_token, scopes, request)
+            # an invalidation during the lookup wins over the row read
+            shared_version = self.shared_cache.version(token)
+
+        if self.negative_cache.get(('token', token)):
+            msg = 'Bearer token not found or expired.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        # the concurrent validations of the token share one query
+        bearer_token, coalesced = self.single_flight.do(
+            ('token', token), functools.partial(self._get_bearer_token, access_token=token),
+            self._share_bearer_token)
+        if coalesced and bearer_token:
+            return self._validate_cached_bearer_token(token, bearer_token, scopes, request)
         if not bearer_token:
+            # a token missing from a lagging replica may have just been issued
+            if not self.store.stale_misses():
+                self.negative_cache.set(('token', token), True)
             msg = 'Bearer token not found.'
             request.error_message = msg
             logging.getLogger(__name__).debug(msg)
@@ -315,13 +487,16 @@ class OAuth2RequestValidator(RequestValidator):
         # validate expires
         if bearer_token.expires_at is not None and \
                 datetime.now(tz=timezone.utc) > bearer_token.expires_at:
+            self.negative_cache.set(('token', token), True)
             msg = 'Bearer token is expired.'
             request.error_message = msg
             logging.getLogger(__name__).debug(msg)
             return False
 
+        self._cache_bearer_token(bearer_token, shared_version)
+
         # validate scopes
-        if scopes and not set(bearer_token.scopes.split(',')) & set(scopes):
+        if not allows(bearer_token.scopes, scopes):
             msg = 'Bearer token scope not valid.'
             request.error_message = msg
             logging.getLogger(__name__).debug(msg)
@@ -334,18 +509,176 @@ class OAuth2RequestValidator(RequestValidator):
         request.client = bearer_token.application
         return True
 
+    def _validate_cached_bearer_token(self, token, cached_token, scopes, request):
+        """Validate an access token from its cached validation, the same way
+        `validate_bearer_token` does from the database.
+        """
+        if datetime.now(tz=timezone.utc) > cached_token.expires_at:
+            self.invalidate_bearer_token(token)
+            self.negative_cache.set(('token', token), True)
+            msg = 'Bearer token is expired.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        if not allows(cached_token.scopes, scopes):
+            msg = 'Bearer token scope not valid.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        request.access_token = token
+        request.scopes = scopes
+        request.user = self.store.cached_instance('user', cached_token.user)
+        request.client = self._get_client(cached_token.client_id)
+        return True
+
+    def _validate_shared_bearer_token(self, token, shared_token, scopes, request):
+        """Validate an access token from the cache shared by the workers, the
+        same way `validate_bearer_token` does from the database.
+        """
+        if datetime.now(tz=timezone.utc) > shared_token.expires_at:
+            self.negative_cache.set(('token', token), True)
+            msg = 'Bearer token is expired.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        if not allows(shared_token.scopes, scopes):
+            msg = 'Bearer token scope not valid.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        request.access_token = token
+        request.user = (self.store.user_reference(shared_token.user_id)
+                        if shared_token.user_id is not None else None)
+        request.scopes = scopes
+
+        request.client = self.store.client_reference(shared_token.application_id,
+                                                     shared_token.client_id)
+        return True
+
+    def _validate_signed_bearer_token(self, token, scopes, request):
+        """Validate a signed access token from its claims only, the same way
+        `validate_bearer_token` does from the database.
+        """
+        claims = self.signer.verify(token)
+        if claims is None:
+            msg = 'Bearer token signature not valid.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        if time.time() > claims['exp']:
+            msg = 'Bearer token is expired.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        if not allows(claims['scope'], scopes, ' '):
+            msg = 'Bearer token scope not valid.'
+            request.error_message = msg
+            logging.getLogger(__name__).debug(msg)
+            return False
+
+        request.access_token = token
+        request.user = (self.store.user_reference(claims['uid'])
+                        if claims['uid'] is not None else None)
+        request.scopes = scopes
+
+        request.client = self.store.client_reference(claims['aid'], claims['cid'])
+        return True
+
+    # Token revocation request
+
+    def revoke_token(self, token, token_type_hint, request, *args, **kwargs):
+        """Revoke an access or refresh token of the authenticated client, the
+        bearer token is deleted and its access token rejected from now on
+        without lookup, even if it is cached or signed. The unknown tokens
+        and the tokens of other clients are ignored.
+
+        :param token: str The token.
+        :param token_type_hint: str 'access_token', 'refresh_token' or None.
+        :param request: The Request object passed by oauthlib
+        """
+        # the token may have been issued or rotated within the lag of a replica
+        if token_type_hint == 'refresh_token':
+            bearer_token = (self._get_bearer_token(refresh_token=token, consistent=True) or
+                            self._get_bearer_token(access_token=token, consistent=True))
+        else:
+            bearer_token = (self._get_bearer_token(access_token=token, consistent=True) or
+                            self._get_bearer_token(refresh_token=token, consistent=True))
+        if not bearer_token or bearer_token.application_id != request.client.id:
+            logging.getLogger(__name__).debug('Token to revoke not found for client %r',
+                                              request.client_id)
+            return
+        self.store.revoke_bearer_token(bearer_token)
+        self.invalidate_bearer_token(bearer_token.access_token)
+        self.revocation_filter.add(bearer_token.access_token)
+        logging.getLogger(__name__).debug('Token revoked: %s', bearer_token.id)
+
     # Token refresh request
 
+    def validate_refresh_token(self, refresh_token, client, request, *args, **kwargs):
+        """Ensure the refresh token exists and belongs to the client.
+        :param refresh_token: str The refresh token.
+        :param client: Object The Application instance model.
+        :param request: The Request object passed by oauthlib
+        """
+        bearer_token = self._get_bearer_token(refresh_token=refresh_token)
+        if not bearer_token or bearer_token.application_id != client.id:
+            logging.getLogger(__name__).debug('Refresh token invalid for client %r', client)
+            return False
+        request.user = bearer_token.user
+        # kept for get_original_scopes and save_bearer_token
+        request.refreshed_token = bearer_token
+        return True
+
+    def _get_refreshed_token(self, refresh_token, request):
+        """Get the bearer token of a refresh token, validated earlier in the
+        request.
+        """
+        bearer_token = getattr(request, 'refreshed_token', None)
+        if bearer_token is None:
+            bearer_token = self._get_bearer_token(refresh_token=refresh_token)
+        return bearer_token
+
     def get_original_scopes(self, refresh_token, request, *args, **kwargs):
         # Obtain the token associated with the given refresh_token and
         # return its scopes, these will be passed on to the refreshed
         # access token if the client did not specify a scope during the
         # request.
         logging.getLogger(__name__).debug('Obtaining scope of refreshed token.')
-        bearer_token = self._get_bearer_token(refresh_token=refresh_token)
+        bearer_token = self._get_refreshed_token(refresh_token, request)
         if not bearer_token:
             return False
-        return bearer_token.scopes
+        return bearer_token.scopes.split(',')
 
 validator = OAuth2RequestValidator()  # pylint: disable=invalid-name
 server = Server(validator)  # pylint: disable=invalid-name
+
+
+def use_signed_tokens(signer, oauth_server=None):
+    """Make a server give self contained signed access tokens, validated
+    without database access. The refresh tokens stay random and stored.
+
+    :param signer: TokenSigner signing and verifying the access tokens,
+        None goes back to random access tokens.
+    :param oauth_server: Server the server to configure, the server of this
+        module by default.
+    """
+    oauth_server = oauth_server or server
+    # the grant types and the resource endpoint share the same token handler
+    bearer = oauth_server.default_token_type
+    bearer.token_generator = signer or random_token_generator
+    bearer.refresh_token_generator = random_token_generator
+    bearer.request_validator.signer = signer
+
+
+@event.listens_for(Application, 'after_insert')
+@event.listens_for(Application, 'after_update')
+@event.listens_for(Application, 'after_delete')
+def _invalidate_cached_client(mapper, connection, target):  # pylint: disable=unused-argument
+    """Keep the client cache in line with the changes made in this process."""
+    validator.invalidate_client(target.client_id)
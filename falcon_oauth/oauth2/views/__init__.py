@@ -2,4 +2,7 @@
 the views of the oauth process
 """
 from .authorization import Authorization
+from .introspection import Introspection
+from .revocation import Revocation
 from .token import Token
+from .asgi import AsyncAuthorization, AsyncIntrospection, AsyncRevocation, AsyncToken
@@ -0,0 +1,100 @@
+"""
+the views of the oauth process for the ASGI app of falcon, the validator
+runs in the threads of the offloader so the event loop is never blocked
+"""
+from falcon_oauth.utils.offload import offloader as default_offloader, read_body
+from .authorization import Authorization
+from .introspection import Introspection
+from .revocation import Revocation
+from .token import Token
+
+
+class AsyncAuthorization(Authorization):
+    """
+    Handle for endpoint: /oauth2/auth, with async responders.
+    """
+    def __init__(self, offloader=None):
+        """
+        :param offloader: Offloader the pool running the validator, the
+            offloader of `falcon_oauth.utils.offload` by default.
+        """
+        super(AsyncAuthorization, self).__init__()
+        self.offloader = offloader or default_offloader
+
+    async def on_post(self, req, resp):
+        """Create access token.
+
+        :param req: Object A Falcon Request instance.
+        :param resp: Object A Falcon Response instance.
+        """
+        body = await read_body(req)
+        await self.offloader.run(self._create_token_response, req, resp, body)
+
+    async def on_get(self, req, resp):
+        body = await read_body(req)
+        await self.offloader.run(self._validate_authorization_request, req, resp, body)
+
+
+class AsyncToken(Token):  # pylint: disable=too-few-public-methods
+    """Token view class with async responders. Handle requests to /oauth2/token"""
+    def __init__(self, offloader=None):
+        """
+        :param offloader: Offloader the pool running the validator, the
+            offloader of `falcon_oauth.utils.offload` by default.
+        """
+        super(AsyncToken, self).__init__()
+        self.offloader = offloader or default_offloader
+
+    async def on_post(self, req, res):
+        """Generate token response.
+
+        :param req: Object A Falcon Request instance.
+        :param res: Object A Falcon Response instance.
+        """
+        body = await read_body(req)
+        await self.offloader.run(self._create_token_response, req, res, body)
+
+
+class AsyncIntrospection(Introspection):
+    """
+    Handle for endpoint: /oauth2/introspect, with async responders.
+    """
+    def __init__(self, offloader=None, **kwargs):
+        """
+        :param offloader: Offloader the pool running the validator, the
+            offloader of `falcon_oauth.utils.offload` by default.
+        :param kwargs: the arguments of Introspection.
+        """
+        super(AsyncIntrospection, self).__init__(**kwargs)
+        self.offloader = offloader or default_offloader
+
+    async def on_post(self, req, resp):
+        """Introspect the tokens.
+
+        :param req: Object A Falcon Request instance.
+        :param resp: Object A Falcon Response instance.
+        """
+        body = await read_body(req)
+        await self.offloader.run(self._introspect, req, resp, body)
+
+
+class AsyncRevocation(Revocation):  # pylint: disable=too-few-public-methods
+    """
+    Handle for endpoint: /oauth2/revoke, with async responders.
+    """
+    def __init__(self, offloader=None):
+        """
+        :param offloader: Offloader the pool running the validator, the
+            offloader of `falcon_oauth.utils.offload` by default.
+        """
+        super(AsyncRevocation, self).__init__()
+        self.offloader = offloader or default_offloader
+
+    async def on_post(self, req, resp):
+        """Revoke a token.
+
+        :param req: Object A Falcon Request instance.
+        :param resp: Object A Falcon Response instance.
+        """
+        body = await read_body(req)
+        await self.offloader.run(self._revoke, req, resp, body)
@@ -5,11 +5,10 @@ https://oauthlib.readthedocs.io/en/latest/oauth2/endpoints/authorization.html
 """
 import logging
 import falcon
-from falcon.util import get_http_status
 from oauthlib.oauth2.rfc6749.errors import (MissingClientIdError, InvalidClientIdError,
                                             MissingResponseTypeError)
 from falcon_oauth.oauth2.validators.oauth2_request_validator import server
-from .utils import handle_error
+from .utils import get_http_status, handle_error, set_body
 
 
 class Authorization(object):
@@ -25,46 +24,53 @@ class Authorization(object):
         :param req: Object A Falcon Request instance.
         :param resp: Object A Falcon Response instance.
         """
+        self._create_token_response(req, resp, req.stream.read())
+
+    def _create_token_response(self, req, resp, body):
         try:
             headers, body, status = self.server.create_token_response(
                 req.uri,
                 http_method=req.method,
-                body=req.stream.read(),
+                body=body,
                 headers=req.headers,
             )
         except Exception:  # pylint: disable=broad-except
             handle_error(req, resp)
         else:
-            resp.headers = headers
-            resp.body = body
+            resp.set_headers(headers)
+            set_body(resp, body)
             resp.status = get_http_status(status)
 
     def on_get(self, req, resp):
+        self._validate_authorization_request(req, resp, req.stream.read())
+
+    def _validate_authorization_request(self, req, resp, body):
         try:
             scopes, credentials = self.server.validate_authorization_request(  # pylint: disable=protected-access
                 req.uri,
                 http_method=req.method,
-                body=req.stream.read(),
+                body=body,
                 headers=req.headers)
         except (MissingClientIdError, InvalidClientIdError):
             logging.exception('wrong or no client_id during authorization get')
-            resp.body = '{"error": "invalid_client"}'
+            set_body(resp, '{"error": "invalid_client"}')
             resp.status = falcon.HTTP_401
         except MissingResponseTypeError:
             logging.exception('no response type in authorization get')
-            resp.body = '{"error": "unsupported_grant_type"}'
+            set_body(resp, '{"error": "unsupported_grant_type"}')
             resp.status = falcon.HTTP_400
         except Exception:  # pylint: disable=broad-except
             handle_error(req, resp)
         else:
-            resp.body = ('<h1>Authorize access to {}</h1>'
-                         .format(req.params.get('client_id')))
-            resp.body += '<form method="POST" action="/authorize">'
+            html = ('<h1>Authorize access to {}</h1>'
+                    .format(req.params.get('client_id')))
+            html += '<form method="POST" action="/authorize">'
             for scope in scopes or []:
-                resp.body += ('<input type="checkbox" name="scopes" value="{}"/> {}'
-                              .format(scope, scope))
-            resp.body += '<input type="submit" value="Authorize"/>'
-            resp.body += '</form>'
+                html += ('<input type="checkbox" name="scopes" value="{}"/> {}'
+                         .format(scope, scope))
+            html += '<input type="submit" value="Authorize"/>'
+            html += '</form>'
+            set_body(resp, html)
             resp.content_type = 'text/html'
             resp.status = falcon.HTTP_200
             print(credentials)
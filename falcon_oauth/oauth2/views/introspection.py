@@ -0,0 +1,109 @@
+"""
+the introspection endpoint of the access tokens for the resource servers,
+see https://tools.ietf.org/html/rfc7662
+"""
+import json
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+import falcon
+from falcon_oauth.oauth2.validators.oauth2_request_validator import server
+
+from .utils import handle_error, set_body
+
+
+def token_info(bearer_token, now):
+    """Get the introspection response of a bearer token.
+
+    :param bearer_token: the bearer token found or None.
+    :param now: datetime the current time.
+    :return: dict the members of the response.
+    """
+    if not bearer_token or bearer_token.expires_at <= now:
+        return {'active': False}
+    info = {
+        'active': True,
+        'scope': ' '.join(scope.strip() for scope in bearer_token.scopes.split(',')),
+        'client_id': bearer_token.application.client_id,
+        'token_type': 'Bearer',
+        'exp': int(bearer_token.expires_at.timestamp()),
+    }
+    if bearer_token.user_id is not None:
+        info['sub'] = str(bearer_token.user_id)
+        if bearer_token.user is not None:
+            info['username'] = bearer_token.user.username
+    return info
+
+
+class Introspection(object):
+    """
+    Handle for endpoint: /oauth2/introspect.
+
+    The resource servers authenticate with a bearer token of the scopes of
+    the endpoint and post the token to introspect. Several token parameters
+    introspect the tokens at once, the response is then the list of their
+    responses in the same order.
+
+    The Cache-Control of the responses lets the resource servers cache them
+    until the first active token expires, at most max_age seconds. An
+    inactive token never becomes active, its response is cached max_age.
+    """
+    def __init__(self, scopes=('introspection',), max_age=60, max_batch_size=100):
+        """
+        :param scopes: tuple the scopes required from the resource servers.
+        :param max_age: int the maximum seconds the responses are cached.
+        :param max_batch_size: int the maximum number of tokens of a request.
+        """
+        self.server = server
+        self.scopes = list(scopes)
+        self.max_age = max_age
+        self.max_batch_size = max_batch_size
+
+    def on_post(self, req, resp):
+        """Introspect the tokens.
+
+        :param req: Object A Falcon Request instance.
+        :param resp: Object A Falcon Response instance.
+        """
+        self._introspect(req, resp, req.stream.read())
+
+    def _introspect(self, req, resp, body):
+        resp.content_type = 'application/json'
+        try:
+            valid, _ = self.server.verify_request(
+                req.uri, req.method, body, req.headers, self.scopes)
+            if not valid:
+                set_body(resp, '{"error": "invalid_client"}')
+                resp.status = falcon.HTTP_401
+                return
+
+            if isinstance(body, bytes):
+                body = body.decode('utf-8')
+            tokens = parse_qs(body or '').get('token', [])
+            if not tokens or len(tokens) > self.max_batch_size:
+                set_body(resp, '{"error": "invalid_request"}')
+                resp.status = falcon.HTTP_400
+                return
+
+            bearer_tokens = self.server.request_validator.get_bearer_tokens(tokens)
+        except Exception:  # pylint: disable=broad-except
+            handle_error(req, resp)
+            return
+
+        now = datetime.now(tz=timezone.utc)
+        infos = [token_info(bearer_tokens[token], now) for token in tokens]
+        set_body(resp, json.dumps(infos if len(tokens) > 1 else infos[0]))
+        resp.cache_control = self._cache_control(infos, now)
+        resp.status = falcon.HTTP_200
+
+    def _cache_control(self, infos, now):
+        """Get the Cache-Control of the responses, bounded by the expiry of
+        the tokens.
+        """
+        expiries = [info['exp'] for info in infos if info['active']]
+        max_age = self.max_age
+        if expiries:
+            max_age = max(0, min(max_age, min(expiries) - int(now.timestamp())))
+        if not max_age:
+            return ['no-store']
+        return ['private', 'max-age={}'.format(max_age)]
@@ -0,0 +1,39 @@
+"""
+the revocation endpoint of the access and refresh tokens,
+see https://tools.ietf.org/html/rfc7009
+"""
+from falcon_oauth.oauth2.validators import server
+
+from .utils import get_http_status, handle_error, set_body
+
+
+class Revocation(object):  # pylint: disable=too-few-public-methods
+    """
+    Handle for endpoint: /oauth2/revoke.
+
+    The clients post a token of theirs, with its token_type_hint optionally.
+    The unknown tokens are answered with a 200 as well.
+    """
+    def __init__(self):
+        self.server = server
+
+    def on_post(self, req, resp):
+        """Revoke a token.
+
+        :param req: Object A Falcon Request instance.
+        :param resp: Object A Falcon Response instance.
+        """
+        self._revoke(req, resp, req.stream.read())
+
+    def _revoke(self, req, resp, body):
+        try:
+            headers, body, status = self.server.create_revocation_response(
+                req.uri, http_method=req.method, body=body, headers=req.headers)
+        except Exception:  # pylint: disable=broad-except
+            handle_error(req, resp)
+            return
+        resp.set_headers(headers)
+        if body:
+            resp.content_type = 'application/json'
+        set_body(resp, body)
+        resp.status = get_http_status(status)
@@ -1,8 +1,8 @@
 """Token view file."""
 from falcon_oauth.oauth2.validators import server
-from falcon.util import get_http_status
+from oauthlib.oauth2 import OAuth2Error
 
-from .utils import handle_error
+from .utils import get_http_status, handle_error, set_body
 
 class Token(object):  # pylint: disable=too-few-public-methods
     """Token view class. Handle requests to /oauth2/token"""
@@ -15,6 +15,9 @@ class Token(object):  # pylint: disable=too-few-public-methods
         :param req: Object A Falcon Request instance.
         :param res: Object A Falcon Response instance.
         """
+        self._create_token_response(req, res, req.stream.read())
+
+    def _create_token_response(self, req, res, body):
         # If you wish to include request specific extra credentials for
         # use in the validator, do so here.
         credentials = {'foo': 'bar'}
@@ -22,12 +25,18 @@ class Token(object):  # pylint: disable=too-few-public-methods
             headers, body, status = self._token_endpoint.create_token_response(
                 req.uri,
                 http_method=req.method,
-                body=req.stream.read(),
+                body=body,
                 headers=req.headers,
                 credentials=credentials)
+        except OAuth2Error as error:
+            # raised by the validator once the token is created, as when
+            # its refresh token was rotated concurrently
+            res.content_type = 'application/json'
+            set_body(res, error.json)
+            res.status = get_http_status(error.status_code)
         except Exception:  # pylint: disable=broad-except
             handle_error(req, res)
         else:
-            res.headers = headers
-            res.body = body
+            res.set_headers(headers)
+            set_body(res, body)
             res.status = get_http_status(status)
@@ -4,6 +4,26 @@ some utils functions used by multiple views
 import logging
 import falcon
 
+try:
+    from falcon import code_to_http_status as get_http_status
+except ImportError:  # falcon < 3
+    from falcon.util import get_http_status
+
+# resp.body is deprecated since falcon 3 and removed in falcon 4, which only
+# have resp.text
+BODY_ATTRIBUTE = 'text' if hasattr(falcon.Response, 'text') else 'body'
+
+
+def set_body(resp, body):
+    """
+    sets the text body of a response, as resp.text or resp.body for the
+    falcon versions without resp.text
+
+    :param: resp the falcon response object
+    :param: body str the body
+    """
+    setattr(resp, BODY_ATTRIBUTE, body)
+
 
 def handle_error(req, resp):
     """
@@ -16,5 +36,5 @@ def handle_error(req, resp):
     logging.getLogger(__name__).exception(
         'Server 500: token creation unsuccessful from ip: %s',
         req.remote_addr)  # pylint: disable=broad-except
-    resp.body = '{"error": "server error"}'
+    set_body(resp, '{"error": "server error"}')
     resp.status = falcon.HTTP_500
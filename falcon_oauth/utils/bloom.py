@@ -0,0 +1,114 @@
+"""
+bloom filters, compact sets answering "maybe there" or "surely not", used
+to reject the revoked tokens before any lookup
+"""
+import hashlib
+import math
+import threading
+import time
+
+
+class BloomFilter(object):
+
+    """
+    Bloom filter of strings, it answers false positives at the error rate
+    once it holds its capacity, never false negatives.
+    """
+
+    def __init__(self, capacity, error_rate):
+        """
+        :param capacity: int the number of strings expected.
+        :param error_rate: float the rate of false positives at capacity.
+        """
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # double hashing, the positions are h1 + i * h2
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        """Add a string.
+
+        :param value: str the string.
+        """
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(value))
+
+
+class RevocationFilter(object):
+
+    """
+    Bloom filter of the revoked access tokens of the process. The tokens
+    expire, so the filter keeps two generations of ttl seconds: a token is
+    remembered between ttl and twice ttl, keep ttl over the lifetime of the
+    access tokens.
+    """
+
+    def __init__(self, capacity=10000, error_rate=1e-9, ttl=3600, timer=time.monotonic):
+        """
+        :param capacity: int the revocations expected during ttl.
+        :param error_rate: float the rate of valid tokens taken for revoked
+            at capacity.
+        :param ttl: float seconds of a generation.
+        :param timer: function giving the current time in seconds.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl
+        self.timer = timer
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = None
+        self._started_at = timer()
+
+    def _rotate(self):
+        now = self.timer()
+        if now - self._started_at < self.ttl:
+            return
+        with self._lock:
+            if now - self._started_at < self.ttl:
+                return
+            # the previous generation is only kept if it is recent enough
+            expired = now - self._started_at >= 2 * self.ttl
+            self._previous = None if expired else self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._started_at = now
+
+    def add(self, access_token):
+        """Remember a revoked access token.
+
+        :param access_token: str the stored access token.
+        """
+        self._rotate()
+        with self._lock:
+            self._current.add(access_token)
+
+    def __contains__(self, access_token):
+        self._rotate()
+        previous = self._previous
+        return access_token in self._current or (
+            previous is not None and access_token in previous)
+
+    def stats(self):
+        """Get the number of tokens of the generations and the size of the
+        filter in bytes.
+
+        :return: dict of the counters.
+        """
+        previous = self._previous
+        return {
+            'current': self._current.count,
+            'previous': previous.count if previous is not None else 0,
+            'bytes': len(self._current.bits) * 2,
+        }
@@ -0,0 +1,154 @@
+"""
+in-process caches used to spare database round trips
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from .database import Session
+
+
+class TTLCache(object):
+
+    """
+    A thread safe cache bounded in size whose entries expire after ``ttl``
+    seconds. When the cache is full the least recently used entry is evicted.
+    Any value can be cached, including ``None`` or ``False`` which is how
+    negative entries are stored.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, timer=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be a positive integer')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Get the value cached for key.
+
+        :param key: the key of the entry.
+        :param default: returned when the key is unknown or expired.
+        :return: the cached value or default.
+        """
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at <= self._timer():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Cache a value.
+
+        :param key: the key of the entry.
+        :param value: the value to cache.
+        :param ttl: int seconds the entry lives, capped to the cache ttl.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.invalidate(key)
+            return
+        with self._lock:
+            self._data[key] = (self._timer() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove an entry from the cache, if present.
+
+        :param key: the key of the entry.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry of the cache, counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Get the counters of the cache, useful to size it.
+
+        :return: dict of hits, misses, evictions, expirations and sizes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+def snapshot(instance):
+    """Get the column values of a SQLAlchemy instance.
+
+    The snapshot is a plain dict which can safely be shared between threads,
+    unlike the instance which belongs to the session it was loaded in.
+
+    :param instance: Object a SQLAlchemy instance.
+    :return: dict the values keyed by attribute name.
+    """
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in inspect(type(instance)).column_attrs
+    }
+
+
+def restore(model, values, session=Session):
+    """Get an instance of model attached to a session from a snapshot, without
+    querying the database.
+
+    Attributes missing from values are loaded from the database on access,
+    and so are the relationships.
+
+    :param model: the SQLAlchemy model class.
+    :param values: dict values as returned by `snapshot`.
+    :param session: scoped_session the session to attach the instance to, the
+        global one by default.
+    :return: Object the instance attached to session.
+    """
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return session.merge(instance, load=False)
+
+
+def load_columns(instance):
+    """Load the columns of a SQLAlchemy instance not loaded yet, as the
+    references holding only their id, so the instance stays usable once its
+    session is removed. Anything else, as the records, is left as it is.
+
+    :param instance: Object a SQLAlchemy instance, a record or None.
+    """
+    state = inspect(instance, raiseerr=False)
+    if state is None or not state.mapper:
+        return
+    unloaded = state.unloaded & set(attr.key for attr in state.mapper.column_attrs)
+    if unloaded:
+        # one query loads all the unloaded columns
+        getattr(instance, next(iter(unloaded)))
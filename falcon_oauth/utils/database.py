@@ -1,26 +1,258 @@
 """Database common utils."""
+import contextlib
+import itertools
 import os
+import threading
+from datetime import timezone
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import Session as BaseSession, sessionmaker
+from sqlalchemy.sql.expression import Select
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.types import TypeDecorator
 
 from .falcon_scoped_session import falcon_oauth_session
+from .pool import MeteredQueuePool, PoolMetrics
 
 
-def get_engine_url():
+class UTCDateTime(TypeDecorator):  # pylint: disable=abstract-method
+
+    """
+    Timezone aware datetime column, in UTC. The databases without timezones,
+    as SQLite, store the naive UTC datetime and give it back aware, the
+    expiries can then be compared with the aware datetimes of the grants.
+    """
+
+    impl = DateTime(timezone=True)
+
+    def process_bind_param(self, value, dialect):
+        if value is None or value.tzinfo is None:
+            return value
+        value = value.astimezone(timezone.utc)
+        if dialect.name == 'sqlite':
+            return value.replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+def get_engine_url(host=None):
     """Get url to use for sqlalchemy.
+
+    :param host: str the host of the database, FALCON_DB_HOST by default.
     """
     return "postgresql://{user}:{password}@{host}/{dbname}".format(
         user=os.getenv("FALCON_DB_USER", "DB_USER"),
         password=os.getenv("FALCON_DB_PASSWORD", "DB_PASSWORD"),
-        host=os.getenv("FALCON_DB_HOST", "DB_HOST"),
+        host=host if host is not None else os.getenv("FALCON_DB_HOST", "DB_HOST"),
         dbname=os.getenv("FALCON_DB_NAME", "DB_NAME"),
     )
 
+
+def get_replica_urls():
+    """Get the urls of the read replicas, one for each host of the comma
+    separated FALCON_DB_REPLICA_HOSTS, with the user, password and database
+    of the primary.
+    """
+    hosts = os.getenv("FALCON_DB_REPLICA_HOSTS", "")
+    return [get_engine_url(host.strip()) for host in hosts.split(",") if host.strip()]
+
+
+def _getenv_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def get_engine_settings():
+    """Get the default engine settings, read from the environment.
+    """
+    return {
+        'url': None,
+        'pool_size': _getenv_int('FALCON_DB_POOL_SIZE', 5),
+        'max_overflow': _getenv_int('FALCON_DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _getenv_int('FALCON_DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _getenv_int('FALCON_DB_POOL_RECYCLE', -1),
+        'pool_pre_ping': os.getenv('FALCON_DB_POOL_PRE_PING', '') == 'true',
+        'statement_timeout': _getenv_int('FALCON_DB_STATEMENT_TIMEOUT', None),
+        'replica_urls': get_replica_urls(),
+    }
+
+
 # Base class for SQLAlchemy
 Base = declarative_base()  # pylint: disable=invalid-name
 
+_engine_lock = threading.Lock()
+_engine = None  # pylint: disable=invalid-name
+_replica_engines = None  # pylint: disable=invalid-name
+_replica_counter = itertools.count()  # pylint: disable=invalid-name
+_engine_settings = get_engine_settings()  # pylint: disable=invalid-name
+pool_metrics = PoolMetrics()  # pylint: disable=invalid-name
+
+
+def configure(**settings):
+    """Configure the engine, the settings not given keep their value.
+    An engine already created is disposed and created again on next use.
+
+    :param url: str the database url, built from the FALCON_DB_* environment
+        variables by default.
+    :param pool_size: int the connections kept in the pool.
+    :param max_overflow: int the connections opened over pool_size.
+    :param pool_timeout: int seconds to wait for a connection of the pool.
+    :param pool_recycle: int seconds after which a connection is replaced,
+        -1 to never replace them.
+    :param pool_pre_ping: bool test connections when they leave the pool.
+    :param statement_timeout: int milliseconds after which the database
+        cancels a statement, None for no timeout.
+    :param replica_urls: list of str the urls of the read replicas, see
+        `replica_reads`, built from FALCON_DB_REPLICA_HOSTS by default. The
+        primary engine is kept when only the replicas change.
+    """
+    global _engine, _replica_engines  # pylint: disable=global-statement,invalid-name
+    unknown = set(settings) - set(_engine_settings)
+    if unknown:
+        raise TypeError('unknown engine settings: {}'.format(', '.join(sorted(unknown))))
+    with _engine_lock:
+        _engine_settings.update(settings)
+        if _engine is not None and set(settings) - {'replica_urls'}:
+            _engine.dispose()
+            _engine = None
+        for replica_engine in _replica_engines or ():
+            replica_engine.dispose()
+        _replica_engines = None
+
+
+def _create_engine(settings, url=None):
+    """Create an engine from the settings given to `configure`.
+
+    :param url: str the url of a replica, the database of the settings by
+        default.
+    """
+    connect_args = {}
+    if settings['statement_timeout'] is not None:
+        connect_args['options'] = '-c statement_timeout={}'.format(
+            settings['statement_timeout'])
+    return create_engine(
+        url or settings['url'] or get_engine_url(),
+        poolclass=MeteredQueuePool,
+        # the pool of each replica has its own metrics
+        metrics=pool_metrics if url is None else PoolMetrics(),
+        pool_size=settings['pool_size'],
+        max_overflow=settings['max_overflow'],
+        pool_timeout=settings['pool_timeout'],
+        pool_recycle=settings['pool_recycle'],
+        pool_pre_ping=settings['pool_pre_ping'],
+        connect_args=connect_args)
+
+
+def get_engine():
+    """Get the engine, created on first use so importing the package does not
+    touch the network.
+    """
+    global _engine  # pylint: disable=global-statement,invalid-name
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(_engine_settings)
+    return _engine
+
+
+def get_replica_engines():
+    """Get the engines of the read replicas, created on first use.
+
+    :return: list of the engines, empty without replicas.
+    """
+    global _replica_engines  # pylint: disable=global-statement,invalid-name
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                _replica_engines = [_create_engine(_engine_settings, url)
+                                    for url in _engine_settings['replica_urls']]
+    return _replica_engines
+
+
+def has_replicas():
+    """Check if read replicas are configured."""
+    return bool(_engine_settings['replica_urls'])
+
+
+def get_pool_status():
+    """Get the connections of the pool and the metrics of the checkouts.
+
+    :return: dict see `MeteredQueuePool.status_dict`.
+    """
+    return get_engine().pool.status_dict()
+
+
+def get_replica_pool_status():
+    """Get the connections of the pools of the read replicas and the metrics
+    of their checkouts.
+
+    :return: list of dict, see `get_pool_status`, in the order of the
+        replica urls.
+    """
+    return [engine.pool.status_dict() for engine in get_replica_engines()]
+
+
+class RoutingSession(BaseSession):
+    """Session sending its statements to the primary engine, but the reads
+    made in `replica_reads` to the replicas, in turn.
+
+    Once the transaction of the session wrote, by a flush or a statement
+    other than a select, all its statements go to the primary so it reads
+    its own writes.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # pylint: disable=arguments-differ
+        if self._flushing or (clause is not None and not _is_read(clause)):
+            self.info['wrote'] = True
+        elif clause is not None and self.info.get('replica_reads') and \
+                not self.info.get('wrote'):
+            replicas = get_replica_engines()
+            if replicas:
+                return replicas[next(_replica_counter) % len(replicas)]
+        return super(RoutingSession, self).get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+def _is_read(clause):
+    """Check if a statement only reads, a select not locking rows."""
+    return isinstance(clause, Select) and \
+        clause._for_update_arg is None  # pylint: disable=protected-access
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _forget_writes(session, transaction):
+    """The next transaction can read from the replicas again."""
+    if transaction.parent is None:
+        session.info.pop('wrote', None)
+
+
+@contextlib.contextmanager
+def replica_reads(session):
+    """Send the selects of the session to the read replicas in the block,
+    when some are configured. The replicas lag behind the primary: a row
+    not found on a replica may be on the primary.
+
+    :param session: RoutingSession the session.
+    """
+    previous = session.info.get('replica_reads', False)
+    session.info['replica_reads'] = True
+    try:
+        yield session
+    finally:
+        session.info['replica_reads'] = previous
+
+
+class LazySessionMaker(sessionmaker):  # pylint: disable=too-few-public-methods
+    """sessionmaker binding the sessions to the engine when they are created.
+    """
+    def __call__(self, **local_kw):
+        local_kw.setdefault('bind', get_engine())
+        return super(LazySessionMaker, self).__call__(**local_kw)
+
+
 # create session binded to engine
-engine = create_engine(get_engine_url())  # pylint: disable=invalid-name
-session_factory = sessionmaker(bind=engine)  # pylint: disable=invalid-name
-Session = falcon_oauth_session(session_factory)  # pylint: disable=invalid-name
+session_factory = LazySessionMaker(class_=RoutingSession)  # pylint: disable=invalid-name
+# the scope of the sessions: thread, context for asyncio, or greenlet
+Session = falcon_oauth_session(  # pylint: disable=invalid-name
+    session_factory, scope=os.getenv('FALCON_DB_SESSION_SCOPE', 'thread'))
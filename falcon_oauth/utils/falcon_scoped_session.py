@@ -1,11 +1,18 @@
 """
 module to create scoped sessions specific to falcon
 """
+import contextvars
 import threading
+import weakref
 
 from sqlalchemy.util import ScopedRegistry
 from sqlalchemy.orm import scoped_session
 
+try:
+    import greenlet
+except ImportError:  # pragma: no cover
+    greenlet = None  # pylint: disable=invalid-name
+
 
 class FalconOauthRegistry(ScopedRegistry):
 
@@ -36,16 +43,106 @@ class FalconOauthRegistry(ScopedRegistry):
         except AttributeError:
             pass
 
+
+class ContextVarRegistry(ScopedRegistry):
+
+    """
+    A scoped registry for a context, see `contextvars`: each asyncio task,
+    and each thread, has its own session. The tasks created while a session
+    is set share it, as they share the context they copy.
+    """
+
+    def __init__(self, createfunc):  # pylint: disable=super-init-not-called
+        self.createfunc = createfunc
+        self.registry = contextvars.ContextVar(
+            'falcon_oauth_session_{}'.format(id(self)), default=None)
+
+    def __call__(self):
+        val = self.registry.get()
+        if val is None:
+            val = self.createfunc()
+            self.registry.set(val)
+        return val
+
+    def has(self):
+        return self.registry.get() is not None
+
+    def set(self, obj):
+        self.registry.set(obj)
+
+    def clear(self):
+        self.registry.set(None)
+
+
+class GreenletRegistry(ScopedRegistry):
+
+    """
+    A scoped registry for a greenlet, for the gevent and eventlet workers
+    which do not patch threading.local. The session of a greenlet is
+    forgotten when the greenlet ends, even if it was not removed.
+    """
+
+    def __init__(self, createfunc):  # pylint: disable=super-init-not-called
+        if greenlet is None:
+            raise ImportError('the greenlet scope requires the greenlet package')
+        self.createfunc = createfunc
+        self.registry = weakref.WeakKeyDictionary()
+
+    def __call__(self):
+        current = greenlet.getcurrent()
+        try:
+            return self.registry[current]
+        except KeyError:
+            val = self.registry[current] = self.createfunc()
+            return val
+
+    def has(self):
+        return greenlet.getcurrent() in self.registry
+
+    def set(self, obj):
+        self.registry[greenlet.getcurrent()] = obj
+
+    def clear(self):
+        self.registry.pop(greenlet.getcurrent(), None)
+
+
+REGISTRIES = {
+    'thread': FalconOauthRegistry,
+    'context': ContextVarRegistry,
+    'greenlet': GreenletRegistry,
+}
+
+
 class falcon_oauth_session(scoped_session):  # pylint: disable=invalid-name
 
     """
-    Database session for a thread for falcon_oauth
+    Database session for a thread for falcon_oauth, or for a context or a
+    greenlet according to its scope
     """
 
-    def __init__(self, session_factory, scopefunc=None):  # pylint: disable=super-init-not-called
+    def __init__(self, session_factory, scopefunc=None, scope='thread'):  # pylint: disable=super-init-not-called
+        """
+        :param session_factory: the factory of the sessions.
+        :param scopefunc: function returning the key of the current scope,
+            the scope is ignored if given.
+        :param scope: str 'thread', 'context' for the asyncio apps or
+            'greenlet' for the gevent and eventlet workers.
+        """
         self.session_factory = session_factory
 
         if scopefunc:
             self.registry = ScopedRegistry(session_factory, scopefunc)
         else:
-            self.registry = FalconOauthRegistry(session_factory)
+            self.set_scope(scope)
+
+    def set_scope(self, scope):
+        """Change the scope of the sessions, to call at the start of the
+        process before any session is used.
+
+        :param scope: str 'thread', 'context' or 'greenlet'.
+        """
+        try:
+            registry_class = REGISTRIES[scope]
+        except KeyError:
+            raise ValueError('unknown session scope: {}'.format(scope))
+        self.registry = registry_class(self.session_factory)
@@ -0,0 +1,125 @@
+"""
+offload of the blocking work of the validator, oauthlib and SQLAlchemy, from
+the event loop of an ASGI app to a bounded pool of threads
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .database import Session
+
+DEFAULT_MAX_WORKERS = 10
+
+
+class Offloader(object):
+
+    """
+    Run the blocking responders in a pool of threads, each call with its own
+    database session committed or rolled back and removed in the thread that
+    used it, as SessionMiddleware does for the WSGI app.
+
+    The requests waiting for a thread do not hold a database connection, so
+    thousands of them can be in flight while max_workers bounds the
+    connections used: keep it under pool_size + max_overflow of the engine.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, session=Session):
+        """
+        :param max_workers: int the number of threads.
+        :param session: the scoped session of the responders.
+        """
+        self.max_workers = max_workers
+        self.session = session
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The pool of threads, created on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='falcon-oauth')
+        return self._executor
+
+    def _call(self, responder, req, resp, *args):
+        succeeded = False
+        try:
+            responder(req, resp, *args)
+            succeeded = True
+        finally:
+            self._end_session(succeeded and not resp.status.startswith('5'))
+
+    def _end_session(self, commit):
+        if not self.session.registry.has():
+            return
+        try:
+            if commit:
+                self.session.commit()
+            else:
+                self.session.rollback()
+        except Exception:
+            self.session.rollback()
+            raise
+        finally:
+            self.session.remove()
+
+    async def run(self, responder, req, resp, *args):
+        """Run a blocking responder in a thread of the pool.
+
+        :param responder: the function called with req, resp and args.
+        :param req: the request.
+        :param resp: the response, the session is rolled back if its status
+            is a server error.
+        :param args: the other arguments of the responder.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor, functools.partial(self._call, responder, req, resp, *args))
+
+    def _call_read_only(self, func, *args):
+        try:
+            return func(*args)
+        finally:
+            # closing the session releases its connection without expiring
+            # the instances returned, as a rollback would
+            self.session.remove()
+
+    async def call(self, func, *args):
+        """Run a blocking function which only reads from the database in a
+        thread of the pool.
+
+        :param func: the function called with args.
+        :return: the value returned by func.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self._call_read_only, func, *args))
+
+    def shutdown(self, wait=True):
+        """Stop the threads, the pool is created again on next use.
+
+        :param wait: bool wait for the calls in progress.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+async def read_body(req):
+    """Read the body of a request, the stream of the ASGI requests is read
+    asynchronously and the one of the WSGI requests synchronously.
+
+    :param req: the falcon request.
+    :return: bytes the body.
+    """
+    body = req.stream.read()
+    if asyncio.iscoroutine(body):
+        body = await body
+    return body
+
+
+offloader = Offloader()  # pylint: disable=invalid-name
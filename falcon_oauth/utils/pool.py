@@ -0,0 +1,113 @@
+"""
+connection pool keeping metrics on its connections, to size the pools
+"""
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics(object):
+
+    """
+    Counters of a connection pool: connections opened, checkouts, checkins,
+    checkout timeouts and the time spent waiting for a connection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        """Record the time a checkout waited for a connection.
+
+        :param seconds: float the time waited.
+        :param timed_out: bool if no connection was given in time.
+        """
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def record_connect(self):
+        """Record a new connection to the database."""
+        with self._lock:
+            self.connects += 1
+
+    def record_checkin(self):
+        """Record a connection given back to the pool."""
+        with self._lock:
+            self.checkins += 1
+
+    def as_dict(self):
+        """Get the counters.
+
+        :return: dict of the counters.
+        """
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'timeouts': self.timeouts,
+                'wait_total': self.wait_total,
+                'wait_max': self.wait_max,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+
+    """
+    A QueuePool recording its activity in a PoolMetrics, shared by the pools
+    recreated from it.
+    """
+
+    def __init__(self, creator, metrics=None, **kwargs):
+        self.metrics = metrics or PoolMetrics()
+        super(MeteredQueuePool, self).__init__(creator, **kwargs)
+
+    def recreate(self):
+        pool = super(MeteredQueuePool, self).recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            connection = super(MeteredQueuePool, self)._do_get()
+        except Exception:
+            self.metrics.record_wait(time.monotonic() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.monotonic() - start)
+        return connection
+
+    def _do_return_conn(self, conn):
+        self.metrics.record_checkin()
+        super(MeteredQueuePool, self)._do_return_conn(conn)
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+        return super(MeteredQueuePool, self)._create_connection()
+
+    def status_dict(self):
+        """Get the state of the pool and its metrics.
+
+        :return: dict the number of connections checked in, checked out, in
+            overflow, the pool size and the metrics.
+        """
+        status = {
+            'size': self.size(),
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': self.overflow(),
+        }
+        status.update(self.metrics.as_dict())
+        return status
@@ -0,0 +1,298 @@
+"""
+cache of the validated bearer tokens shared by the processes of a host, in a
+memory mapped file, so that the pre-forked workers of a server warm a single
+cache instead of one each
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+SharedBearerToken = namedtuple(  # pylint: disable=invalid-name
+    'SharedBearerToken', ['expires_at', 'scopes', 'user_id', 'application_id', 'client_id'])
+
+MAGIC = b'FOTC0002'
+# magic, slots, generation
+HEADER = struct.Struct('<8sQQ')
+HEADER_SIZE = 64
+GENERATION_OFFSET = 16
+# sequence, digest, expires_at, stale_at, user_id, application_id, generation,
+# client_id, scopes
+SLOT = struct.Struct('<Q16sddqqQ104s256s')
+SEQUENCE = struct.Struct('<Q')
+COUNTER = struct.Struct('<Q')
+# the invalidations of the tokens of each home slot, after the slots
+INVALIDATIONS = struct.Struct('<Q')
+DIGEST_SIZE = 16
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+NO_USER = -1
+# the attempts of a read racing with writes of its slot before a miss
+READ_RETRIES = 4
+
+
+def _digest(access_token):
+    return hashlib.blake2b(access_token.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+class SharedTokenCache(object):
+
+    """
+    Fixed size open addressing table of the bearer tokens, by digest of the
+    access token, mapped in memory by every process of the host using the
+    same file. A slot holds the expiry of the token, the ids of its user and
+    application, its client_id and its scopes, the columns needed to validate
+    the token without the database.
+
+    The reads take no lock: each slot has a sequence number, odd while the
+    slot is written, and a read is only used if the sequence was even and did
+    not change while the slot was copied. The writes are serialized by a lock
+    of the file. A generation counter in the header invalidates every entry at
+    once, the entries of an older generation are misses.
+
+    An invalidation racing with the database read of a token must not be
+    undone by the write of the token read before it: each home slot counts
+    the invalidations of its tokens, the version of a token taken before the
+    read is given to `set`, which skips the write if the token was
+    invalidated since.
+
+    The scopes are kept as saved in the column, not as a mask: the bits of the
+    scope registry are given by each process. The tokens whose scopes or
+    client_id do not fit in their slot are not cached.
+    """
+
+    def __init__(self, path, slots=16384, ttl=60, probes=8, timer=time.time):  # pylint: disable=too-many-arguments
+        """
+        :param path: str the file of the cache, the same for the processes
+            sharing it, on a tmpfs preferably as /dev/shm.
+        :param slots: int the number of slots of the table, 432 bytes each.
+        :param ttl: int seconds an entry lives at most, entries never outlive
+            the token expiry.
+        :param probes: int the slots looked at for a token, from the slot of
+            its digest.
+        :param timer: function giving the epoch, it must be the same clock
+            for all the processes.
+        """
+        if slots <= 0:
+            raise ValueError('slots must be a positive integer')
+        self.path = path
+        self.slots = slots
+        self.ttl = ttl
+        self.probes = min(probes, slots)
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._invalidations_offset = HEADER_SIZE + slots * SLOT.size
+        size = self._invalidations_offset + slots * INVALIDATIONS.size
+        with self._file_lock():
+            magic, file_slots, _ = self._read_header()
+            if magic != MAGIC:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, slots, 0), 0)
+        if magic == MAGIC and file_slots != slots:
+            os.close(self._fd)
+            raise ValueError('{} has {} slots, not {}'.format(path, file_slots, slots))
+        self._map = mmap.mmap(self._fd, size)
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.oversized = 0
+        self.invalidated = 0
+
+    def _read_header(self):
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) < HEADER.size:
+            return None, 0, 0
+        return HEADER.unpack(header)
+
+    @contextmanager
+    def _file_lock(self):
+        # the lock of the file serializes the processes, not their threads
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def generation(self):
+        """The current generation of the entries."""
+        return COUNTER.unpack_from(self._map, GENERATION_OFFSET)[0]
+
+    def _home(self, digest):
+        return int.from_bytes(digest[:8], 'little') % self.slots
+
+    def _offsets(self, digest):
+        index = self._home(digest)
+        for probe in range(self.probes):
+            yield HEADER_SIZE + (index + probe) % self.slots * SLOT.size
+
+    def _invalidations(self, digest):
+        offset = self._invalidations_offset + self._home(digest) * INVALIDATIONS.size
+        return offset, INVALIDATIONS.unpack_from(self._map, offset)[0]
+
+    def _read_slot(self, offset):
+        """Get the fields of a slot, or None if it is being written."""
+        for _ in range(READ_RETRIES):
+            sequence = SEQUENCE.unpack_from(self._map, offset)[0]
+            if sequence & 1:
+                continue
+            fields = SLOT.unpack_from(self._map, offset)
+            # the copy is consistent if no write started or ended during it
+            if SEQUENCE.unpack_from(self._map, offset)[0] == sequence == fields[0]:
+                return fields
+        return None
+
+    def get(self, access_token):
+        """Get the cached validation of a bearer token, without lock.
+
+        :param access_token: str The access token.
+        :return: SharedBearerToken or None when not cached.
+        """
+        digest = _digest(access_token)
+        for offset in self._offsets(digest):
+            if self._map[offset + 8:offset + 8 + DIGEST_SIZE] != digest:
+                continue
+            fields = self._read_slot(offset)
+            if fields is None or fields[1] != digest:
+                break
+            (_, _, expires_at, stale_at, user_id, application_id, generation,
+             client_id, scopes) = fields
+            if generation != self.generation or stale_at <= self._timer():
+                break
+            self.hits += 1
+            return SharedBearerToken(
+                expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+                scopes=scopes.rstrip(b'\0').decode('utf-8'),
+                user_id=user_id if user_id != NO_USER else None,
+                application_id=application_id,
+                client_id=client_id.rstrip(b'\0').decode('utf-8'))
+        self.misses += 1
+        return None
+
+    def version(self, access_token):
+        """Get the version of the entry of a token, to take before reading
+        the token from the database and to give to `set`.
+
+        :param access_token: str The access token.
+        :return: tuple the generation and the invalidations of the token.
+        """
+        return self.generation, self._invalidations(_digest(access_token))[1]
+
+    def set(self, access_token, bearer_token, version=None):  # pylint: disable=too-many-locals
+        """Cache a validated bearer token until it expires, at most ttl
+        seconds.
+
+        :param access_token: str The access token.
+        :param bearer_token: Object the bearer token returned by the store.
+        :param version: tuple the version of the token taken before it was
+            read, see `version`. The token is not cached if it was
+            invalidated since, its row may be older than the invalidation.
+        """
+        scopes = (bearer_token.scopes or '').encode('utf-8')
+        client_id = bearer_token.application.client_id.encode('utf-8')
+        if len(scopes) > 256 or len(client_id) > 104:
+            self.oversized += 1
+            return
+        now = self._timer()
+        expires_at = bearer_token.expires_at.timestamp()
+        stale_at = min(expires_at, now + self.ttl)
+        if stale_at <= now:
+            self.invalidate(access_token)
+            return
+        user_id = bearer_token.user_id if bearer_token.user_id is not None else NO_USER
+        digest = _digest(access_token)
+
+        with self._file_lock():
+            generation = self.generation
+            if version is not None and version != (generation,
+                                                   self._invalidations(digest)[1]):
+                self.invalidated += 1
+                return
+            target = victim = None
+            victim_stale_at = None
+            for offset in self._offsets(digest):
+                _, slot_digest, _, slot_stale_at, _, _, slot_generation, _, _ = \
+                    SLOT.unpack_from(self._map, offset)
+                if slot_digest == digest:
+                    target = offset
+                    break
+                if target is None and (slot_digest == EMPTY_DIGEST or slot_stale_at <= now or
+                                       slot_generation != generation):
+                    target = offset
+                elif victim_stale_at is None or slot_stale_at < victim_stale_at:
+                    victim, victim_stale_at = offset, slot_stale_at
+            if target is None:
+                target = victim
+                self.evictions += 1
+            self._write_slot(target, digest, expires_at, stale_at, user_id,
+                             bearer_token.application_id, generation, client_id, scopes)
+        self.sets += 1
+
+    def _write_slot(self, offset, *fields):
+        sequence = SEQUENCE.unpack_from(self._map, offset)[0]
+        SEQUENCE.pack_into(self._map, offset, sequence + 1)
+        SLOT.pack_into(self._map, offset, sequence + 1, *fields)
+        SEQUENCE.pack_into(self._map, offset, sequence + 2)
+
+    def invalidate(self, access_token):
+        """Remove a bearer token from the cache of every process, if present.
+
+        :param access_token: str The access token.
+        """
+        digest = _digest(access_token)
+        with self._file_lock():
+            # the token may be in flight in another process, not cached yet
+            counter, invalidations = self._invalidations(digest)
+            INVALIDATIONS.pack_into(self._map, counter, invalidations + 1)
+            for offset in self._offsets(digest):
+                if self._map[offset + 8:offset + 8 + DIGEST_SIZE] == digest:
+                    self._write_slot(offset, EMPTY_DIGEST, 0, 0, NO_USER, 0, 0, b'', b'')
+
+    def invalidate_all(self):
+        """Invalidate every entry of every process at once, by starting a new
+        generation. The slots of the older generations are reused.
+        """
+        with self._file_lock():
+            COUNTER.pack_into(self._map, GENERATION_OFFSET, self.generation + 1)
+
+    def stats(self):
+        """Get the counters of this process and the size of the cache, the
+        size is computed from the slots.
+
+        :return: dict of hits, misses, sets, evictions, tokens too large to
+            be cached, sets skipped for an invalidation since their version,
+            the live entries, the slots and the generation.
+        """
+        now = self._timer()
+        generation = self.generation
+        size = 0
+        for index in range(self.slots):
+            _, digest, _, stale_at, _, _, slot_generation, _, _ = SLOT.unpack_from(
+                self._map, HEADER_SIZE + index * SLOT.size)
+            if digest != EMPTY_DIGEST and stale_at > now and slot_generation == generation:
+                size += 1
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'sets': self.sets,
+            'evictions': self.evictions,
+            'oversized': self.oversized,
+            'invalidated': self.invalidated,
+            'size': size,
+            'slots': self.slots,
+            'generation': generation,
+        }
+
+    def close(self):
+        """Unmap the file, it is kept for the other processes."""
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,187 @@
+"""
+coalescing of the concurrent calls of a same lookup, so that a burst of
+requests carrying the same token makes a single database query
+"""
+import asyncio
+import logging
+import threading
+
+DEFAULT_TIMEOUT = 5  # seconds
+
+# the result of the leader when its call failed
+_FAILED = object()
+
+
+def _share(value, share):
+    """Get the value for the waiters from the result of the leader, or
+    _FAILED if the share function failed: the waiters then run their own
+    call while the leader keeps its result.
+    """
+    if share is None:
+        return value
+    try:
+        return share(value)
+    except Exception:  # pylint: disable=broad-except
+        logging.getLogger(__name__).exception('the result of a call could not be shared')
+        return _FAILED
+
+
+class _Call(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = 0
+        self.shared = _FAILED
+
+
+class SingleFlight(object):
+
+    """
+    Run a function once for the concurrent callers of a same key, in
+    threads. The first caller, the leader, runs the function, the others
+    wait for its result up to timeout seconds and run the function
+    themselves if it did not come or if the leader failed.
+
+    The value returned to the waiters is the one of the share function,
+    given the result of the leader: the instances of a SQLAlchemy session
+    must not be used by the other threads.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        """
+        :param timeout: float seconds a caller waits for the leader.
+        """
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key, func, share=None):
+        """Call func, or wait for the call in flight of the key.
+
+        :param key: the key of the lookup.
+        :param func: function without arguments.
+        :param share: function giving the value for the waiters from the
+            result of func, the result itself by default.
+        :return: tuple of the value and a bool, True if the value was
+            shared by another thread.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            if call.event.wait(self.timeout):
+                if call.shared is not _FAILED:
+                    return call.shared, True
+            else:
+                with self._lock:
+                    self.timeouts += 1
+            return func(), False
+
+        try:
+            value = func()
+        except BaseException:
+            self._done(key, call)
+            raise
+        # a caller coming after the removal of the call runs its own
+        self._done(key, call, value, share)
+        return value, False
+
+    def _done(self, key, call, value=_FAILED, share=None):
+        with self._lock:
+            del self._calls[key]
+            waiters = call.waiters
+        try:
+            if waiters and value is not _FAILED:
+                call.shared = _share(value, share)
+        finally:
+            call.event.set()
+
+    def stats(self):
+        """Get the counters of the calls.
+
+        :return: dict of the calls, the calls coalesced, the waits timed out
+            and the calls in flight.
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'in_flight': len(self._calls),
+            }
+
+
+class AsyncSingleFlight(object):
+
+    """
+    Run a coroutine function once for the concurrent tasks of a same key, in
+    an event loop. The tasks waiting for the leader more than timeout
+    seconds, or whose leader failed, run the function themselves.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        """
+        :param timeout: float seconds a task waits for the leader.
+        """
+        self.timeout = timeout
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key, func, *args, share=None):
+        """Await func, or the call in flight of the key.
+
+        :param key: the key of the lookup.
+        :param func: coroutine function.
+        :param args: the arguments of func.
+        :param share: function giving the value for the waiters from the
+            result of func, the result itself by default.
+        :return: tuple of the value and a bool, True if the value was
+            shared by another task.
+        """
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                value = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+            else:
+                if value is not _FAILED:
+                    return value, True
+            return await func(*args), False
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        value = _FAILED
+        try:
+            value = await func(*args)
+        finally:
+            del self._calls[key]
+            future.set_result(_share(value, share) if value is not _FAILED else _FAILED)
+        return value, False
+
+    def stats(self):
+        """Get the counters of the calls.
+
+        :return: dict of the calls, the calls coalesced, the waits timed out
+            and the calls in flight.
+        """
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'timeouts': self.timeouts,
+            'in_flight': len(self._calls),
+        }
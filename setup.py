@@ -77,5 +77,8 @@ setup(name='falcon-oauth',
     install_requires=['oauthlib', 'alembic', 'psycopg2', 'falcon'],
     tests_require=['pytest-cov', 'pylint', 'webtest', 'factory-boy'],
     cmdclass={'test': PyTest, 'pylint': Pylint},
+    entry_points={
+        'console_scripts': ['falcon-oauth-reaper=falcon_oauth.oauth2.reaper:main'],
+    },
     include_package_data=True,
     zip_safe=False)
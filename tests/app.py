@@ -1,7 +1,7 @@
 import json
 import falcon
 
-from falcon_oauth.oauth2.views import Authorization, Token
+from falcon_oauth.oauth2.views import Authorization, Introspection, Revocation, Token
 from falcon_oauth.oauth2.decorators import provider
 
 application = api = falcon.API()  # pylint: disable=invalid-name
@@ -14,6 +14,14 @@ token_view = Token()  # pylint: disable=invalid-name
 TOKEN_URI = '/oauth2/token/'
 api.add_route(TOKEN_URI, token_view)
 
+introspection_view = Introspection()  # pylint: disable=invalid-name
+INTROSPECTION_URI = '/oauth2/introspect/'
+api.add_route(INTROSPECTION_URI, introspection_view)
+
+revocation_view = Revocation()  # pylint: disable=invalid-name
+REVOCATION_URI = '/oauth2/revoke/'
+api.add_route(REVOCATION_URI, revocation_view)
+
 
 def _post_scopes(req):
     import logging
@@ -6,8 +6,9 @@ import string
 import pytest
 import factory
 import factory.alchemy
+from sqlalchemy import event
 from falcon_oauth.oauth2.models import Application, User, AuthorizationCode, BearerToken
-from falcon_oauth.utils.database import Session
+from falcon_oauth.utils.database import Session, get_engine
 
 from webtest import TestApp
 from .app import api
@@ -93,6 +94,22 @@ def clear_database():
     return clear
 
 
+@pytest.fixture
+def committed_database(clear_database):
+    """
+    for the tests of code running its own transactions, or in other threads,
+    which needs the rows of the test committed: the database is cleared
+    before and after the test
+    """
+    # the session of the other tests is never committed, do not commit it here
+    Session.rollback()  # pylint: disable=no-member
+    clear_database()
+    yield
+    Session.rollback()  # pylint: disable=no-member
+    clear_database()
+    Session.commit()  # pylint: disable=no-member
+
+
 @pytest.fixture
 def model_factory():
 
@@ -173,3 +190,29 @@ class TestOAuthApp(TestApp):  # pylint: disable=too-few-public-methods,too-many-
 @pytest.fixture
 def webtest_app():
     return TestOAuthApp(api)
+
+
+@pytest.fixture
+def query_counter():
+    """
+    counts the statements sent to the database while the counter is used
+    as a context manager
+    """
+
+    class QueryCounter(object):
+
+        def __init__(self):
+            self.count = 0
+
+        def _count(self, *args, **kwargs):  # pylint: disable=unused-argument
+            self.count += 1
+
+        def __enter__(self):
+            self.count = 0
+            event.listen(get_engine(), 'before_cursor_execute', self._count)
+            return self
+
+        def __exit__(self, *args):
+            event.remove(get_engine(), 'before_cursor_execute', self._count)
+
+    return QueryCounter()
@@ -0,0 +1,101 @@
+# pylint: disable=missing-docstring,redefined-outer-name
+import json
+import falcon
+import pytest
+from falcon_oauth.middleware import OAuth2Middleware
+from falcon_oauth.middleware.oauth2 import DENY, compile_policies
+from falcon_oauth.oauth2.scopes import compile_scopes
+from tests.conftest import TestOAuthApp
+
+
+class Items(object):
+
+    def on_get(self, req, resp):
+        resp.body = json.dumps({'client': req.client.client_id, 'scopes': req.scopes})
+
+    def on_post(self, req, resp):
+        resp.body = '{}'
+
+    def on_delete(self, req, resp):
+        resp.body = '{}'
+
+
+class Item(object):  # pylint: disable=too-few-public-methods
+
+    def on_get(self, req, resp, item_id):
+        resp.body = json.dumps({'item': item_id})
+
+
+class Health(object):  # pylint: disable=too-few-public-methods
+
+    def on_get(self, req, resp):
+        resp.body = '{}'
+
+
+def _item_scopes(req):
+    return ['admin'] if req.get_param('all') else ['items:read']
+
+
+@pytest.fixture
+def oauth2_app():
+    middleware = OAuth2Middleware({
+        '/items': {'GET': ['items:read'], 'POST': 'items:write'},
+        '/items/{item_id}': _item_scopes,
+        '/health': None,
+    })
+    api = falcon.API(middleware=[middleware])
+    api.add_route('/items', Items())
+    api.add_route('/items/{item_id}', Item())
+    api.add_route('/health', Health())
+    return TestOAuthApp(api)
+
+
+def test_compile_policies():
+    routes = compile_policies({'/items': {'get': ['read'], '*': 'write'}, '/health': None})
+
+    assert routes['/items']['GET'].scopes == ['read']
+    assert routes['/items']['GET'].policy is compile_scopes(['read'])
+    assert routes['/items']['*'].scopes == ['write']
+    assert routes['/health']['*'] is None
+
+
+def test_compile_policies_denies_the_other_methods():
+    routes = compile_policies({'/items': {'GET': ['read']}, '/health': {'GET': None}})
+
+    assert routes['/items']['*'] is DENY
+    assert routes['/health']['GET'] is None
+    assert routes['/health']['*'] is DENY
+
+
+def test_static_policy(oauth2_app, clear_database):
+    clear_database()
+    oauth2_app.authenticate(scopes='items:read')
+
+    resp = oauth2_app.get('/items', status=200)
+
+    assert json.loads(resp.body.decode('utf-8')) == {
+        'client': oauth2_app.application.client_id, 'scopes': ['items:read']}
+    resp = oauth2_app.post('/items', status=403)
+    assert resp.body == b'{"error": "forbidden"}'
+
+
+def test_dynamic_policy(oauth2_app, clear_database):
+    clear_database()
+    oauth2_app.authenticate(scopes='items:read')
+
+    oauth2_app.get('/items/1', status=200)
+    oauth2_app.get('/items/1', {'all': 'true'}, status=403)
+
+
+def test_method_not_in_the_map_is_denied(oauth2_app, clear_database):
+    clear_database()
+    oauth2_app.authenticate(scopes='items:read,items:write')
+
+    resp = oauth2_app.delete('/items', status=403)
+
+    assert resp.body == b'{"error": "forbidden"}'
+
+
+def test_public_route(oauth2_app):
+    oauth2_app.get('/health', status=200)
+    oauth2_app.get('/items', status=403)
@@ -0,0 +1,87 @@
+# pylint: disable=missing-docstring
+import json
+import falcon
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from webtest import TestApp
+from falcon_oauth.middleware import SessionMiddleware
+from falcon_oauth.middleware.session import _count_query
+from falcon_oauth.oauth2.models import User
+from falcon_oauth.utils import database
+from falcon_oauth.utils.database import Session
+
+
+class CountUsers(object):  # pylint: disable=too-few-public-methods
+
+    def on_get(self, req, resp):
+        if req.get_param('fail'):
+            raise falcon.HTTPInternalServerError('failure', 'failure')
+        count = User.query.count()
+        resp.body = json.dumps({'count': count})
+
+
+class NoDatabase(object):  # pylint: disable=too-few-public-methods
+
+    def on_get(self, req, resp):
+        resp.body = '{}'
+
+
+@pytest.fixture
+def middleware():
+    # the session of the other tests is never committed, do not commit it here
+    Session.rollback()  # pylint: disable=no-member
+    yield SessionMiddleware()
+    Session.remove()
+
+
+@pytest.fixture
+def session_app(middleware):
+    api = falcon.API(middleware=[middleware])
+    api.add_route('/users', CountUsers())
+    api.add_route('/nothing', NoDatabase())
+    return TestApp(api)
+
+
+def test_session_is_removed(session_app):
+    session_app.get('/users', status=200)
+
+    assert not Session.registry.has()
+
+
+def test_session_is_removed_on_error(session_app):
+    session_app.get('/users', {'fail': '1'}, status=500)
+
+    assert not Session.registry.has()
+
+
+def test_session_is_opened_lazily(session_app):
+    Session.remove()
+    session_app.get('/nothing', status=200)
+
+    assert not Session.registry.has()
+
+
+def test_queries_are_counted(session_app, middleware):
+    session_app.get('/users', status=200)
+
+    assert middleware.query_count() == 1
+
+
+def test_queries_are_counted_on_new_engines(session_app, middleware):
+    settings = dict(database._engine_settings)  # pylint: disable=protected-access
+    database.configure(pool_size=2)
+    try:
+        session_app.get('/users', status=200)
+    finally:
+        database.configure(**settings)
+
+    assert middleware.query_count() == 1
+
+
+def test_queries_are_counted_once(session_app, middleware):
+    other = SessionMiddleware()
+    session_app.get('/users', status=200)
+
+    assert middleware.query_count() == other.query_count() == 1
+    assert event.contains(Engine, 'before_cursor_execute', _count_query)
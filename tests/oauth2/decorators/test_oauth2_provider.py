@@ -1,5 +1,10 @@
 import json
+import falcon
+from falcon_oauth.oauth2.decorators import provider
+from falcon_oauth.oauth2.scopes import AllOf, AnyOf
+from falcon_oauth.oauth2.validators import server
 from tests.app import PROTECTED_ENDPOINT_URI
+from tests.conftest import TestOAuthApp
 
 
 def test_no_access_without_auth(webtest_app):
@@ -64,3 +69,47 @@ def test_access_with_good_ip(webtest_app, clear_database, model_factory):
     assert resp_dict['client'] == webtest_app.application.client_id
     assert resp_dict['user'] == webtest_app.user.id
     assert resp_dict['scopes'] == [scope]
+
+
+def test_bearer_header_is_validated_without_oauthlib_request(webtest_app, clear_database,
+                                                              monkeypatch):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+
+    def verify_request(*args, **kwargs):
+        raise AssertionError('the request should not be verified by oauthlib')
+
+    monkeypatch.setattr(server, 'verify_request', verify_request)
+    resp = webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    assert json.loads(resp.body.decode('utf-8'))['user'] == webtest_app.user.id
+
+
+def test_access_token_in_query_string(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    del webtest_app.auth_headers['Authorization']
+
+    resp = webtest_app.get(PROTECTED_ENDPOINT_URI,
+                           {'access_token': webtest_app.token.access_token}, status=200)
+
+    assert json.loads(resp.body.decode('utf-8'))['user'] == webtest_app.user.id
+
+
+class BillingEndpoint(object):  # pylint: disable=too-few-public-methods
+
+    @provider.protected_resource_view(scopes=AllOf('billing:read', AnyOf('users:read', 'admin')))
+    def on_get(self, req, resp):
+        resp.body = '{}'
+
+
+def test_scope_policy(clear_database):
+    api = falcon.API()
+    api.add_route('/billing', BillingEndpoint())
+    app = TestOAuthApp(api)
+    clear_database()
+
+    app.authenticate(scopes='billing:*,admin')
+    app.get('/billing', status=200)
+    app.authenticate(scopes='billing:read')
+    app.get('/billing', status=403)
@@ -0,0 +1,110 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the key-value store against a stand-in of a Redis client
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from falcon_oauth.oauth2.stores import KeyValueTokenStore
+
+
+class FakeRedis(object):
+
+    """the subset of redis.Redis used by the store, the expiries are kept
+    and not applied"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiries = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode('utf-8')
+        self.expiries[key] = ex
+
+    def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+def _in(seconds):
+    return datetime.now(tz=timezone.utc) + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def store(redis):
+    kv_store = KeyValueTokenStore(redis, refresh_token_ttl=600)
+    kv_store.save_user(id=1, username='user')
+    kv_store.save_client(id=2, client_id='client', user_id=1, scopes='default_scope')
+    return kv_store
+
+
+def test_clients_and_users(store, redis):
+    client = store.get_client('client')
+
+    assert client.id == 2
+    assert client.user.username == 'user'
+    assert store.get_client('unknown') is None
+    assert redis.expiries['falcon_oauth:client:client'] is None
+
+
+def test_authorization_code_is_consumed_once(store, redis):
+    client = store.get_client('client')
+    expires_at = _in(60)
+    store.save_authorization_code(client, 'code', 'default_scope', 1, expires_at)
+
+    assert 0 < redis.expiries['falcon_oauth:code:2:code'] <= 60
+    authorization_code = store.get_authorization_code(client, 'code')
+    assert authorization_code.user.id == 1
+    assert abs(authorization_code.expires_at - expires_at) < timedelta(milliseconds=1)
+    assert store.consume_authorization_code(client, 'code').code == 'code'
+    assert store.consume_authorization_code(client, 'code') is None
+
+
+def test_bearer_token(store, redis):
+    client = store.get_client('client')
+    store.save_bearer_token(client, store.get_user(1), 'default_scope', 'access', 'refresh',
+                            _in(60))
+
+    assert redis.expiries['falcon_oauth:refresh:refresh'] == 600
+    bearer_token = store.get_bearer_token(access_token='access')
+    assert bearer_token.client_id == 'client'
+    assert bearer_token.user.id == 1
+    assert store.get_bearer_token(refresh_token='refresh').access_token == 'access'
+
+    store.revoke_bearer_token(bearer_token)
+    assert store.get_bearer_token(access_token='access') is None
+    assert store.get_bearer_token(refresh_token='refresh') is None
+
+
+def test_expired_codes_are_not_saved(store):
+    client = store.get_client('client')
+    store.save_authorization_code(client, 'code', 'default_scope', 1, _in(-1))
+
+    assert store.get_authorization_code(client, 'code') is None
+    assert store.purge_expired(datetime.now(tz=timezone.utc)) == (0, 0)
+
+
+def test_rotate_bearer_token(store, redis):
+    store.refresh_token_reuse_grace = 10
+    client = store.get_client('client')
+    store.save_bearer_token(client, None, 'default_scope', 'access', 'refresh', _in(60))
+    bearer_token = store.get_bearer_token(refresh_token='refresh')
+
+    rotated = store.rotate_bearer_token(bearer_token, 'default_scope', 'access2', 'refresh2',
+                                        _in(60))
+
+    assert rotated.access_token == 'access2'
+    assert store.get_bearer_token(access_token='access') is None
+    # the previous refresh token finds the rotated token during the grace
+    assert store.get_bearer_token(refresh_token='refresh').refresh_token == 'refresh2'
+    assert redis.expiries['falcon_oauth:refresh:refresh'] == 10
+    # a concurrent rotation of the same token
+    redis.delete('falcon_oauth:refresh:refresh')
+    assert store.rotate_bearer_token(bearer_token, 'default_scope', 'access3', 'refresh3',
+                                     _in(60)) is None
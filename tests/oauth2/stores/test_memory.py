@@ -0,0 +1,141 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the in-memory store
+"""
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from falcon_oauth.oauth2.stores import MemoryTokenStore, SQLTokenStore
+from falcon_oauth.oauth2.validators.oauth2_request_validator import validator
+from falcon_oauth.utils.cache import TTLCache
+from falcon_oauth.utils.database import Session
+from tests.app import PROTECTED_ENDPOINT_URI, TOKEN_URI
+
+
+def _in(seconds):
+    return datetime.now(tz=timezone.utc) + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def store():
+    memory_store = MemoryTokenStore()
+    memory_store.save_user(id=1, username='user')
+    memory_store.save_client(client_id='client', user_id=1, grant_type='client_credentials',
+                             scopes='default_scope,default_get', default_scopes='default_get',
+                             redirect_uris='http://test.url/auth',
+                             default_redirect_uri='http://test.url/auth')
+    return memory_store
+
+
+@pytest.fixture
+def use_store(monkeypatch, store):
+    monkeypatch.setattr(validator, 'store', store)
+    monkeypatch.setattr(validator, 'client_cache', TTLCache())
+    monkeypatch.setattr(validator, 'negative_cache', TTLCache())
+
+
+def test_clients_and_users(store):
+    client = store.get_client('client')
+
+    assert client.user.username == 'user'
+    assert store.get_client('unknown') is None
+    assert store.get_user(1).id == 1
+
+
+def test_authorization_code_is_consumed_once(store):
+    client = store.get_client('client')
+    store.save_authorization_code(client, 'code', 'default_scope', 1, _in(60))
+
+    assert store.get_authorization_code(client, 'code').user.id == 1
+    assert store.consume_authorization_code(client, 'code').code == 'code'
+    assert store.consume_authorization_code(client, 'code') is None
+
+
+def test_bearer_token(store):
+    client = store.get_client('client')
+    store.save_bearer_token(client, store.get_user(1), 'default_scope', 'access', 'refresh',
+                            _in(60))
+
+    bearer_token = store.get_bearer_token(access_token='access')
+    assert bearer_token.client_id == 'client'
+    assert bearer_token.user.id == 1
+    assert store.get_bearer_token(refresh_token='refresh').access_token == 'access'
+
+    store.revoke_bearer_token(bearer_token)
+    assert store.get_bearer_token(access_token='access') is None
+    assert store.get_bearer_token(refresh_token='refresh') is None
+
+
+def test_expired_tokens(store):
+    client = store.get_client('client')
+    store.save_authorization_code(client, 'code', 'default_scope', 1, _in(-1))
+    store.save_bearer_token(client, None, 'default_scope', 'access', 'refresh', _in(-1))
+
+    assert store.get_authorization_code(client, 'code') is None
+    assert store.get_bearer_token(access_token='access') is None
+    # the refresh token outlives its access token
+    assert store.get_bearer_token(refresh_token='refresh') is not None
+    store.save_bearer_token(client, None, 'default_scope', 'access2', None, _in(-1))
+    assert store.purge_expired(datetime.now(tz=timezone.utc)) == (1, 1)
+    # the refresh token is kept for the refresh grant
+    assert store.get_bearer_token(refresh_token='refresh') is not None
+    assert store.purge_expired(datetime.now(tz=timezone.utc), refresh_token_grace=0) == (0, 1)
+    assert store.get_bearer_token(refresh_token='refresh') is None
+
+
+def test_token_flow_without_database(webtest_app, use_store, query_counter):  # pylint: disable=unused-argument
+    Session.rollback()  # pylint: disable=no-member
+    with query_counter:
+        resp = webtest_app.post(TOKEN_URI, {'grant_type': 'client_credentials',
+                                            'client_id': 'client'}, status=200)
+        access_token = json.loads(resp.body.decode('utf-8'))['access_token']
+        resp = webtest_app.get(PROTECTED_ENDPOINT_URI, status=200, headers={
+            'Authorization': 'Bearer {}'.format(access_token)})
+
+    assert query_counter.count == 0
+    resp_dict = json.loads(resp.body.decode('utf-8'))
+    assert resp_dict['client'] == 'client'
+    assert resp_dict['user'] == 1
+
+
+def test_clients_in_another_store(clear_database, model_factory):
+    clear_database()
+    app = model_factory.save_application()
+    Session.flush()  # pylint: disable=no-member
+    store = MemoryTokenStore(client_store=SQLTokenStore())
+
+    client = store.get_client(app.client_id)
+    store.save_bearer_token(client, client.user, 'default_scope', 'access', None, _in(60))
+
+    bearer_token = store.get_bearer_token(access_token='access')
+    assert bearer_token.application.id == app.id
+    assert bearer_token.user.id == app.user_id
+
+
+def test_rotate_bearer_token(store):
+    client = store.get_client('client')
+    store.save_bearer_token(client, None, 'default_scope', 'access', 'refresh', _in(60))
+    bearer_token = store.get_bearer_token(refresh_token='refresh')
+
+    rotated = store.rotate_bearer_token(bearer_token, 'default_scope', 'access2', 'refresh2',
+                                        _in(60))
+
+    assert rotated.id == bearer_token.id
+    assert store.get_bearer_token(access_token='access') is None
+    assert store.get_bearer_token(refresh_token='refresh') is None
+    assert store.get_bearer_token(refresh_token='refresh2').access_token == 'access2'
+    # a concurrent rotation of the same token
+    assert store.rotate_bearer_token(bearer_token, 'default_scope', 'access3', 'refresh3',
+                                     _in(60)) is None
+
+
+def test_refresh_token_reuse_grace(store):
+    store.refresh_token_reuse_grace = timedelta(seconds=10)
+    client = store.get_client('client')
+    store.save_bearer_token(client, None, 'default_scope', 'access', 'refresh', _in(60))
+    store.rotate_bearer_token(store.get_bearer_token(refresh_token='refresh'),
+                              'default_scope', 'access2', 'refresh2', _in(60))
+
+    assert store.get_bearer_token(refresh_token='refresh').refresh_token == 'refresh2'
+    assert store.purge_expired(_in(10)) == (0, 0)
+    assert store.get_bearer_token(refresh_token='refresh') is None
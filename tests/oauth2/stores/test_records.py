@@ -0,0 +1,85 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the lean read path of the SQL store
+"""
+import json
+import pytest
+from falcon_oauth.oauth2.stores import SQLTokenStore
+from falcon_oauth.oauth2.stores.records import (BearerTokenRecord, ClientRecord, UserRecord,
+                                                select_bearer_token, select_client)
+from falcon_oauth.oauth2.validators.oauth2_request_validator import validator
+from falcon_oauth.utils.cache import TTLCache
+from falcon_oauth.utils.database import Session
+from tests.app import PROTECTED_ENDPOINT_URI, TOKEN_URI
+
+
+@pytest.fixture
+def use_records(monkeypatch):
+    monkeypatch.setattr(validator, 'store', SQLTokenStore(use_records=True))
+    monkeypatch.setattr(validator, 'client_cache', TTLCache())
+    monkeypatch.setattr(validator, 'negative_cache', TTLCache())
+
+
+def test_select_client(clear_database, model_factory):
+    clear_database()
+    app = model_factory.save_application()
+    Session.flush()  # pylint: disable=no-member
+
+    client = select_client(Session, app.client_id)
+
+    assert isinstance(client, ClientRecord)
+    assert client.id == app.id
+    assert client.default_redirect_uri == app.default_redirect_uri
+    assert client.user.id == app.user_id
+    assert client.allowed_response_types == ('code', 'token')
+    assert select_client(Session, 'unknown') is None
+
+
+def test_select_bearer_token(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    Session.flush()  # pylint: disable=no-member
+
+    bearer_token = select_bearer_token(Session, webtest_app.token.access_token)
+
+    assert isinstance(bearer_token, BearerTokenRecord)
+    assert bearer_token.scopes == 'default_get'
+    assert bearer_token.user.id == webtest_app.user.id
+    assert bearer_token.client_id == webtest_app.application.client_id
+    assert not hasattr(bearer_token.user, 'password')
+    assert select_bearer_token(Session, 'unknown') is None
+
+
+def test_records_are_immutable():
+    user = UserRecord(1, 'user', None, None, 'user@test.com', False, False, True)
+
+    with pytest.raises(AttributeError):
+        user.id = 2
+    assert not hasattr(user, '__dict__')
+
+
+def test_protected_resource_with_records(webtest_app, clear_database, use_records,  # pylint: disable=unused-argument
+                                         query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    Session.flush()  # pylint: disable=no-member
+
+    with query_counter:
+        resp = webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    assert query_counter.count == 1
+    resp_dict = json.loads(resp.body.decode('utf-8'))
+    assert resp_dict['client'] == webtest_app.application.client_id
+    assert resp_dict['user'] == webtest_app.user.id
+
+
+def test_token_with_records(webtest_app, clear_database, model_factory, use_records):  # pylint: disable=unused-argument
+    clear_database()
+    user = model_factory.save_user()
+    app = model_factory.save_application(user=user)
+    Session.flush()  # pylint: disable=no-member
+
+    resp = webtest_app.post(TOKEN_URI, {'grant_type': 'client_credentials',
+                                        'client_id': app.client_id}, status=200)
+
+    assert 'access_token' in json.loads(resp.body.decode('utf-8'))
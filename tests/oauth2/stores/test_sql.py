@@ -0,0 +1,148 @@
+# pylint: disable=invalid-name,missing-docstring,unused-argument
+"""
+tests the SQL store
+"""
+import threading
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy.orm import scoped_session
+from falcon_oauth.oauth2.models import BearerToken
+from falcon_oauth.oauth2.stores import SQLTokenStore
+from falcon_oauth.utils import database
+from falcon_oauth.utils.database import Session, get_engine
+
+
+@pytest.fixture
+def authorization_code(clear_database, model_factory):
+    clear_database()
+    code = model_factory.save_authorization_code(
+        scopes='default_scope', code='testcode',
+        expires_at=datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    return code
+
+
+def test_consume_authorization_code(authorization_code):
+    store = SQLTokenStore()
+
+    consumed = store.consume_authorization_code(authorization_code.application, 'testcode')
+
+    assert consumed.id == authorization_code.id
+    assert consumed.user.id == authorization_code.user_id
+    assert store.consume_authorization_code(authorization_code.application, 'testcode') is None
+    assert store.get_authorization_code(authorization_code.application, 'testcode') is None
+
+
+def test_consume_authorization_code_without_returning(authorization_code, monkeypatch):
+    monkeypatch.setattr(get_engine().dialect, 'name', 'other')
+    store = SQLTokenStore()
+
+    consumed = store.consume_authorization_code(authorization_code.application, 'testcode')
+
+    assert consumed.id == authorization_code.id
+    assert store.consume_authorization_code(authorization_code.application, 'testcode') is None
+
+
+def test_concurrent_consumes_of_a_code(committed_database, model_factory):
+    code = model_factory.save_authorization_code(scopes='default_scope', code='testcode')
+    Session.commit()  # pylint: disable=no-member
+    # the instances of the session of the test are not shared with the threads
+    application = SimpleNamespace(id=code.application_id)
+    barrier = threading.Barrier(8)
+    consumed = []
+
+    def consume():
+        store = SQLTokenStore()
+        barrier.wait()
+        try:
+            consumed.append(store.consume_authorization_code(application, 'testcode'))
+            Session.commit()  # pylint: disable=no-member
+        finally:
+            Session.remove()
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len([code for code in consumed if code is not None]) == 1
+
+
+def test_rotate_bearer_token_once(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_scope')
+    store = SQLTokenStore()
+    bearer_token = store.get_bearer_token(refresh_token=webtest_app.token.refresh_token)
+    stale = SimpleNamespace(id=bearer_token.id, refresh_token=bearer_token.refresh_token)
+    expires_at = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+
+    assert store.rotate_bearer_token(bearer_token, 'default_scope', 'access2', 'refresh2',
+                                     expires_at) is bearer_token
+    assert bearer_token.refresh_token == 'refresh2'
+    assert store.rotate_bearer_token(stale, 'default_scope', 'access3', 'refresh3',
+                                     expires_at) is None
+
+
+def test_purge_expired_keeps_refresh_tokens(clear_database, model_factory):
+    clear_database()
+    app = model_factory.save_application()
+    expired_at = datetime.now(tz=timezone.utc) - timedelta(hours=1)
+    for access_token, refresh_token in [('access', 'refresh'), ('access2', None)]:
+        Session.add(BearerToken(  # pylint: disable=no-member
+            application=app, scopes='default_scope', access_token=access_token,
+            refresh_token=refresh_token, expires_at=expired_at))
+    Session.flush()  # pylint: disable=no-member
+    store = SQLTokenStore()
+
+    assert store.purge_expired(datetime.now(tz=timezone.utc)) == (0, 1)
+    assert store.get_bearer_token(refresh_token='refresh') is not None
+    assert store.purge_expired(datetime.now(tz=timezone.utc), refresh_token_grace=0) == (0, 1)
+    assert store.get_bearer_token(refresh_token='refresh') is None
+
+
+@pytest.fixture
+def own_session(committed_database):
+    session = scoped_session(database.session_factory)
+    yield session
+    session.rollback()
+    session.remove()
+
+
+def _own_session_token(own_session, model_factory):
+    app = model_factory.save_application()
+    Session.commit()  # pylint: disable=no-member
+    store = SQLTokenStore(session=own_session)
+    client = store.get_client(app.client_id)
+    store.save_bearer_token(client, None, 'default_scope', 'access', 'refresh',
+                            datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    own_session.flush()
+    return store
+
+
+def test_revoke_with_own_session(own_session, model_factory):
+    store = _own_session_token(own_session, model_factory)
+
+    store.revoke_bearer_token(store.get_bearer_token(access_token='access'))
+
+    assert store.get_bearer_token(access_token='access') is None
+
+
+def test_rotate_with_own_session(own_session, model_factory):
+    store = _own_session_token(own_session, model_factory)
+
+    assert store.rotate_bearer_token(store.get_bearer_token(refresh_token='refresh'),
+                                     'default_scope', 'access2', 'refresh2',
+                                     datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    assert store.get_bearer_token(refresh_token='refresh2').access_token == 'access2'
+
+
+def test_references_in_own_session(own_session, model_factory):
+    store = _own_session_token(own_session, model_factory)
+    client = store.get_client(store.get_bearer_token(access_token='access').application.client_id)
+
+    reference = store.client_reference(client.id, client.client_id)
+    assert reference in own_session
+    assert reference not in Session
+    assert store.user_reference(1) in own_session
+    assert store.cached_instance('client', store.cache_value(client)) in own_session
@@ -0,0 +1,78 @@
+# pylint: disable=invalid-name,missing-docstring,unused-argument
+"""
+tests the reaper of the expired rows, it deletes them in its own
+transactions so the rows are committed
+"""
+from datetime import datetime, timedelta, timezone
+from falcon_oauth.oauth2.models import AuthorizationCode, BearerToken
+from falcon_oauth.oauth2.reaper import Reaper, ReaperThread, main
+from falcon_oauth.utils.database import Session
+
+NOW = datetime.now(tz=timezone.utc)
+
+
+def _save_rows(model_factory, codes=(), tokens=()):
+    app = model_factory.save_application()
+    for i, expires_in in enumerate(codes):
+        Session.add(AuthorizationCode(  # pylint: disable=no-member
+            application=app, scopes='default_scope', code='code{}'.format(i),
+            expires_at=NOW + timedelta(seconds=expires_in)))
+    for i, (expires_in, refresh_token) in enumerate(tokens):
+        Session.add(BearerToken(  # pylint: disable=no-member
+            application=app, scopes='default_scope', access_token='token{}'.format(i),
+            refresh_token='refresh{}'.format(i) if refresh_token else None,
+            expires_at=NOW + timedelta(seconds=expires_in)))
+    Session.commit()  # pylint: disable=no-member
+
+
+def test_reaper_deletes_expired_rows(committed_database, model_factory):
+    _save_rows(model_factory, codes=(-10, -10, 60),
+               tokens=((-10, False), (60, False), (-10, True), (-7200, True)))
+    reaper = Reaper(batch_size=1, refresh_token_grace=3600)
+
+    assert reaper.run(now=NOW) == (2, 2)
+
+    assert AuthorizationCode.query.count() == 1
+    assert sorted(token.access_token for token in BearerToken.query) == ['token1', 'token2']
+    metrics = reaper.metrics.as_dict()
+    assert metrics['runs'] == 1
+    assert metrics['tokens_deleted'] == 2
+    # a batch of a row per row deleted, and the last empty batch of each table
+    assert metrics['last_run']['batches'] == 6
+
+
+def test_reaper_grace(committed_database, model_factory):
+    _save_rows(model_factory, codes=(-10, -120), tokens=((-10, False),))
+
+    assert Reaper(grace=60).run(now=NOW) == (1, 0)
+
+
+def test_reaper_max_batches(committed_database, model_factory):
+    _save_rows(model_factory, codes=(-10, -10, -10))
+
+    assert Reaper(batch_size=1).run(now=NOW, max_batches=2) == (2, 0)
+
+
+def test_reaper_thread(committed_database, model_factory):
+    _save_rows(model_factory, codes=(-10,))
+    thread = ReaperThread(Reaper(), interval=0.01)
+    thread.start()
+    try:
+        for _ in range(100):
+            if thread.reaper.metrics.as_dict()['codes_deleted']:
+                break
+            thread.join(0.01)
+    finally:
+        thread.stop(timeout=5)
+
+    assert not thread.is_alive()
+    assert thread.reaper.metrics.as_dict()['codes_deleted'] == 1
+
+
+def test_command(committed_database, model_factory, capsys):
+    _save_rows(model_factory, codes=(-10,), tokens=((-10, True),))
+
+    main(['--batch-size', '10', '--refresh-token-grace', '0'])
+
+    assert capsys.readouterr().out.startswith(
+        '1 authorization codes and 1 bearer tokens deleted in 2 batches')
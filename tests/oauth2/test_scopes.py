@@ -0,0 +1,108 @@
+# pylint: disable=missing-docstring
+"""
+tests the parsed scopes and redirect uris
+"""
+from collections import namedtuple
+from falcon_oauth.oauth2.scopes import (AllOf, AnyOf, ScopeRegistry, allows, client_index,
+                                        compile_scopes, implying_mask, implying_scopes, registry,
+                                        scope_mask, split_scopes, within_scopes)
+
+Client = namedtuple('Client', ['scopes', 'default_scopes', 'redirect_uris'])
+
+
+def test_registry():
+    scopes = ScopeRegistry()
+
+    assert scopes.mask(['read', 'write']) == 0b11
+    assert scopes.bit('read') == 1
+    assert scopes.names(0b10) == ['write']
+    assert len(scopes) == 2
+
+
+def test_split_scopes():
+    assert split_scopes('read, write,,') == ('read', 'write')
+    assert split_scopes('read write', ' ') == ('read', 'write')
+    assert split_scopes(None) == ()
+
+
+def test_scope_mask():
+    assert scope_mask('read,write') == registry.mask(['write', 'read'])
+    assert scope_mask('') == 0
+
+
+def test_allows_any_of_a_list():
+    assert allows('read,write', ['write', 'admin'])
+    assert not allows('read,write', ['admin'])
+    assert allows('read write', ['write'], ' ')
+    assert allows('', [])
+    assert compile_scopes(['read', 'write']) is compile_scopes(['read', 'write'])
+
+
+def test_implying_scopes():
+    assert implying_scopes('billing:invoices:read') == [
+        'billing:invoices:read', 'billing:invoices:*', 'billing:*']
+    assert implying_scopes('admin') == ['admin']
+
+
+def test_wildcard_scopes():
+    assert allows('billing:*', ['billing:read'])
+    assert allows('billing:*', ['billing:invoices:read'])
+    assert not allows('billing:read', ['billing:*'])
+    assert not allows('billing:*', ['users:read'])
+
+
+def test_all_of():
+    policy = AllOf('billing:read', 'users:read')
+
+    assert allows('billing:read,users:read', policy)
+    assert allows('billing:*,users:*', policy)
+    assert not allows('billing:read', policy)
+    assert policy.masks == (implying_mask('billing:read'), implying_mask('users:read'))
+
+
+def test_nested_policies():
+    policy = AnyOf('admin', AllOf('billing:read', AnyOf('users:read', 'users:write')))
+
+    assert allows('admin', policy)
+    assert allows('billing:read,users:write', policy)
+    assert not allows('billing:read', policy)
+    assert not allows('users:read', policy)
+    assert not allows('', AnyOf())
+    assert allows('', AllOf())
+
+
+def test_nested_policy_size():
+    scopes = [['team{}:scope{}'.format(team, index) for index in range(10)] for team in range(5)]
+    policy = AnyOf(*(AllOf(*team_scopes) for team_scopes in scopes))
+
+    # one mask per scope, not one per combination of the scopes of the teams
+    assert policy.size == 1 + 50
+    assert allows(','.join(scopes[3]), policy)
+    assert not allows(','.join(scopes[3][1:] + scopes[4][:1]), policy)
+    assert AllOf(AllOf('a', 'b'), AnyOf('c', AnyOf('d', 'e'))).size == 3
+
+
+def test_client_index():
+    client = Client(scopes='read, write', default_scopes='read',
+                    redirect_uris='http://test.url/auth, http://test.url/back')
+
+    index = client_index(client)
+
+    assert index.scopes == frozenset(['read', 'write'])
+    assert index.default_scopes == ('read',)
+    assert 'http://test.url/back' in index.redirect_uris
+    assert index.scope_mask == scope_mask('read,write')
+    # parsed once for the clients having the same columns
+    assert client_index(Client(*client)) is index
+
+
+def test_within_scopes():
+    index = client_index(Client(scopes='read,write', default_scopes='read', redirect_uris=''))
+
+    assert within_scopes(index, ['read'])
+    assert within_scopes(index, ['write', 'read'])
+    assert within_scopes(index, [])
+    assert not within_scopes(index, ['read', 'admin'])
+    assert not within_scopes(index, ['never-registered-scope'])
+    # the requested scopes are not registered
+    assert registry.known_mask(['never-registered-scope']) is None
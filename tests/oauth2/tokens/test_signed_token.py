@@ -0,0 +1,47 @@
+# pylint: disable=missing-docstring
+import pytest
+from falcon_oauth.oauth2.tokens import TokenSigner
+
+
+def test_sign_verify():
+    signer = TokenSigner({'key1': b'secret'}, 'key1')
+    token = signer.sign({'uid': 1, 'scope': 'email'})
+
+    assert TokenSigner.is_signed(token)
+    assert signer.verify(token) == {'uid': 1, 'scope': 'email'}
+
+
+def test_verify_tampered_token():
+    signer = TokenSigner({'key1': b'secret'}, 'key1')
+    header, _, signature = signer.sign({'uid': 1}).split('.')
+    forged = TokenSigner({'key1': b'other'}, 'key1').sign({'uid': 2}).split('.')[1]
+
+    assert signer.verify('.'.join([header, forged, signature])) is None
+    assert signer.verify('not.a.token') is None
+    assert signer.verify('random') is None
+
+
+def test_verify_with_unknown_key():
+    token = TokenSigner({'key2': b'secret'}, 'key2').sign({'uid': 1})
+
+    assert TokenSigner({'key1': b'secret'}, 'key1').verify(token) is None
+
+
+def test_key_rotation():
+    signer = TokenSigner({'key1': b'secret'}, 'key1')
+    old_token = signer.sign({'uid': 1})
+    signer.activate_key('key2', b'new secret')
+    new_token = signer.sign({'uid': 2})
+
+    assert signer.verify(old_token) == {'uid': 1}
+    assert signer.verify(new_token) == {'uid': 2}
+
+    signer.remove_key('key1')
+    assert signer.verify(old_token) is None
+    with pytest.raises(ValueError):
+        signer.remove_key('key2')
+
+
+def test_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        TokenSigner({'key1': b'secret'}, 'key1', algorithm='none')
@@ -0,0 +1,373 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the request validator used by the oauth2 server
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from oauthlib.common import Request
+from falcon_oauth.oauth2.stores import MemoryTokenStore
+from falcon_oauth.oauth2.tokens import TokenSigner
+from falcon_oauth.oauth2.validators.oauth2_request_validator import (validator, CachedBearerToken,
+                                                                     OAuth2RequestValidator,
+                                                                     server, use_signed_tokens)
+from falcon_oauth.utils.cache import TTLCache
+from falcon_oauth.utils.shared_cache import SharedTokenCache
+from tests.app import PROTECTED_ENDPOINT_URI, TOKEN_URI
+
+
+def test_get_client_is_cached(clear_database, model_factory, query_counter):
+    clear_database()
+    app = model_factory.save_application()
+    validator.invalidate_client(app.client_id)
+    validator._get_client(app.client_id)  # pylint: disable=protected-access
+    app.query.session.expunge_all()
+
+    with query_counter:
+        client = validator._get_client(app.client_id)  # pylint: disable=protected-access
+
+    assert query_counter.count == 0
+    assert client.id == app.id
+    assert client.default_redirect_uri == app.default_redirect_uri
+
+
+def test_unknown_client_is_cached(query_counter):
+    validator.invalidate_client('unknown_client')
+    assert validator._get_client('unknown_client') is False  # pylint: disable=protected-access
+
+    with query_counter:
+        assert validator._get_client('unknown_client') is False  # pylint: disable=protected-access
+
+    assert query_counter.count == 0
+
+
+def test_client_cache_invalidated_on_change(clear_database, model_factory):
+    clear_database()
+    app = model_factory.save_application()
+    validator._get_client(app.client_id)  # pylint: disable=protected-access
+    app.default_redirect_uri = 'http://changed.url/auth'
+    app.query.session.flush()
+
+    client = validator._get_client(app.client_id)  # pylint: disable=protected-access
+
+    assert client.default_redirect_uri == 'http://changed.url/auth'
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    cache = TTLCache(maxsize=16, ttl=60)
+    monkeypatch.setattr(validator, 'token_cache', cache)
+    return cache
+
+
+def test_bearer_token_validation_is_cached(webtest_app, clear_database, token_cache,
+                                           query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    with query_counter:
+        resp = webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    assert query_counter.count == 0
+    assert json.loads(resp.body.decode('utf-8'))['user'] == webtest_app.user.id
+    assert token_cache.stats()['hits'] == 1
+
+
+def test_cached_bearer_token_checks_scopes(webtest_app, clear_database, token_cache):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    webtest_app.post(PROTECTED_ENDPOINT_URI, headers={'HTTP-CLIENT-ID': '8.8.8.8'}, status=403)
+    assert token_cache.stats()['hits'] == 1
+
+
+def test_cached_bearer_token_expires(webtest_app, clear_database, token_cache):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.token.expires_at = datetime.now(tz=timezone.utc) + timedelta(seconds=1)
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+    token_cache.set(webtest_app.token.access_token, CachedBearerToken(
+        expires_at=datetime.now(tz=timezone.utc) - timedelta(seconds=1),
+        scopes='default_get',
+        user={'id': webtest_app.user.id},
+        client_id=webtest_app.application.client_id))
+
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+
+def test_refresh_purges_cached_bearer_token(webtest_app, clear_database, token_cache):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+    assert len(token_cache) == 1
+
+    webtest_app.post(TOKEN_URI, {'grant_type': 'refresh_token',
+                                 'refresh_token': webtest_app.token.refresh_token,
+                                 'client_id': webtest_app.application.client_id},
+                     status=200)
+
+    assert len(token_cache) == 0
+
+
+@pytest.fixture
+def negative_cache(monkeypatch):
+    cache = TTLCache(maxsize=16, ttl=10)
+    monkeypatch.setattr(validator, 'negative_cache', cache)
+    return cache
+
+
+def test_unknown_bearer_token_is_rejected_without_query(webtest_app, negative_cache,
+                                                        query_counter):
+    webtest_app.auth_headers['Authorization'] = 'Bearer unknown'
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+    with query_counter:
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+    assert query_counter.count == 0
+    assert negative_cache.stats()['hits'] == 1
+
+
+def test_expired_bearer_token_is_rejected_without_query(webtest_app, clear_database,
+                                                        negative_cache, query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.token.expires_at = datetime.now(tz=timezone.utc) - timedelta(seconds=1)
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+    with query_counter:
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+    assert query_counter.count == 0
+
+
+def test_unknown_client_id_is_rejected_without_query(webtest_app, negative_cache,
+                                                     query_counter):
+    params = {'grant_type': 'client_credentials', 'client_id': 'unknown_client_id'}
+    webtest_app.post(TOKEN_URI, params, status=401)
+
+    with query_counter:
+        webtest_app.post(TOKEN_URI, params, status=401)
+
+    assert query_counter.count == 0
+    assert negative_cache.stats()['hits'] == 1
+
+
+def test_new_client_id_is_not_negatively_cached(clear_database, model_factory, negative_cache):
+    clear_database()
+    assert validator._get_client('new_client_id') is False  # pylint: disable=protected-access
+
+    app = model_factory.save_application(client_id='new_client_id')
+    app.query.session.flush()
+
+    assert validator._get_client('new_client_id')  # pylint: disable=protected-access
+
+
+def test_saved_bearer_token_is_not_negatively_cached():
+    store = MemoryTokenStore()
+    user = store.save_user(id=1, username='user')
+    client = store.save_client(id=1, client_id='client', user_id=1)
+    token_validator = OAuth2RequestValidator(store=store)
+    assert not token_validator.validate_bearer_token('access', ['default_get'],
+                                                     Request('http://test.url/'))
+    request = Request('http://test.url/')
+    request.client, request.user = client, user
+
+    token_validator.save_bearer_token(
+        {'access_token': 'access', 'expires_in': 3600, 'scope': 'default_get'}, request)
+
+    assert token_validator.validate_bearer_token('access', ['default_get'],
+                                                 Request('http://test.url/'))
+
+
+class LaggingStore(MemoryTokenStore):
+
+    def stale_misses(self):
+        return True
+
+
+def test_stale_misses_are_not_negatively_cached():
+    token_validator = OAuth2RequestValidator(store=LaggingStore())
+
+    assert not token_validator.validate_bearer_token('access', ['default_get'],
+                                                     Request('http://test.url/'))
+    assert token_validator._get_client('client') is False  # pylint: disable=protected-access
+
+    assert len(token_validator.negative_cache) == 0
+
+
+class BlockingStore(MemoryTokenStore):
+
+    def __init__(self):
+        super(BlockingStore, self).__init__()
+        self.release = threading.Event()
+        self.lookups = 0
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):
+        self.lookups += 1
+        self.release.wait(5)
+        return super(BlockingStore, self).get_bearer_token(access_token, refresh_token,
+                                                           consistent)
+
+
+def test_concurrent_validations_share_one_lookup():
+    store = BlockingStore()
+    user = store.save_user(id=1, username='user')
+    client = store.save_client(id=1, client_id='client', user_id=1)
+    store.save_bearer_token(client, user, 'default_get', 'access', None,
+                            datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    token_validator = OAuth2RequestValidator(store=store)
+    requests = [Request('http://test.url/') for _ in range(5)]
+    threads = [threading.Thread(target=token_validator.validate_bearer_token,
+                                args=('access', ['default_get'], request))
+               for request in requests]
+    for thread in threads:
+        thread.start()
+    while token_validator.single_flight.stats()['coalesced'] < 4:
+        time.sleep(0.001)
+    store.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert store.lookups == 1
+    assert all(request.user.id == 1 and request.client.client_id == 'client'
+               for request in requests)
+
+
+@pytest.fixture
+def signer():
+    token_signer = TokenSigner({'key1': b'secret'}, 'key1')
+    use_signed_tokens(token_signer)
+    yield token_signer
+    use_signed_tokens(None)
+
+
+def test_signed_bearer_token_is_validated_without_database(
+        webtest_app, clear_database, model_factory, signer, query_counter):
+    clear_database()
+    user = model_factory.save_user()
+    app = model_factory.save_application(user=user, default_scopes='default_get')
+    resp = webtest_app.post(TOKEN_URI, {'grant_type': 'client_credentials',
+                                        'client_id': app.client_id}, status=200)
+    access_token = json.loads(resp.body.decode('utf-8'))['access_token']
+    assert signer.verify(access_token)['cid'] == app.client_id
+    app.query.session.expunge_all()
+
+    with query_counter:
+        resp = webtest_app.get(PROTECTED_ENDPOINT_URI,
+                               headers={'Authorization': 'Bearer {}'.format(access_token)},
+                               status=200)
+
+    assert query_counter.count == 0
+    resp_dict = json.loads(resp.body.decode('utf-8'))
+    assert resp_dict['client'] == app.client_id
+    assert resp_dict['user'] == user.id
+
+
+def test_signed_bearer_token_checks_signature(webtest_app, signer):
+    token = TokenSigner({'key1': b'other'}, 'key1').sign(
+        {'exp': 2 ** 40, 'aid': 1, 'cid': 'test', 'uid': 1, 'scope': 'default_get'})
+    webtest_app.get(PROTECTED_ENDPOINT_URI,
+                    headers={'Authorization': 'Bearer {}'.format(token)},
+                    status=403)
+
+
+def test_missing_bearer_token_with_signer(signer):  # pylint: disable=unused-argument
+    valid, request = server.verify_request('http://x/', 'GET', '', {}, ['default_get'])
+
+    assert not valid
+    assert request.access_token is None
+
+
+def test_signed_bearer_token_expires(webtest_app, signer):
+    token = signer.sign({'exp': 0, 'aid': 1, 'cid': 'test', 'uid': 1, 'scope': 'default_get'})
+    webtest_app.get(PROTECTED_ENDPOINT_URI,
+                    headers={'Authorization': 'Bearer {}'.format(token)},
+                    status=403)
+
+
+def test_protected_resource_needs_one_query(webtest_app, clear_database, query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.token.query.session.flush()
+    webtest_app.token.query.session.expunge_all()
+
+    with query_counter:
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    assert query_counter.count == 1
+
+
+def test_get_user(clear_database, model_factory):
+    clear_database()
+    user = model_factory.save_user()
+    app = model_factory.save_application(user=user)
+
+    assert validator._get_user(app.client_id).id == user.id  # pylint: disable=protected-access
+    assert validator._get_user('unknown_client') is False  # pylint: disable=protected-access
+
+
+@pytest.fixture
+def shared_cache(monkeypatch, tmpdir):
+    cache = SharedTokenCache(str(tmpdir.join('tokens')), slots=64)
+    monkeypatch.setattr(validator, 'shared_cache', cache)
+    yield cache
+    cache.close()
+
+
+def test_bearer_token_validation_is_shared(webtest_app, clear_database, shared_cache,
+                                           query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+    # another worker mapping the same file
+    worker_cache = SharedTokenCache(shared_cache.path, slots=64)
+    worker = OAuth2RequestValidator(store=validator.store, shared_cache=worker_cache)
+    request = Request('/')
+
+    with query_counter:
+        assert worker.validate_bearer_token(
+            webtest_app.token.access_token, ['default_get'], request)
+
+    assert query_counter.count == 0
+    assert request.user.id == webtest_app.user.id
+    assert request.client.client_id == webtest_app.application.client_id
+    assert not worker.validate_bearer_token(webtest_app.token.access_token, ['other'], request)
+    assert worker_cache.stats()['hits'] == 2
+
+    validator.invalidate_bearer_token(webtest_app.token.access_token)
+    assert worker_cache.get(webtest_app.token.access_token) is None
+    worker_cache.close()
+
+
+class RevokedDuringLookupStore(MemoryTokenStore):
+
+    def __init__(self, revoke):
+        super(RevokedDuringLookupStore, self).__init__()
+        self.revoke = revoke
+
+    def get_bearer_token(self, access_token=None, refresh_token=None, consistent=False):
+        bearer_token = super(RevokedDuringLookupStore, self).get_bearer_token(
+            access_token, refresh_token, consistent)
+        # another worker revokes the token once its row was read
+        self.revoke(access_token)
+        return bearer_token
+
+
+def test_shared_cache_keeps_an_invalidation_during_the_lookup(shared_cache):
+    store = RevokedDuringLookupStore(shared_cache.invalidate)
+    user = store.save_user(id=1, username='user')
+    client = store.save_client(id=1, client_id='client', user_id=1)
+    store.save_bearer_token(client, user, 'default_get', 'access', None,
+                            datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    token_validator = OAuth2RequestValidator(store=store, shared_cache=shared_cache)
+
+    assert token_validator.validate_bearer_token('access', ['default_get'],
+                                                 Request('http://test.url/'))
+
+    assert shared_cache.get('access') is None
+    assert shared_cache.stats()['invalidated'] == 1
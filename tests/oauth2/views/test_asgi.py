@@ -0,0 +1,195 @@
+# pylint: disable=invalid-name,missing-docstring,unused-argument,redefined-outer-name
+"""
+tests the async views and decorator, driven by asyncio with the requests of
+the WSGI app since the installed falcon may not have the ASGI app, and
+through the ASGI app when it has
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+import falcon
+from falcon import testing
+import pytest
+from falcon_oauth.oauth2.decorators import async_provider
+from falcon_oauth.oauth2.models import BearerToken
+from falcon_oauth.oauth2.tokens import TokenSigner
+from falcon_oauth.oauth2.validators.oauth2_request_validator import use_signed_tokens
+from falcon_oauth.oauth2.views import AsyncAuthorization, AsyncToken
+from falcon_oauth.oauth2.views.utils import BODY_ATTRIBUTE, set_body
+from falcon_oauth.utils.database import Session
+from falcon_oauth.utils.offload import Offloader
+
+
+@pytest.fixture
+def offloader():
+    pool = Offloader(max_workers=4)
+    yield pool
+    pool.shutdown()
+
+
+def _request(method, path, query_string=None, body=None, headers=None):
+    headers = dict(headers or {})
+    if body is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    return falcon.Request(testing.create_environ(
+        path, query_string=query_string or '', method=method, body=body, headers=headers))
+
+
+def _text(resp):
+    return getattr(resp, BODY_ATTRIBUTE)
+
+
+def _save_token(model_factory, scopes='default_get'):
+    app = model_factory.save_application()
+    bearer_token = BearerToken(
+        application=app, user=app.user, scopes=scopes, access_token='async_token',
+        refresh_token='async_refresh', expires_at=datetime.now(tz=timezone.utc) + timedelta(hours=1))
+    Session.add(bearer_token)  # pylint: disable=no-member
+    Session.commit()  # pylint: disable=no-member
+    return app
+
+
+def test_token(committed_database, model_factory, offloader):
+    app = model_factory.save_application()
+    client_id = app.client_id
+    Session.commit()  # pylint: disable=no-member
+    req = _request('POST', '/oauth2/token/', body=urlencode({
+        'grant_type': 'client_credentials', 'client_id': client_id}))
+    resp = falcon.Response()
+
+    asyncio.run(AsyncToken(offloader).on_post(req, resp))
+
+    assert resp.status == falcon.HTTP_200
+    access_token = json.loads(_text(resp))['access_token']
+    # saved and committed by the thread of the offloader
+    assert BearerToken.query.filter_by(access_token=access_token).count() == 1
+
+
+def test_authorization_get(committed_database, model_factory, offloader):
+    app = model_factory.save_application(response_type='code')
+    client_id = app.client_id
+    Session.commit()  # pylint: disable=no-member
+    req = _request('GET', '/oauth2/authorize/', query_string=urlencode({
+        'response_type': 'code', 'client_id': client_id}))
+    resp = falcon.Response()
+
+    asyncio.run(AsyncAuthorization(offloader).on_get(req, resp))
+
+    assert resp.status == falcon.HTTP_200
+    assert client_id in _text(resp)
+
+
+class AsyncProtectedEndpoint(object):  # pylint: disable=too-few-public-methods
+
+    @async_provider.protected_resource_view(scopes=['default_get'])
+    async def on_get(self, req, resp):
+        set_body(resp, json.dumps({'client': req.client.client_id, 'user': req.user.id}))
+
+
+def test_protected_resource(committed_database, model_factory):
+    app = _save_token(model_factory)
+    resource = AsyncProtectedEndpoint()
+
+    async def get(token):
+        req = _request('GET', '/protected_resource',
+                       headers={'Authorization': 'Bearer {}'.format(token)})
+        resp = falcon.Response()
+        await resource.on_get(req, resp)
+        return resp
+
+    async def get_all():
+        return await asyncio.gather(*[get('async_token') for _ in range(50)] + [get('unknown')])
+
+    coalesced = async_provider.single_flight.stats()['coalesced']
+    responses = asyncio.run(get_all())
+
+    # the requests of the same token share one verification
+    assert async_provider.single_flight.stats()['coalesced'] - coalesced == 49
+    assert all(resp.status == falcon.HTTP_200 for resp in responses[:-1])
+    assert json.loads(_text(responses[0])) == {'client': app.client_id, 'user': app.user_id}
+    assert responses[-1].status == falcon.HTTP_403
+
+
+class AsyncUserEndpoint(object):  # pylint: disable=too-few-public-methods
+
+    @async_provider.protected_resource_view(scopes=['default_get'])
+    async def on_get(self, req, resp):
+        set_body(resp, json.dumps({'client': req.client.redirect_uris,
+                                   'user': req.user.username}))
+
+
+def test_protected_resource_with_signed_token(committed_database, model_factory):
+    app = model_factory.save_application()
+    Session.commit()  # pylint: disable=no-member
+    expected = {'client': app.redirect_uris, 'user': app.user.username}
+    signer = TokenSigner({'key1': b'secret'}, 'key1')
+    token = signer.sign({'exp': 2 ** 40, 'aid': app.id, 'cid': app.client_id,
+                         'uid': app.user_id, 'scope': 'default_get'})
+    req = _request('GET', '/protected_resource',
+                   headers={'Authorization': 'Bearer {}'.format(token)})
+    resp = falcon.Response()
+    use_signed_tokens(signer)
+    try:
+        asyncio.run(AsyncUserEndpoint().on_get(req, resp))
+    finally:
+        use_signed_tokens(None)
+
+    # the references of the signed token are loaded before the session is
+    # removed
+    assert resp.status == falcon.HTTP_200
+    assert json.loads(_text(resp)) == expected
+
+
+class AsyncRelationshipEndpoint(object):  # pylint: disable=too-few-public-methods
+
+    @async_provider.protected_resource_view(scopes=['default_get'])
+    async def on_get(self, req, resp):
+        client = Session.merge(req.client, load=False)  # pylint: disable=no-member
+        set_body(resp, json.dumps({'user': client.user.username}))
+        Session.remove()  # pylint: disable=no-member
+
+
+def test_coalesced_requests_merge_their_client(committed_database, model_factory):
+    app = _save_token(model_factory)
+    expected = {'user': app.user.username}
+    Session.remove()  # pylint: disable=no-member
+    resource = AsyncRelationshipEndpoint()
+
+    async def get():
+        req = _request('GET', '/protected_resource',
+                       headers={'Authorization': 'Bearer async_token'})
+        resp = falcon.Response()
+        await resource.on_get(req, resp)
+        return resp
+
+    async def get_all():
+        return await asyncio.gather(*[get() for _ in range(10)])
+
+    # the relationships of the shared client are read through a copy merged
+    # in the session of each responder
+    assert all(json.loads(_text(resp)) == expected for resp in asyncio.run(get_all()))
+
+
+def test_asgi_app(committed_database, model_factory, offloader):
+    asgi = pytest.importorskip('falcon.asgi')
+    app = _save_token(model_factory)
+    client_id, user_id = app.client_id, app.user_id
+    asgi_app = asgi.App()
+    asgi_app.add_route('/oauth2/token/', AsyncToken(offloader))
+    asgi_app.add_route('/protected_resource', AsyncProtectedEndpoint())
+    client = testing.TestClient(asgi_app)
+
+    result = client.simulate_post(
+        '/oauth2/token/', body=urlencode({'grant_type': 'client_credentials',
+                                          'client_id': client_id}),
+        headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    assert result.status == falcon.HTTP_200
+    assert 'access_token' in result.json
+
+    result = client.simulate_get('/protected_resource',
+                                 headers={'Authorization': 'Bearer async_token'})
+    assert result.status == falcon.HTTP_200
+    assert result.json == {'client': client_id, 'user': user_id}
+    assert client.simulate_get('/protected_resource', headers={
+        'Authorization': 'Bearer unknown'}).status == falcon.HTTP_403
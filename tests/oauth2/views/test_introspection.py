@@ -0,0 +1,82 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the introspection endpoint
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from falcon_oauth.oauth2.models import BearerToken
+from falcon_oauth.utils.database import Session
+from tests.app import INTROSPECTION_URI
+
+
+def _expired_token(webtest_app):
+    bearer_token = BearerToken(
+        application=webtest_app.application, user=webtest_app.user, scopes='default_get',
+        access_token='expired', expires_at=datetime.now(tz=timezone.utc) - timedelta(seconds=1))
+    Session.add(bearer_token)  # pylint: disable=no-member
+    return bearer_token
+
+
+def test_introspection_requires_a_token_of_scope(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+
+    webtest_app.post(INTROSPECTION_URI, {'token': webtest_app.token.access_token}, status=401)
+
+
+def test_introspection_without_token(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='introspection')
+
+    webtest_app.post(INTROSPECTION_URI, {}, status=400)
+
+
+def test_introspection(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='introspection')
+
+    resp = webtest_app.post(INTROSPECTION_URI, {'token': webtest_app.token.access_token})
+
+    info = json.loads(resp.body.decode('utf-8'))
+    assert info['active'] is True
+    assert info['scope'] == 'introspection'
+    assert info['client_id'] == webtest_app.application.client_id
+    assert info['sub'] == str(webtest_app.user.id)
+    assert info['username'] == webtest_app.user.username
+    assert resp.headers['Cache-Control'] == 'private, max-age=60'
+
+
+def test_introspection_of_an_unknown_token(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='introspection')
+
+    resp = webtest_app.post(INTROSPECTION_URI, {'token': 'unknown'})
+
+    assert json.loads(resp.body.decode('utf-8')) == {'active': False}
+
+
+def test_batch_introspection(webtest_app, clear_database, query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='introspection')
+    webtest_app.token.expires_at = datetime.now(tz=timezone.utc) + timedelta(seconds=30)
+    _expired_token(webtest_app)
+    Session.flush()  # pylint: disable=no-member
+
+    with query_counter:
+        resp = webtest_app.post(INTROSPECTION_URI, [
+            ('token', webtest_app.token.access_token), ('token', 'expired'),
+            ('token', 'unknown')])
+
+    # the token of the resource server, and the tokens introspected at once
+    assert query_counter.count == 2
+    infos = json.loads(resp.body.decode('utf-8'))
+    assert [info['active'] for info in infos] == [True, False, False]
+    max_age = int(resp.headers['Cache-Control'].split('max-age=')[1])
+    assert 0 < max_age <= 30
+
+
+def test_batch_size_is_bounded(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='introspection')
+
+    webtest_app.post(INTROSPECTION_URI, [('token', str(i)) for i in range(101)], status=400)
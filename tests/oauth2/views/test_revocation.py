@@ -0,0 +1,109 @@
+# pylint: disable=invalid-name,missing-docstring
+"""
+tests the revocation endpoint
+"""
+import pytest
+from falcon_oauth.oauth2.models import BearerToken
+from falcon_oauth.oauth2.tokens import TokenSigner
+from falcon_oauth.oauth2.validators.oauth2_request_validator import validator, use_signed_tokens
+from falcon_oauth.utils.bloom import RevocationFilter
+from falcon_oauth.utils.cache import TTLCache
+from tests.app import PROTECTED_ENDPOINT_URI, REVOCATION_URI, TOKEN_URI
+from tests.conftest import BasicApplication
+
+
+@pytest.fixture
+def revocation_filter(monkeypatch):
+    revocations = RevocationFilter(capacity=100)
+    monkeypatch.setattr(validator, 'revocation_filter', revocations)
+    monkeypatch.setattr(validator, 'token_cache', TTLCache(maxsize=16, ttl=60))
+    return revocations
+
+
+def test_revoked_token_is_rejected_without_query(webtest_app, clear_database,
+                                                 revocation_filter, query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    # the validation of the token is cached
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+    webtest_app.post(REVOCATION_URI, {'token': webtest_app.token.access_token,
+                                      'client_id': webtest_app.application.client_id},
+                     status=200)
+
+    assert webtest_app.token.access_token in revocation_filter
+    assert BearerToken.query.filter_by(id=webtest_app.token.id).count() == 0
+    with query_counter:
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+    assert query_counter.count == 0
+
+
+def test_revoke_with_the_refresh_token(webtest_app, clear_database, revocation_filter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    access_token = webtest_app.token.access_token
+
+    webtest_app.post(REVOCATION_URI, {'token': webtest_app.token.refresh_token,
+                                      'token_type_hint': 'refresh_token',
+                                      'client_id': webtest_app.application.client_id},
+                     status=200)
+
+    assert access_token in revocation_filter
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+
+
+def test_refresh_revokes_the_previous_access_token(webtest_app, clear_database,
+                                                   revocation_filter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    BearerToken.query.session.flush()
+    signer = TokenSigner({'key1': b'secret'}, 'key1')
+    signed_token = signer.sign({'exp': 2 ** 40, 'aid': webtest_app.application.id,
+                                'cid': webtest_app.application.client_id,
+                                'uid': webtest_app.user.id, 'scope': 'default_get'})
+    webtest_app.token.access_token = signer.fingerprint(signed_token)
+    webtest_app.auth_headers['Authorization'] = 'Bearer {}'.format(signed_token)
+    use_signed_tokens(signer)
+    try:
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+        webtest_app.post(TOKEN_URI, {'grant_type': 'refresh_token',
+                                     'refresh_token': webtest_app.token.refresh_token,
+                                     'client_id': webtest_app.application.client_id},
+                         status=200)
+
+        # the signed token is still valid by its signature, not once rotated
+        assert signer.fingerprint(signed_token) in revocation_filter
+        webtest_app.get(PROTECTED_ENDPOINT_URI, status=403)
+    finally:
+        use_signed_tokens(None)
+
+
+def test_tokens_of_other_clients_are_not_revoked(webtest_app, clear_database, revocation_filter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+    other = BasicApplication()
+
+    webtest_app.post(REVOCATION_URI, {'token': webtest_app.token.access_token,
+                                      'client_id': other.client_id},
+                     status=200)
+
+    assert webtest_app.token.access_token not in revocation_filter
+    webtest_app.get(PROTECTED_ENDPOINT_URI, status=200)
+
+
+def test_revocation_of_an_unknown_token(webtest_app, clear_database, revocation_filter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+
+    webtest_app.post(REVOCATION_URI, {'token': 'unknown',
+                                      'client_id': webtest_app.application.client_id},
+                     status=200)
+
+
+def test_revocation_requires_a_known_client(webtest_app, clear_database, revocation_filter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_get')
+
+    webtest_app.post(REVOCATION_URI, {'token': webtest_app.token.access_token,
+                                      'client_id': 'unknown'},
+                     status=401)
@@ -4,6 +4,9 @@ tests that the token endpoint works fine
 """
 import json
 from datetime import datetime, timedelta, timezone
+from falcon_oauth.oauth2.models import BearerToken
+from falcon_oauth.oauth2.validators.oauth2_request_validator import validator
+from falcon_oauth.utils.database import Session
 from tests.app import TOKEN_URI
 
 
@@ -90,3 +93,87 @@ def test_token_page_sends_token_with_good_request(webtest_app, model_factory, cl
     assert 'token_type' in resp_data.keys()
     assert 'scope' in resp_data.keys()
     assert 'refresh_token' in resp_data.keys()
+
+
+def test_token_page_refreshes_token(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_scope')
+    access_token = webtest_app.token.access_token
+
+    request_params = {'grant_type': 'refresh_token',
+                      'refresh_token': webtest_app.token.refresh_token,
+                      'client_id': webtest_app.application.client_id}
+    resp = webtest_app.post(TOKEN_URI, request_params, status=200)
+    resp_data = json.loads(resp.body.decode('utf-8'))
+    assert resp_data['access_token'] != access_token
+    assert resp_data['scope'] == 'default_scope'
+
+
+def test_token_page_refuses_unknown_refresh_token(webtest_app, clear_database):
+    clear_database()
+    webtest_app.authenticate(scopes='default_scope')
+
+    request_params = {'grant_type': 'refresh_token',
+                      'refresh_token': 'unknown',
+                      'client_id': webtest_app.application.client_id}
+    webtest_app.post(TOKEN_URI, request_params, status=401)
+
+
+def test_token_page_refuses_reused_code(webtest_app, model_factory, clear_database,
+                                        query_counter):
+    clear_database()
+    auth_code = model_factory.save_authorization_code(
+        scopes='default_scope',
+        code='testcode')
+    auth_code.application.redirect_uris = 'http://test.redirect.com'
+    request_params = {'grant_type': 'authorization_code',
+                      'code': auth_code.code,
+                      'client_id': auth_code.application.client_id,
+                      'redirect_uri': auth_code.application.redirect_uris,
+                      'scope': auth_code.application.default_scopes}
+    Session.flush()  # pylint: disable=no-member
+
+    with query_counter:
+        webtest_app.post(TOKEN_URI, request_params, status=200)
+
+    # the client and the code deleted and returned, the new token is not
+    # flushed without the session middleware
+    assert query_counter.count == 2
+    webtest_app.post(TOKEN_URI, request_params, status=401)
+
+
+def test_token_page_rotates_refresh_token(webtest_app, clear_database, query_counter):
+    clear_database()
+    webtest_app.authenticate(scopes='default_scope')
+    refresh_token = webtest_app.token.refresh_token
+    request_params = {'grant_type': 'refresh_token',
+                      'refresh_token': refresh_token,
+                      'client_id': webtest_app.application.client_id}
+    Session.flush()  # pylint: disable=no-member
+
+    with query_counter:
+        resp = webtest_app.post(TOKEN_URI, request_params, status=200)
+
+    # the client, the token of the refresh token and its update
+    assert query_counter.count == 3
+    resp_data = json.loads(resp.body.decode('utf-8'))
+    assert BearerToken.query.count() == 1
+    assert BearerToken.query.one().refresh_token == resp_data['refresh_token']
+    assert BearerToken.query.one().previous_refresh_token == refresh_token
+    webtest_app.post(TOKEN_URI, request_params, status=401)
+
+
+def test_token_page_accepts_refresh_token_reused_in_grace(webtest_app, clear_database,
+                                                          monkeypatch):
+    clear_database()
+    monkeypatch.setattr(validator.store, 'refresh_token_reuse_grace', timedelta(seconds=10))
+    webtest_app.authenticate(scopes='default_scope')
+    request_params = {'grant_type': 'refresh_token',
+                      'refresh_token': webtest_app.token.refresh_token,
+                      'client_id': webtest_app.application.client_id}
+
+    first = json.loads(webtest_app.post(TOKEN_URI, request_params).body.decode('utf-8'))
+    second = json.loads(webtest_app.post(TOKEN_URI, request_params).body.decode('utf-8'))
+
+    assert second['refresh_token'] != first['refresh_token']
+    assert BearerToken.query.count() == 1
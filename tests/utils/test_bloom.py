@@ -0,0 +1,44 @@
+# pylint: disable=missing-docstring
+from falcon_oauth.utils.bloom import BloomFilter, RevocationFilter
+from tests.utils.test_cache import FakeTimer
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=1e-6)
+    for i in range(1000):
+        bloom.add('token{}'.format(i))
+
+    assert all('token{}'.format(i) in bloom for i in range(1000))
+    assert not any('other{}'.format(i) in bloom for i in range(1000))
+
+
+def test_bloom_filter_is_compact():
+    bloom = BloomFilter(capacity=10000, error_rate=1e-9)
+
+    assert len(bloom.bits) < 60000
+    assert bloom.hash_count == 30
+
+
+def test_revocation_filter_keeps_two_generations():
+    timer = FakeTimer()
+    revocations = RevocationFilter(capacity=10, ttl=10, timer=timer)
+    revocations.add('a')
+    timer.now = 15
+    revocations.add('b')
+
+    assert 'a' in revocations
+    assert revocations.stats() == {'current': 1, 'previous': 1,
+                                   'bytes': len(revocations._current.bits) * 2}  # pylint: disable=protected-access
+
+    timer.now = 25
+    assert 'a' not in revocations
+    assert 'b' in revocations
+
+
+def test_revocation_filter_forgets_after_two_ttl():
+    timer = FakeTimer()
+    revocations = RevocationFilter(capacity=10, ttl=10, timer=timer)
+    revocations.add('a')
+    timer.now = 20
+
+    assert 'a' not in revocations
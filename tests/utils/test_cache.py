@@ -0,0 +1,76 @@
+# pylint: disable=missing-docstring
+from falcon_oauth.utils.cache import TTLCache
+
+
+class FakeTimer(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_set():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_negative_entries_are_cached():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', False)
+    missing = object()
+
+    assert cache.get('a', missing) is False
+
+
+def test_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=2)
+    timer.now = 5
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+    timer.now = 10
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 2
+
+
+def test_ttl_is_capped():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1, ttl=100)
+    timer.now = 11
+
+    assert cache.get('a') is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+    assert len(cache) == 2
+
+
+def test_invalidate():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.invalidate('a')
+    cache.invalidate('unknown')
+
+    assert cache.get('a') is None
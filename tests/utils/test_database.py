@@ -0,0 +1,146 @@
+# pylint: disable=missing-docstring
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, event, literal, select
+from falcon_oauth.oauth2.models import User
+from falcon_oauth.oauth2.stores import SQLTokenStore
+from falcon_oauth.utils import database
+
+
+@pytest.fixture
+def configure():
+    settings = dict(database._engine_settings)  # pylint: disable=protected-access
+    yield database.configure
+    database.configure(**settings)
+
+
+def test_configure_unknown_setting(configure):
+    with pytest.raises(TypeError):
+        configure(pool_sise=2)
+
+
+def test_configure_recreates_engine(configure):
+    engine = database.get_engine()
+    configure(pool_size=2, statement_timeout=1500)
+
+    new_engine = database.get_engine()
+    assert new_engine is not engine
+    assert new_engine.pool.size() == 2
+    session = database.session_factory()
+    try:
+        assert session.execute('SHOW statement_timeout').scalar() == '1500ms'
+    finally:
+        session.close()
+
+
+def test_pool_status():
+    session = database.session_factory()
+    try:
+        session.execute('SELECT 1')
+        status = database.get_pool_status()
+        assert status['checked_out'] >= 1
+    finally:
+        session.close()
+
+    status = database.get_pool_status()
+    assert status['checkouts'] >= 1
+    assert status['checkins'] >= 1
+    assert status['connects'] >= 1
+    assert status['wait_max'] >= 0
+
+
+def test_utc_datetime_on_sqlite():
+    engine = create_engine('sqlite://')
+    table = Table('expiry', MetaData(), Column('expires_at', database.UTCDateTime))
+    table.create(engine)
+    expires_at = datetime(2030, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    engine.execute(table.insert(), expires_at=expires_at)
+
+    saved = engine.execute(select([table.c.expires_at])).scalar()
+    assert saved == expires_at
+    assert saved.tzinfo is timezone.utc
+    assert engine.execute(select([table.c.expires_at]).where(
+        table.c.expires_at < datetime(2030, 1, 1, 11, 30, tzinfo=timezone.utc))).scalar() == saved
+
+
+@pytest.fixture
+def replica(configure):
+    configure(replica_urls=[str(database.get_engine().url)])
+    engine = database.get_replica_engines()[0]
+    yield engine
+    configure(replica_urls=[])
+
+
+def test_replica_pool_status(replica):
+    checkouts = database.get_pool_status()['checkouts']
+
+    with replica.connect() as connection:
+        connection.execute(select([literal(1)]))
+
+    # the replica has its own metrics, not the ones of the primary
+    assert database.get_replica_pool_status()[0]['checkouts'] == 1
+    assert database.get_pool_status()['checkouts'] == checkouts
+
+
+def test_replica_reads(replica):
+    session = database.session_factory()
+    statement = select([literal(1)])
+    try:
+        assert session.get_bind(clause=statement) is database.get_engine()
+        with database.replica_reads(session):
+            assert session.get_bind(clause=statement) is replica
+            assert session.get_bind(clause=statement.with_for_update()) is database.get_engine()
+    finally:
+        session.close()
+
+
+def test_replica_reads_after_a_write(replica):
+    session = database.session_factory()
+    statement = select([literal(1)])
+    try:
+        with database.replica_reads(session):
+            session.get_bind(clause=User.__table__.update().values(username='user'))
+            # the transaction reads its own writes
+            assert session.get_bind(clause=statement) is database.get_engine()
+            session.rollback()
+            assert session.get_bind(clause=statement) is replica
+    finally:
+        session.close()
+
+
+def test_store_reads_from_replica(committed_database, model_factory, replica):
+    app = model_factory.save_application()
+    client_id = app.client_id
+    database.Session.commit()  # pylint: disable=no-member
+    database.Session.remove()
+    counts = {'primary': 0, 'replica': 0}
+
+    def count(name):
+        def _count(*args, **kwargs):  # pylint: disable=unused-argument
+            counts[name] += 1
+        return _count
+
+    count_primary, count_replica = count('primary'), count('replica')
+    event.listen(database.get_engine(), 'before_cursor_execute', count_primary)
+    event.listen(replica, 'before_cursor_execute', count_replica)
+    try:
+        store = SQLTokenStore()
+        assert store.get_client(client_id).client_id == client_id
+        assert counts == {'primary': 0, 'replica': 1}
+        # not on the replica yet, maybe
+        assert store.get_client('unknown') is None
+        assert counts == {'primary': 1, 'replica': 2}
+        assert not store.stale_misses()
+        # the misses stay on the replica without the fallback
+        store.replica_fallback = False
+        assert store.get_client('unknown') is None
+        assert counts == {'primary': 1, 'replica': 3}
+        assert store.stale_misses()
+        # the revocations and the refreshes read the latest state
+        store.get_bearer_token(access_token='unknown', consistent=True)
+        store.get_bearer_token(refresh_token='unknown')
+        assert counts == {'primary': 3, 'replica': 3}
+    finally:
+        event.remove(database.get_engine(), 'before_cursor_execute', count_primary)
+        event.remove(replica, 'before_cursor_execute', count_replica)
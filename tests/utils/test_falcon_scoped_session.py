@@ -0,0 +1,151 @@
+# pylint: disable=missing-docstring
+"""
+tests the scopes of the sessions, under many concurrent threads, asyncio
+tasks and greenlets
+"""
+import asyncio
+import itertools
+import threading
+import pytest
+from falcon_oauth.utils.database import get_engine, session_factory
+from falcon_oauth.utils.falcon_scoped_session import falcon_oauth_session
+
+CONCURRENCY = 200
+
+
+def _factory():
+    counter = itertools.count()
+    return lambda: next(counter)
+
+
+def test_unknown_scope():
+    with pytest.raises(ValueError):
+        falcon_oauth_session(_factory(), scope='process')
+
+
+@pytest.mark.parametrize('scope', ['thread', 'context'])
+def test_threads_have_their_session(scope):
+    session = falcon_oauth_session(_factory(), scope=scope)
+    barrier = threading.Barrier(50)
+    seen = []
+
+    def run():
+        value = session.registry()
+        barrier.wait()
+        # the other threads created their session meanwhile
+        seen.append((value, session.registry(), session.registry.has()))
+        session.registry.clear()
+        assert not session.registry.has()
+
+    threads = [threading.Thread(target=run) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({value for value, _, _ in seen}) == 50
+    assert all(value == again and has for value, again, has in seen)
+    assert not session.registry.has()
+
+
+def test_tasks_have_their_session():
+    session = falcon_oauth_session(_factory(), scope='context')
+
+    async def request():
+        value = session.registry()
+        await asyncio.sleep(0)
+        assert session.registry() == value
+        session.registry.clear()
+        return value
+
+    async def requests():
+        return await asyncio.gather(*[request() for _ in range(CONCURRENCY)])
+
+    assert len(set(asyncio.run(requests()))) == CONCURRENCY
+    assert not session.registry.has()
+
+
+def test_greenlets_have_their_session():
+    greenlet = pytest.importorskip('greenlet')
+    session = falcon_oauth_session(_factory(), scope='greenlet')
+    values = []
+
+    def request():
+        value = session.registry()
+        hub.switch()
+        assert session.registry() == value
+        values.append(value)
+
+    hub = greenlet.getcurrent()
+    greenlets = [greenlet.greenlet(request) for _ in range(CONCURRENCY)]
+    for request_greenlet in greenlets:
+        request_greenlet.switch()
+    for request_greenlet in greenlets:
+        request_greenlet.switch()
+
+    assert len(set(values)) == CONCURRENCY
+    del greenlets, request_greenlet
+    # the sessions of the ended greenlets are not kept
+    assert len(session.registry.registry) == 0
+
+
+def test_concurrent_tasks_do_not_exhaust_the_pool():
+    session = falcon_oauth_session(session_factory, scope='context')
+    pool = get_engine().pool
+    live = {}
+    peak = []
+
+    async def request(index, connections):
+        live[index] = session()
+        # every task holds its session while the others run
+        await asyncio.sleep(0)
+        peak.append(len(live))
+        assert len(set(map(id, live.values()))) == len(live)
+        async with connections:
+            try:
+                result = session.execute('SELECT 1').scalar()
+                # and its connection, up to the size of the pool
+                await asyncio.sleep(0)
+                assert session() is live[index]
+                return result
+            finally:
+                session.remove()
+                del live[index]
+
+    async def requests():
+        connections = asyncio.Semaphore(pool.size())
+        return await asyncio.gather(*[request(index, connections)
+                                      for index in range(CONCURRENCY)])
+
+    assert asyncio.run(requests()) == [1] * CONCURRENCY
+    assert max(peak) == CONCURRENCY
+    assert pool.checkedout() == 0
+
+
+def test_concurrent_greenlets_do_not_exhaust_the_pool():
+    greenlet = pytest.importorskip('greenlet')
+    session = falcon_oauth_session(session_factory, scope='greenlet')
+    pool = get_engine().pool
+    live = {}
+    results = []
+
+    def request(index):
+        live[index] = session()
+        # every greenlet holds its session while the others run
+        hub.switch()
+        try:
+            assert session() is live[index]
+            results.append(session.execute('SELECT 1').scalar())
+        finally:
+            session.remove()
+
+    hub = greenlet.getcurrent()
+    greenlets = [greenlet.greenlet(request) for _ in range(CONCURRENCY)]
+    for index, request_greenlet in enumerate(greenlets):
+        request_greenlet.switch(index)
+
+    assert len(set(map(id, live.values()))) == CONCURRENCY
+    for request_greenlet in greenlets:
+        request_greenlet.switch()
+    assert results == [1] * CONCURRENCY
+    assert pool.checkedout() == 0
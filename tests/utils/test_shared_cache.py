@@ -0,0 +1,175 @@
+# pylint: disable=missing-docstring,redefined-outer-name
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from falcon_oauth.oauth2.stores.records import BearerTokenRecord, ClientRecord
+from falcon_oauth.utils import shared_cache as shared_cache_module
+from falcon_oauth.utils.shared_cache import SharedTokenCache
+from tests.utils.test_cache import FakeTimer
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def bearer_token(access_token, user_id=1, scopes='read,write', expires_in=3600):
+    application = ClientRecord(*([None] * 10))._replace(id=2, client_id='client')
+    return BearerTokenRecord(
+        id=1, application_id=2, user_id=user_id, scopes=scopes, access_token=access_token,
+        refresh_token=None, expires_at=EPOCH + timedelta(seconds=expires_in), user=None,
+        application=application)
+
+
+@pytest.fixture
+def timer():
+    fake_timer = FakeTimer()
+    fake_timer.now = EPOCH.timestamp()
+    return fake_timer
+
+
+@pytest.fixture
+def cache(tmpdir, timer):
+    shared_cache = SharedTokenCache(str(tmpdir.join('tokens')), slots=64, ttl=60, timer=timer)
+    yield shared_cache
+    shared_cache.close()
+
+
+def test_shared_cache(cache):
+    cache.set('token', bearer_token('token'))
+
+    assert cache.get('token') == (EPOCH + timedelta(seconds=3600), 'read,write', 1, 2, 'client')
+    assert cache.get('other') is None
+    assert cache.stats()['size'] == 1
+
+
+def test_shared_cache_without_user(cache):
+    cache.set('token', bearer_token('token', user_id=None))
+
+    assert cache.get('token').user_id is None
+
+
+def test_shared_cache_expires(cache, timer):
+    cache.set('short', bearer_token('short', expires_in=10))
+    cache.set('long', bearer_token('long'))
+    timer.now += 30
+
+    assert cache.get('short') is None
+    assert cache.get('long') is not None
+    timer.now += 60
+    assert cache.get('long') is None
+
+
+def test_shared_cache_invalidation(cache):
+    cache.set('a', bearer_token('a'))
+    cache.set('b', bearer_token('b'))
+    cache.invalidate('a')
+
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    cache.invalidate_all()
+    assert cache.get('b') is None
+    assert cache.stats()['generation'] == 1
+
+    cache.set('b', bearer_token('b'))
+    assert cache.get('b') is not None
+
+
+def test_shared_cache_skips_tokens_invalidated_since_their_version(cache):
+    version = cache.version('token')
+    # revoked by another process while the token was read
+    cache.invalidate('token')
+    cache.set('token', bearer_token('token'), version)
+
+    assert cache.get('token') is None
+    version = cache.version('token')
+    cache.invalidate_all()
+    cache.set('token', bearer_token('token'), version)
+    assert cache.get('token') is None
+    assert cache.stats()['invalidated'] == 2
+
+    cache.set('token', bearer_token('token'), cache.version('token'))
+    assert cache.get('token') is not None
+
+
+class _RacingSlot(object):  # pylint: disable=too-few-public-methods
+
+    """The struct of the slots, with a write of the slot during its first
+    copies."""
+
+    def __init__(self, writes):
+        self.slot = shared_cache_module.SLOT
+        self.size = self.slot.size
+        self.writes = writes
+        self.copies = 0
+
+    def unpack_from(self, buffer, offset):
+        fields = self.slot.unpack_from(buffer, offset)
+        self.copies += 1
+        if self.copies <= self.writes:
+            shared_cache_module.SEQUENCE.pack_into(buffer, offset, fields[0] + 2)
+        return fields
+
+
+def test_shared_cache_retries_reads_racing_with_writes(cache, monkeypatch):
+    cache.set('token', bearer_token('token'))
+    racing_slot = _RacingSlot(writes=1)
+    monkeypatch.setattr(shared_cache_module, 'SLOT', racing_slot)
+
+    assert cache.get('token') is not None
+    assert racing_slot.copies == 2
+
+    racing_slot.copies, racing_slot.writes = 0, shared_cache_module.READ_RETRIES
+    assert cache.get('token') is None
+
+
+def test_shared_cache_does_not_read_slots_being_written(cache):
+    cache.set('token', bearer_token('token'))
+    # the first slot probed, the table is empty
+    offset = next(cache._offsets(shared_cache_module._digest('token')))  # pylint: disable=protected-access
+    sequence = shared_cache_module.SEQUENCE.unpack_from(cache._map, offset)[0]  # pylint: disable=protected-access
+    shared_cache_module.SEQUENCE.pack_into(cache._map, offset, sequence + 1)  # pylint: disable=protected-access
+
+    assert cache.get('token') is None
+
+
+def test_shared_cache_evicts_in_full_table(tmpdir, timer):
+    cache = SharedTokenCache(str(tmpdir.join('tokens')), slots=4, probes=4, timer=timer)
+    for index in range(8):
+        cache.set('token{}'.format(index), bearer_token('token{}'.format(index)))
+        timer.now += 1
+
+    assert cache.stats()['size'] == 4
+    assert cache.stats()['evictions'] == 4
+    assert all(cache.get('token{}'.format(index)) is not None for index in range(4, 8))
+    cache.close()
+
+
+def test_shared_cache_skips_large_scopes(cache):
+    cache.set('token', bearer_token('token', scopes=','.join(['scope'] * 100)))
+
+    assert cache.get('token') is None
+    assert cache.stats()['oversized'] == 1
+
+
+def test_shared_cache_checks_its_size(cache):
+    with pytest.raises(ValueError):
+        SharedTokenCache(cache.path, slots=128)
+
+
+def _worker(path, now, queue):
+    cache = SharedTokenCache(path, slots=64, timer=lambda: now)
+    queue.put(cache.get('parent'))
+    cache.set('child', bearer_token('child'))
+    cache.close()
+
+
+def test_shared_cache_is_shared_by_processes(cache, timer):
+    cache.set('parent', bearer_token('parent'))
+    queue = multiprocessing.get_context('fork').Queue()
+    process = multiprocessing.get_context('fork').Process(
+        target=_worker, args=(cache.path, timer.now, queue))
+    process.start()
+    process.join(10)
+
+    assert queue.get(timeout=1).client_id == 'client'
+    assert cache.get('child').user_id == 1
@@ -0,0 +1,171 @@
+# pylint: disable=missing-docstring
+import asyncio
+import threading
+import time
+from falcon_oauth.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _run_threads(single_flight, func, count, share=None):
+    results = []
+
+    def call():
+        try:
+            results.append(single_flight.do('key', func, share))
+        except ValueError as error:
+            results.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_are_coalesced():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    threads, results = _run_threads(single_flight, lookup, 5, share=str.upper)
+    _wait_for(lambda: single_flight.stats()['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('VALUE', True)] * 4 + [('value', False)]
+    assert single_flight.stats() == {'calls': 5, 'coalesced': 4, 'timeouts': 0, 'in_flight': 0}
+
+
+def test_waiters_call_after_timeout():
+    single_flight = SingleFlight(timeout=0.01)
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+        return 'value'
+
+    threads, results = _run_threads(single_flight, lookup, 2)
+    _wait_for(lambda: single_flight.stats()['timeouts'] == 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 2
+    assert results == [('value', False)] * 2
+
+
+def test_waiters_call_when_the_leader_fails():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            raise ValueError('lookup failed')
+        return 'value'
+
+    threads, results = _run_threads(single_flight, lookup, 2)
+    _wait_for(lambda: single_flight.stats()['coalesced'] == 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # the leader raises, the waiter makes its own call
+    assert len(calls) == 2
+    assert ('value', False) in results
+    assert any(isinstance(result, ValueError) for result in results)
+
+
+def test_waiters_call_when_the_share_fails():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    def share(value):
+        raise ValueError('share failed')
+
+    threads, results = _run_threads(single_flight, lookup, 2, share=share)
+    _wait_for(lambda: single_flight.stats()['coalesced'] == 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # the leader keeps its value, the waiter makes its own call
+    assert len(calls) == 2
+    assert results == [('value', False)] * 2
+
+
+def test_async_concurrent_calls_are_coalesced():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def lookup(value):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        return await asyncio.gather(*[single_flight.do('key', lookup, 'value') for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [('value', False)] + [('value', True)] * 4
+    assert single_flight.stats() == {'calls': 5, 'coalesced': 4, 'timeouts': 0, 'in_flight': 0}
+
+
+def test_async_waiters_call_after_timeout():
+    single_flight = AsyncSingleFlight(timeout=0.01)
+
+    async def lookup(delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    async def run():
+        return await asyncio.gather(single_flight.do('key', lookup, 1),
+                                    single_flight.do('key', lookup, 0))
+
+    assert asyncio.run(run()) == [(1, False), (0, False)]
+    assert single_flight.stats()['timeouts'] == 1
+
+
+def test_async_waiters_call_when_the_share_fails():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def lookup(value):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return value
+
+    def share(value):
+        raise ValueError('share failed')
+
+    async def run():
+        return await asyncio.gather(*[single_flight.do('key', lookup, 'value', share=share)
+                                      for _ in range(2)])
+
+    assert asyncio.run(run()) == [('value', False)] * 2
+    assert len(calls) == 2